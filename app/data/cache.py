@@ -0,0 +1,240 @@
+# app/data/cache.py
+import datetime
+import functools
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Tables whose reads are cached; each gets a version counter bumped by triggers.
+VERSIONED_TABLES = ["users", "cyber_incidents", "datasets_metadata", "it_tickets"]
+
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_ENTRIES = 256
+# Memory budget per cached_read function; results over a quarter of it are not cached
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_tracking_ready = set()
+_tracking_lock = threading.Lock()
+
+
+# --------------------------
+# Table version counters
+# --------------------------
+def create_version_tracking(conn):
+    """
+    Create the table_versions table and the triggers that bump it.
+
+    Every INSERT, UPDATE or DELETE on a tracked table (from any code path,
+    including the page expanders) increments that table's version, which
+    invalidates every cached read of it. Safe to run repeatedly.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing = {row[0] for row in cur.fetchall()}
+
+    for table in VERSIONED_TABLES:
+        if table not in existing:
+            continue
+        cur.execute("INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+                """
+            )
+    conn.commit()
+
+
+def ensure_version_tracking(conn):
+    """
+    create_version_tracking() once per database file and process.
+    Needs a read-write connection.
+    """
+    key = _db_key(conn)
+    if key in _tracking_ready:
+        return
+    with _tracking_lock:
+        if key not in _tracking_ready:
+            create_version_tracking(conn)
+            _tracking_ready.add(key)
+
+
+def get_table_version(conn, table):
+    """
+    Current version of a table, or None if version tracking is not set up.
+    """
+    try:
+        row = conn.execute(
+            "SELECT version FROM table_versions WHERE table_name = ?", (table,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return None if row is None else row[0]
+
+
+def bump_table_version(conn, table):
+    """
+    Invalidate cached reads of a table by hand (for writers that bypass the
+    triggers, e.g. a bulk load with the triggers dropped).
+    """
+    conn.execute(
+        "UPDATE table_versions SET version = version + 1 WHERE table_name = ?", (table,)
+    )
+    conn.commit()
+
+
+def _db_key(conn):
+    """The main database file of a connection ('' for in-memory databases)."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+# --------------------------
+# Cache
+# --------------------------
+class QueryCache:
+    """
+    Thread-safe LRU cache with a time-to-live and a maximum number of entries.
+
+    With max_bytes, entries are also evicted until the sizes passed to put()
+    add up to at most max_bytes, and a single value larger than
+    max_bytes / 4 is not stored at all.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=None):
+        self.__ttl = ttl
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, otherwise (False, None)."""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                stored_at, value, size = entry
+                if time.monotonic() - stored_at <= self.__ttl:
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return True, value
+                del self.__entries[key]
+                self.__bytes -= size
+            self.__misses += 1
+            return False, None
+
+    def put(self, key, value, size=0):
+        """Store value; size is its footprint in bytes (counted against max_bytes)."""
+        if self.__max_bytes is not None and size > self.__max_bytes // 4:
+            return
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.__bytes -= old[2]
+            self.__entries[key] = (time.monotonic(), value, size)
+            self.__bytes += size
+            while len(self.__entries) > self.__max_entries or (
+                self.__max_bytes is not None and self.__bytes > self.__max_bytes
+            ):
+                _, (_, _, evicted) = self.__entries.popitem(last=False)
+                self.__bytes -= evicted
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "hits": self.__hits,
+                "misses": self.__misses,
+            }
+
+
+def result_bytes(value) -> int:
+    """Approximate memory held by a query result (DataFrame, Series or list)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Turn lists/dicts/sets in query arguments into hashable tuples."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def cached_read(table=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Decorator for read functions of the form func(conn, *args, **kwargs).
+
+    Results are keyed on the database file, the function, its arguments and
+    the table's version counter, so a write to the table invalidates them
+    immediately; TTL, max_entries and max_bytes bound how long, how many
+    and how much memory are kept (a result over max_bytes / 4, e.g. a whole
+    table, is returned but not cached).
+    If table is None the table name is taken from the first argument after
+    conn. Cached DataFrames and Series are shared between callers, not
+    copied: treat them as read-only and copy() before modifying one.
+    Without version tracking in the database the call goes straight through.
+    """
+
+    def decorator(func):
+        cache = QueryCache(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            table_name = table if table is not None else args[0]
+            version = get_table_version(conn, table_name)
+            if version is None:
+                return func(conn, *args, **kwargs)
+
+            key = (_db_key(conn), table_name, version, _freeze(args), _freeze(kwargs))
+            hit, value = cache.get(key)
+            if not hit:
+                value = func(conn, *args, **kwargs)
+                cache.put(key, value, result_bytes(value))
+
+            # Lists are small (filter options), so callers get their own
+            if isinstance(value, list):
+                return list(value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
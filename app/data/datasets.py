@@ -1,7 +1,25 @@
 # app/data/datasets.py
 import pandas as pd
 
+from app.data.cache import cached_read
+from app.data.downsample import X_BINS, Y_BINS, xy_bins
+from app.data.query_builder import SelectQuery, first_column
+from app.data.rollups import (
+    DATASET_ROLLUP,
+    has_rollup,
+    key_expression,
+    query_counts,
+    query_totals,
+    rollup_counts,
+    rollup_totals,
+)
+from app.data.schema import get_table_columns
+from app.data.search_index import where_search
 
+DATASETS_TABLE = "datasets_metadata"
+
+
+@cached_read(DATASETS_TABLE)
 def get_all_datasets(conn):
     """
     Get all dataset metadata rows.
@@ -24,3 +42,99 @@ def insert_dataset(conn, name, source, category, size=None):
         (name, source, category, size),
     )
     conn.commit()
+
+
+def dataset_query(
+    conn,
+    category=None,
+    source=None,
+    text=None,
+    size_min=None,
+    size_max=None,
+):
+    """
+    Build a SelectQuery over datasets_metadata for the dashboard filters.
+
+    text is looked up in the dataset name through the full-text index
+    (see where_search) and the size range is inclusive.
+    """
+    columns = get_table_columns(conn, DATASETS_TABLE)
+    query = SelectQuery(DATASETS_TABLE, columns)
+    query.where_in("category", category)
+    query.where_in("source", source)
+    where_search(conn, query, DATASETS_TABLE, text, [first_column(columns, "name", "dataset_name")])
+    query.where_between(first_column(columns, "size", "file_size_mb"), size_min, size_max)
+    return query
+
+
+def _use_dataset_rollup(conn, text, size_min, size_max):
+    # The rollup has no name or size keys to filter on
+    return not text and size_min is None and size_max is None and has_rollup(conn, DATASET_ROLLUP)
+
+
+@cached_read(DATASETS_TABLE)
+def dataset_counts(
+    conn,
+    group_by,
+    category=None,
+    source=None,
+    text=None,
+    size_min=None,
+    size_max=None,
+):
+    """
+    Count the filtered datasets per category or source.
+
+    Read from the dataset rollup table; a name search or size range falls
+    back to GROUP BY over the matching rows.
+    """
+    if not _use_dataset_rollup(conn, text, size_min, size_max):
+        query = dataset_query(conn, category, source, text, size_min, size_max)
+        return query_counts(conn, query, key_expression(conn, DATASET_ROLLUP, group_by), group_by)
+    return rollup_counts(
+        conn, DATASET_ROLLUP, group_by, where={"category": category, "source": source}
+    )
+
+
+@cached_read(DATASETS_TABLE)
+def dataset_totals(conn, category=None, source=None, text=None, size_min=None, size_max=None):
+    """
+    Overview numbers for the filtered datasets: n (rows), size_n (rows with
+    a size), size_sum (bytes) and big_n (datasets over 1 MB).
+    """
+    measures = ["n", "size_n", "size_sum", "big_n"]
+    if not _use_dataset_rollup(conn, text, size_min, size_max):
+        query = dataset_query(conn, category, source, text, size_min, size_max)
+        totals = query_totals(conn, query, DATASET_ROLLUP, measures)
+    else:
+        totals = rollup_totals(
+            conn, DATASET_ROLLUP, measures, where={"category": category, "source": source}
+        )
+    return {name: float(value or 0) for name, value in totals.items()}
+
+
+@cached_read(DATASETS_TABLE)
+def dataset_size_points(conn, limit, **filters):
+    """
+    id and size of the filtered datasets (id order), at most limit rows.
+    For scatters small enough to draw point by point; filters are the same
+    keyword arguments as dataset_query.
+    """
+    size_col = first_column(get_table_columns(conn, DATASETS_TABLE), "size", "file_size_mb")
+    if size_col is None:
+        return pd.DataFrame(columns=["id", "size"])
+    query = dataset_query(conn, **filters).where(f"{size_col} IS NOT NULL")
+    sql, params = query.build(select=f"id, {size_col} AS size", order_by="id ASC", limit=limit)
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+@cached_read(DATASETS_TABLE)
+def dataset_size_bins(conn, x_bins=X_BINS, y_bins=Y_BINS, **filters):
+    """
+    The id vs size scatter of the filtered datasets, binned in SQL
+    (see xy_bins); filters are the same keyword arguments as dataset_query.
+    """
+    size_col = first_column(get_table_columns(conn, DATASETS_TABLE), "size", "file_size_mb")
+    if size_col is None:
+        return pd.DataFrame(columns=["x", "y", "count"])
+    return xy_bins(conn, dataset_query(conn, **filters), "id", size_col, x_bins, y_bins)
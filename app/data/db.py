@@ -1,19 +1,326 @@
 # app/data/db.py
-import sqlite3
+import logging
 import os
+import pathlib
+import sqlite3
+import threading
+import time
 
 DB_PATH = "DATA/intelligence_platform.db"
 
+# Maximum number of open SQLite handles per database file.
+POOL_SIZE = 8
+
+# How long a thread waits for a free connection before giving up (seconds).
+POOL_TIMEOUT = 10.0
+
+# A connection held longer than this by one thread is reported as a leak.
+LEAK_SECONDS = 300.0
+
+# PRAGMAs applied to every new connection, per connection profile.
+# WAL lets dashboard reads carry on while an expander INSERT/DELETE commits.
+PROFILES = {
+    "read_write": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -16000,  # negative = KiB, so ~16 MB
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+    },
+    "read_only": {
+        "busy_timeout": 5000,
+        "cache_size": -16000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "query_only": 1,
+    },
+}
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that goes back to its pool when close() is called,
+    so existing code that closes its connection keeps working.
+    """
+
+    pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    def close_handle(self):
+        """Really close the underlying SQLite handle."""
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections for one database file.
+
+    Each thread checks out at most one connection and gets the same one back
+    on every call, so a Streamlit script run can call connect_database() as
+    often as it likes. Connections owned by threads that have finished
+    (Streamlit starts a new script thread per rerun) are reclaimed
+    automatically the next time the pool runs short.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        size=POOL_SIZE,
+        timeout=POOL_TIMEOUT,
+        leak_seconds=LEAK_SECONDS,
+        profile="read_write",
+    ):
+        self.__db_path = db_path
+        self.__profile = profile
+        self.__size = size
+        self.__timeout = timeout
+        self.__leak_seconds = leak_seconds
+        self.__lock = threading.Condition()
+        self.__idle = []
+        # thread ident -> (connection, thread, checked out at)
+        self.__owners = {}
+        self.__opened = 0
+
+    # ---- Connection lifecycle ----
+    def _open(self):
+        if self.__profile == "read_only" and self.__db_path != ":memory:":
+            # as_uri() percent-encodes the path, so '?', '#' or '%' in a
+            # folder name cannot be read as URI syntax
+            target = pathlib.Path(self.__db_path).resolve().as_uri() + "?mode=ro"
+            uri = True
+        else:
+            target = self.__db_path
+            uri = False
+
+        conn = sqlite3.connect(
+            target, check_same_thread=False, factory=PooledConnection, uri=uri
+        )
+        apply_profile(conn, self.__profile)
+        conn.pool = self
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        self.__opened -= 1
+        try:
+            conn.close_handle()
+        except sqlite3.Error:
+            pass
+
+    def _reclaim_dead(self):
+        """Return connections whose owning thread has exited. Lock must be held."""
+        reclaimed = 0
+        for ident, (conn, thread, _) in list(self.__owners.items()):
+            if not thread.is_alive():
+                del self.__owners[ident]
+                if conn.in_transaction:
+                    conn.rollback()
+                self.__idle.append(conn)
+                reclaimed += 1
+        return reclaimed
+
+    def acquire(self):
+        """
+        Return this thread's connection, checking one out if needed.
+        """
+        thread = threading.current_thread()
+        deadline = time.monotonic() + self.__timeout
+
+        with self.__lock:
+            owned = self.__owners.get(thread.ident)
+            if owned is not None:
+                if owned[1] is thread:
+                    return owned[0]
+                # Thread ident was reused after the previous owner exited
+                del self.__owners[thread.ident]
+                self.__idle.append(owned[0])
+
+            while True:
+                if not self.__idle:
+                    self._reclaim_dead()
 
-def connect_database(db_path=DB_PATH):
+                while self.__idle:
+                    conn = self.__idle.pop()
+                    if self._is_healthy(conn):
+                        self.__owners[thread.ident] = (conn, thread, time.monotonic())
+                        return conn
+                    logger.warning("Dropping unhealthy connection to %s", self.__db_path)
+                    self._discard(conn)
+
+                if self.__opened < self.__size:
+                    conn = self._open()
+                    self.__opened += 1
+                    self.__owners[thread.ident] = (conn, thread, time.monotonic())
+                    return conn
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Log every holder, so a leaking caller shows up in the log
+                    self.find_leaks(threshold=0)
+                    raise PoolExhaustedError(
+                        "No free connection to {} after {}s ({} in use)".format(
+                            self.__db_path, self.__timeout, len(self.__owners)
+                        )
+                    )
+                self.__lock.wait(min(remaining, 0.5))
+
+    def release(self, conn):
+        """
+        Hand a connection back to the pool (any open transaction is rolled back).
+        """
+        with self.__lock:
+            for ident, owned in list(self.__owners.items()):
+                if owned[0] is conn:
+                    del self.__owners[ident]
+                    break
+            else:
+                return
+
+            if conn.in_transaction:
+                conn.rollback()
+            self.__idle.append(conn)
+            self.__lock.notify()
+
+    def release_current(self):
+        """Release the connection held by the calling thread, if any."""
+        # The Condition's lock is reentrant, so release() can take it again
+        with self.__lock:
+            owned = self.__owners.get(threading.get_ident())
+            if owned is not None:
+                self.release(owned[0])
+
+    # ---- Monitoring ----
+    def find_leaks(self, threshold=None):
+        """
+        Return (thread name, seconds held, thread alive) for every connection
+        held longer than threshold seconds (default: the leak threshold) or
+        owned by a finished thread.
+        """
+        if threshold is None:
+            threshold = self.__leak_seconds
+        now = time.monotonic()
+        leaks = []
+        with self.__lock:
+            for conn, thread, since in self.__owners.values():
+                held = now - since
+                if held > threshold or not thread.is_alive():
+                    leaks.append((thread.name, round(held, 1), thread.is_alive()))
+        for name, held, alive in leaks:
+            if alive:
+                logger.warning("Connection to %s held by %s for %.1fs", self.__db_path, name, held)
+            else:
+                logger.warning("Connection to %s still owned by finished thread %s", self.__db_path, name)
+        return leaks
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "db_path": self.__db_path,
+                "profile": self.__profile,
+                "size": self.__size,
+                "open": self.__opened,
+                "in_use": len(self.__owners),
+                "idle": len(self.__idle),
+            }
+
+    def close_all(self):
+        """Close every idle and checked-out connection."""
+        with self.__lock:
+            for conn in self.__idle:
+                conn.close_handle()
+            for conn, _, _ in self.__owners.values():
+                conn.close_handle()
+            self.__idle = []
+            self.__owners = {}
+            self.__opened = 0
+
+
+def apply_profile(conn, profile="read_write"):
+    """
+    Run the PRAGMAs of a connection profile on an open connection.
+    """
+    for name, value in PROFILES[profile].items():
+        conn.execute("PRAGMA {} = {}".format(name, value))
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH, read_only=False):
+    """
+    Return the shared pool for a database file (created on first use).
+    Read-only and read-write connections live in separate pools. Pools are
+    keyed on, and open, the absolute path, so a later chdir cannot point
+    one pool at two different files.
+    """
+    profile = "read_only" if read_only else "read_write"
+    path_key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get((path_key, profile))
+        if pool is None:
+            pool = ConnectionPool(path_key, profile=profile)
+            _pools[(path_key, profile)] = pool
+        return pool
+
+
+def close_all_pools():
+    """Close every pooled connection (used on shutdown and in scripts)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+
+def release_thread_connections():
+    """
+    Give back every pooled connection the calling thread holds.
+
+    Worker threads (ThreadPoolExecutor) live as long as the process, so
+    their connections are never reclaimed as dead-thread ones; tasks that
+    may touch the database call this when they finish.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.release_current()
+
+
+def connect_database(db_path=DB_PATH, read_only=False):
     """
     Connect to the SQLite database file.
     Creates the folder/file if they don't exist.
+
+    Connections come from a per-file pool: the same thread always gets the
+    same connection back, and calling close() returns it to the pool.
+    With read_only=True the connection is opened with a mode=ro URI, which
+    dashboard read paths use so they never take write locks.
     """
     # Make sure DATA folder exists
     folder = os.path.dirname(db_path)
     if folder and not os.path.exists(folder):
         os.makedirs(folder)
 
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    return conn
+    if read_only and db_path != ":memory:" and not os.path.exists(db_path):
+        # mode=ro cannot create the file, so let a writer create it first
+        connect_database(db_path)
+
+    return get_pool(db_path, read_only).acquire()
@@ -0,0 +1,84 @@
+# app/data/downsample.py
+import numpy as np
+import pandas as pd
+
+from app.data.query_builder import SelectQuery
+
+# Grid for binned scatter plots: about one cell per few screen pixels
+X_BINS = 200
+Y_BINS = 150
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a series ordered by x.
+
+    Keeps the first and last points and, from each of n_out - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    point kept before it and the mean of the next bucket. Peaks and dips
+    survive, unlike plain every-n-th sampling. Returns (x, y) arrays.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    # Bucket edges over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+        else:
+            next_start, next_end = n - 1, n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        keep[i + 1] = previous
+
+    return x[keep], y[keep]
+
+
+def xy_bins(conn, query: SelectQuery, x, y, x_bins=X_BINS, y_bins=Y_BINS) -> pd.DataFrame:
+    """
+    Bin the rows of a query on an x_bins * y_bins grid in SQL.
+
+    x and y are column names (or SQL expressions). Returns one row per
+    non-empty cell with the mean x and y of its rows and their count, so
+    the result is bounded by the grid size, not the number of rows.
+    Rows where x or y is NULL are skipped (the query gets that filter).
+    """
+    query.where(f"{x} IS NOT NULL AND {y} IS NOT NULL")
+    sql, params = query.build(
+        select=f"MIN({x}), MAX({x}), MIN({y}), MAX({y})", order_by=None
+    )
+    x_min, x_max, y_min, y_max = conn.execute(sql, params).fetchone()
+    if x_min is None:
+        return pd.DataFrame(columns=["x", "y", "count"])
+
+    # A zero-width range puts everything in cell 0
+    x_width = (x_max - x_min) / x_bins or 1
+    y_width = (y_max - y_min) / y_bins or 1
+    cell_x = f"MIN(CAST(({x} - ?) / ? AS INTEGER), {x_bins - 1})"
+    cell_y = f"MIN(CAST(({y} - ?) / ? AS INTEGER), {y_bins - 1})"
+
+    sql, params = query.build(
+        select=f"{cell_x} AS cell_x, {cell_y} AS cell_y, AVG({x}), AVG({y}), COUNT(*)",
+        order_by=None,
+    )
+    rows = conn.execute(
+        sql + " GROUP BY cell_x, cell_y", [x_min, x_width, y_min, y_width] + params
+    ).fetchall()
+    return pd.DataFrame([row[2:] for row in rows], columns=["x", "y", "count"])
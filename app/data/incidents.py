@@ -1,7 +1,26 @@
 # app/data/incidents.py
 import pandas as pd
 
+from app.data.cache import cached_read
+from app.data.query_builder import SelectQuery
+from app.data.rollups import (
+    INCIDENT_ROLLUP,
+    has_rollup,
+    key_expression,
+    query_counts,
+    rollup_counts,
+    rollup_totals,
+)
+from app.data.schema import get_table_columns
+from app.data.search_index import where_search
 
+INCIDENTS_TABLE = "cyber_incidents"
+
+# Columns the dashboard text search looks in
+INCIDENT_SEARCH_COLUMNS = ["title", "description", "reported_by"]
+
+
+@cached_read(INCIDENTS_TABLE)
 def get_all_incidents(conn):
     """
     Get all cyber incidents (newest first).
@@ -11,6 +30,7 @@ def get_all_incidents(conn):
     return df
 
 
+@cached_read(INCIDENTS_TABLE)
 def get_incidents_by_severity(conn, severity):
     """
     Get incidents with a given severity.
@@ -25,6 +45,7 @@ def get_incidents_by_severity(conn, severity):
     return df
 
 
+@cached_read(INCIDENTS_TABLE)
 def get_incidents_by_status(conn, status):
     """
     Get incidents with a given status.
@@ -51,3 +72,73 @@ def insert_incident(conn, title, severity, status="open", date=None, reported_by
         (title, severity, status, date, reported_by),
     )
     conn.commit()
+
+
+def incident_query(
+    conn,
+    severity=None,
+    status=None,
+    date_from=None,
+    date_to=None,
+    text=None,
+):
+    """
+    Build a SelectQuery over cyber_incidents for the dashboard filters.
+
+    severity/status are lists of allowed values, date_from/date_to are
+    inclusive dates and text is looked up in title, description and
+    reported_by through the full-text index (see where_search).
+    """
+    query = SelectQuery(INCIDENTS_TABLE, get_table_columns(conn, INCIDENTS_TABLE))
+    query.where_in("severity", severity)
+    query.where_in("status", status)
+    query.where_date_range("date", date_from, date_to)
+    where_search(conn, query, INCIDENTS_TABLE, text, INCIDENT_SEARCH_COLUMNS)
+    return query
+
+
+@cached_read(INCIDENTS_TABLE)
+def incident_counts(
+    conn,
+    group_by,
+    severity=None,
+    status=None,
+    date_from=None,
+    date_to=None,
+    text=None,
+):
+    """
+    Count the filtered incidents per severity, status or day.
+
+    Read from the incident rollup table; a text search (which the rollup
+    can't filter on) falls back to GROUP BY over the matching rows.
+    """
+    if text or not has_rollup(conn, INCIDENT_ROLLUP):
+        query = incident_query(conn, severity, status, date_from, date_to, text)
+        return query_counts(conn, query, key_expression(conn, INCIDENT_ROLLUP, group_by), group_by)
+    return rollup_counts(
+        conn,
+        INCIDENT_ROLLUP,
+        group_by,
+        where={"severity": severity, "status": status},
+        day_from=date_from,
+        day_to=date_to,
+    )
+
+
+@cached_read(INCIDENTS_TABLE)
+def count_incidents(conn, severity=None, status=None, date_from=None, date_to=None, text=None):
+    """
+    Number of incidents matching the filters (rollup first, like incident_counts).
+    """
+    if text or not has_rollup(conn, INCIDENT_ROLLUP):
+        return incident_query(conn, severity, status, date_from, date_to, text).count(conn)
+    totals = rollup_totals(
+        conn,
+        INCIDENT_ROLLUP,
+        ["n"],
+        where={"severity": severity, "status": status},
+        day_from=date_from,
+        day_to=date_to,
+    )
+    return int(totals["n"])
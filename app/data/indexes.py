@@ -0,0 +1,150 @@
+# app/data/indexes.py
+import logging
+import re
+import sqlite3
+
+from app.data.schema import get_table_columns
+
+# Secondary indexes for the dashboard filters: (index name, table, columns).
+# Composite indexes put equality filters first and the range column last;
+# (column, id) indexes also return a single-column filter in id order, so
+# "WHERE x = ? ORDER BY id DESC" needs neither a scan nor a sort.
+INDEXES = [
+    ("idx_incidents_severity_id", "cyber_incidents", ("severity", "id")),
+    ("idx_incidents_status_id", "cyber_incidents", ("status", "id")),
+    ("idx_incidents_severity_status_date", "cyber_incidents", ("severity", "status", "date")),
+    ("idx_incidents_status_date", "cyber_incidents", ("status", "date")),
+    ("idx_incidents_date", "cyber_incidents", ("date",)),
+    ("idx_tickets_priority_status_created", "it_tickets", ("priority", "status", "created_date")),
+    ("idx_tickets_status_created", "it_tickets", ("status", "created_date")),
+    ("idx_datasets_category_source", "datasets_metadata", ("category", "source")),
+    ("idx_datasets_source", "datasets_metadata", ("source",)),
+]
+
+# Representative dashboard queries used by report_indexes().
+WORKLOAD = [
+    ("incidents by severity", "SELECT * FROM cyber_incidents WHERE severity = ? ORDER BY id DESC", ("High",)),
+    ("incidents by status", "SELECT * FROM cyber_incidents WHERE status = ? ORDER BY id DESC", ("open",)),
+    (
+        "incidents by severity/status/date",
+        "SELECT * FROM cyber_incidents WHERE severity IN (?, ?) AND status = ? AND date >= ? AND date < ?",
+        ("High", "Critical", "open", "2024-01-01", "2024-02-01"),
+    ),
+    (
+        "incidents by status/date",
+        "SELECT * FROM cyber_incidents WHERE status = ? AND date >= ? AND date < ?",
+        ("open", "2024-01-01", "2024-02-01"),
+    ),
+    (
+        "incidents by date range",
+        "SELECT * FROM cyber_incidents WHERE date >= ? AND date < ?",
+        ("2024-01-01", "2024-02-01"),
+    ),
+    (
+        "tickets by priority/status/date",
+        "SELECT * FROM it_tickets WHERE priority = ? AND status = ? AND created_date >= ?",
+        ("High", "open", "2024-01-01"),
+    ),
+    ("tickets by status", "SELECT * FROM it_tickets WHERE status = ?", ("open",)),
+    (
+        "datasets by category/source",
+        "SELECT * FROM datasets_metadata WHERE category = ? AND source = ?",
+        ("Security", "Internal System"),
+    ),
+    ("datasets by source", "SELECT * FROM datasets_metadata WHERE source = ?", ("Kaggle",)),
+]
+
+logger = logging.getLogger(__name__)
+
+_INDEX_IN_PLAN = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def create_indexes(conn, analyze=True):
+    """
+    Create the declared indexes (safe to run repeatedly).
+
+    Indexes whose columns are missing from the table are skipped (and
+    logged), because older copies of the database use slightly different
+    column names.
+    Returns the names of the indexes that exist afterwards.
+    """
+    cursor = conn.cursor()
+    created = []
+
+    for name, table, columns in INDEXES:
+        table_cols = get_table_columns(conn, table)
+        missing = [c for c in columns if c not in table_cols]
+        if missing:
+            logger.warning("Skipping index %s: %s has no column %s", name, table, ", ".join(missing))
+            continue
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        )
+        created.append(name)
+
+    if analyze:
+        # Give the query planner row statistics for the new indexes
+        cursor.execute("ANALYZE")
+
+    conn.commit()
+    return created
+
+
+def get_existing_indexes(conn):
+    """
+    Return {index name: table} for all named (non-automatic) indexes.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT name, tbl_name
+        FROM sqlite_master
+        WHERE type = 'index' AND name NOT LIKE 'sqlite_autoindex_%'
+        """
+    )
+    return dict(cursor.fetchall())
+
+
+def explain_query_plan(conn, sql, params=()):
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for a query.
+    """
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, tuple(params))
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def report_indexes(conn, workload=None):
+    """
+    Check a workload of (label, sql, params) queries against the indexes.
+
+    Returns a dict with:
+    - "plans":   {label: [plan lines]}
+    - "missing": labels of queries that still do a full table scan
+    - "unused":  existing indexes that no workload query uses
+    """
+    if workload is None:
+        workload = WORKLOAD
+
+    plans = {}
+    missing = []
+    used = set()
+
+    for label, sql, params in workload:
+        try:
+            plan = explain_query_plan(conn, sql, params)
+        except sqlite3.OperationalError:
+            # Query refers to a column this copy of the database does not have
+            continue
+
+        plans[label] = plan
+        for line in plan:
+            match = _INDEX_IN_PLAN.search(line)
+            if match:
+                used.add(match.group(1))
+            elif line.startswith("SCAN ") and "USING" not in line:
+                missing.append(label)
+
+    unused = sorted(name for name in get_existing_indexes(conn) if name not in used)
+
+    return {"plans": plans, "missing": sorted(set(missing)), "unused": unused}
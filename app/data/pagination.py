@@ -0,0 +1,133 @@
+# app/data/pagination.py
+import re
+import sqlite3
+
+import pandas as pd
+
+from app.data.query_builder import SelectQuery
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+
+# Counts above this are estimated instead of counted row by row.
+EXACT_COUNT_LIMIT = 10000
+
+# Number of recent rows sampled when estimating a filtered count.
+ESTIMATE_SAMPLE = 2000
+
+
+class Page:
+    """One page of rows plus the cursors needed to move to the next page."""
+
+    def __init__(self, rows: pd.DataFrame, page_size: int, has_next: bool):
+        self.__rows = rows
+        self.__page_size = page_size
+        self.__has_next = has_next
+
+    def get_rows(self) -> pd.DataFrame:
+        return self.__rows
+
+    def get_page_size(self) -> int:
+        return self.__page_size
+
+    def has_next(self) -> bool:
+        return self.__has_next
+
+    def first_id(self) -> int | None:
+        return None if self.__rows.empty else int(self.__rows["id"].iloc[0])
+
+    def last_id(self) -> int | None:
+        """Cursor for the next page (pass as after_id)."""
+        return None if self.__rows.empty else int(self.__rows["id"].iloc[-1])
+
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+
+def fetch_page(
+    conn,
+    query: SelectQuery,
+    after_id=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    descending=True,
+) -> Page:
+    """
+    Fetch one page using a keyset (id) cursor.
+
+    Rows come back ordered by id (DESC by default); after_id is the last id
+    of the previous page. Unlike OFFSET, the cost stays the same however deep
+    the page is, because SQLite seeks straight to the cursor in the rowid
+    b-tree. One extra row is read to know whether a next page exists.
+    """
+    page_query = query.copy()
+    if after_id is not None:
+        page_query.where("id < ?" if descending else "id > ?", int(after_id))
+
+    order_by = "id DESC" if descending else "id ASC"
+    rows = page_query.fetch_df(conn, order_by=order_by, limit=page_size + 1)
+
+    has_next = len(rows) > page_size
+    return Page(rows.iloc[:page_size].reset_index(drop=True), page_size, has_next)
+
+
+def estimate_table_rows(conn, table: str) -> int:
+    """
+    Cheap row-count estimate for a whole table.
+
+    Uses the ANALYZE statistics if present, otherwise MAX(id), which is exact
+    for AUTOINCREMENT tables without deletes.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,))
+        row = cur.fetchone()
+        if row is None:
+            cur.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,))
+            row = cur.fetchone()
+        if row is not None:
+            match = re.match(r"\d+", row[0])
+            if match:
+                return int(match.group())
+    except sqlite3.OperationalError:
+        # sqlite_stat1 only exists after ANALYZE
+        pass
+
+    cur.execute(f"SELECT MAX(id) FROM {table}")
+    return cur.fetchone()[0] or 0
+
+
+def count_rows(conn, query: SelectQuery, exact_limit=EXACT_COUNT_LIMIT) -> tuple[int, bool]:
+    """
+    Return (count, is_estimate) for the rows matching a query.
+
+    Up to exact_limit rows are counted exactly. Beyond that the count is
+    estimated from the match rate in the most recent rows, so the cost does
+    not grow with the table.
+    """
+    table = query.get_table()
+    where, params = query.where_sql()
+
+    cur = conn.cursor()
+    cur.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM {table}{where} LIMIT ?)",
+        params + [exact_limit + 1],
+    )
+    counted = cur.fetchone()[0]
+    if counted <= exact_limit:
+        return counted, False
+
+    total = estimate_table_rows(conn, table)
+    if not query.has_filters():
+        return max(total, counted), True
+
+    condition = where[len(" WHERE "):]
+    cur.execute(
+        f"""
+        SELECT COUNT(*), SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)
+        FROM (SELECT * FROM {table} ORDER BY id DESC LIMIT ?)
+        """,
+        params + [ESTIMATE_SAMPLE],
+    )
+    sampled, hits = cur.fetchone()
+    estimate = int(total * (hits or 0) / sampled) if sampled else 0
+    return max(estimate, counted), True
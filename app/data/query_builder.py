@@ -0,0 +1,171 @@
+# app/data/query_builder.py
+import datetime
+
+import pandas as pd
+
+from app.data.cache import cached_read
+
+
+class SelectQuery:
+    """
+    Builds a parameterized SELECT for one table.
+
+    Filters are AND-ed together and always use ? placeholders. If the table's
+    column list is given, filters on columns the table does not have are
+    ignored (older copies of the database use different column names).
+    A filter value of None means "no filter"; an empty list matches nothing,
+    the same as DataFrame.isin([]).
+    """
+
+    def __init__(self, table: str, columns: list[str] | None = None):
+        self.__table = table
+        self.__columns = columns
+        self.__clauses = []
+        self.__params = []
+
+    def _has(self, column) -> bool:
+        return column is not None and (self.__columns is None or column in self.__columns)
+
+    def get_table(self) -> str:
+        return self.__table
+
+    def has_filters(self) -> bool:
+        return bool(self.__clauses)
+
+    def copy(self) -> "SelectQuery":
+        """Independent copy, so callers can add clauses (e.g. a cursor) safely."""
+        clone = SelectQuery(self.__table, self.__columns)
+        clone.__clauses = list(self.__clauses)
+        clone.__params = list(self.__params)
+        return clone
+
+    # ---- Filters ----
+    def where(self, clause: str, *params) -> "SelectQuery":
+        """Add a raw clause with its own ? placeholders."""
+        self.__clauses.append(clause)
+        self.__params.extend(params)
+        return self
+
+    def where_in(self, column: str, values) -> "SelectQuery":
+        if values is None or not self._has(column):
+            return self
+        values = list(values)
+        if not values:
+            return self.where("0")
+        placeholders = ", ".join(["?"] * len(values))
+        return self.where(f"{column} IN ({placeholders})", *values)
+
+    def where_between(self, column: str, low=None, high=None) -> "SelectQuery":
+        """Inclusive range filter; either end may be None."""
+        if not self._has(column):
+            return self
+        if low is not None:
+            self.where(f"{column} >= ?", low)
+        if high is not None:
+            self.where(f"{column} <= ?", high)
+        return self
+
+    def where_date_range(self, column: str, date_from=None, date_to=None) -> "SelectQuery":
+        """
+        Filter an ISO date/time text column to [date_from, date_to] (whole days).
+
+        The upper bound is written as "< next day" so that timestamps on the
+        last day still match and the comparison can use an index.
+        """
+        if not self._has(column):
+            return self
+        if date_from is not None:
+            self.where(f"{column} >= ?", _to_date(date_from).isoformat())
+        if date_to is not None:
+            next_day = _to_date(date_to) + datetime.timedelta(days=1)
+            self.where(f"{column} < ?", next_day.isoformat())
+        return self
+
+    def where_text(self, columns: list[str], text: str | None) -> "SelectQuery":
+        """Case-insensitive substring search across several columns (OR-ed)."""
+        if not text:
+            return self
+        columns = [c for c in columns if self._has(c)]
+        if not columns:
+            return self
+        pattern = "%" + _escape_like(text) + "%"
+        clause = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in columns)
+        return self.where(f"({clause})", *([pattern] * len(columns)))
+
+    # ---- SQL ----
+    def where_sql(self) -> tuple[str, list]:
+        """Return (" WHERE ...", params), or ("", []) with no filters."""
+        if not self.__clauses:
+            return "", []
+        return " WHERE " + " AND ".join(self.__clauses), list(self.__params)
+
+    def build(self, select="*", order_by="id DESC", limit=None, offset=None) -> tuple[str, list]:
+        where, params = self.where_sql()
+        sql = f"SELECT {select} FROM {self.__table}{where}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+            if offset:
+                sql += " OFFSET ?"
+                params.append(int(offset))
+        return sql, params
+
+    def fetch_df(self, conn, order_by="id DESC", limit=None, offset=None) -> pd.DataFrame:
+        sql, params = self.build(order_by=order_by, limit=limit, offset=offset)
+        return pd.read_sql_query(sql, conn, params=params)
+
+    def fetch_row(self, conn, row_id) -> dict | None:
+        """The row with this id if it matches the filters, as a dict (else None)."""
+        where, params = self.where_sql()
+        where = (where + " AND" if where else " WHERE") + " id = ?"
+        cur = conn.execute(f"SELECT * FROM {self.__table}{where}", params + [int(row_id)])
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return dict(zip([d[0] for d in cur.description], row))
+
+    def count(self, conn) -> int:
+        sql, params = self.build(select="COUNT(*)", order_by=None)
+        return conn.execute(sql, params).fetchone()[0]
+
+
+def _to_date(value) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return pd.to_datetime(value).date()
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def first_column(columns: list[str], *candidates: str) -> str | None:
+    """Return the first candidate column name the table actually has."""
+    for c in candidates:
+        if c in columns:
+            return c
+    return None
+
+
+@cached_read()
+def get_distinct_values(conn, table: str, column: str) -> list:
+    """
+    Sorted distinct non-null values of a column (for filter dropdowns).
+    """
+    cur = conn.cursor()
+    cur.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column}")
+    return [row[0] for row in cur.fetchall()]
+
+
+@cached_read()
+def get_column_range(conn, table: str, column: str) -> tuple:
+    """
+    (min, max) of a column, ignoring NULLs. Both are None for an empty table.
+    """
+    cur = conn.cursor()
+    cur.execute(f"SELECT MIN({column}), MAX({column}) FROM {table}")
+    return cur.fetchone()
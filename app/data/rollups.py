@@ -0,0 +1,279 @@
+# app/data/rollups.py
+import threading
+
+import pandas as pd
+
+from app.data.query_builder import SelectQuery, first_column
+from app.data.schema import get_table_columns
+
+INCIDENT_ROLLUP = "incident_rollup"
+TICKET_ROLLUP = "ticket_rollup"
+DATASET_ROLLUP = "dataset_rollup"
+
+# Time buckets as SQL over a date/time column; every bucket is stored as
+# the ISO text of its start, so buckets sort and range-filter as text
+BUCKET_FORMATS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', {column})",
+    "day": "substr({column}, 1, 10)",
+    # Weeks start on Monday ('weekday 0' is the next Sunday)
+    "week": "date({column}, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {column})",
+}
+
+# Per resolution: the incident time-series rollup (see app/data/timeseries.py)
+INCIDENT_TIMESERIES = {resolution: f"incident_ts_{resolution}" for resolution in BUCKET_FORMATS}
+
+# Each rollup table holds pre-aggregated measures per combination of keys.
+# Keys name the source column(s) they come from (the first one the table
+# has is used); "formats" turns a key's column into a time bucket. Measures
+# are SQL expressions over one row, written with {row} in front of column
+# names so the same text works for NEW./OLD. in triggers and plain columns
+# in rebuilds.
+ROLLUPS = {
+    INCIDENT_ROLLUP: {
+        "source": "cyber_incidents",
+        "keys": {"severity": ["severity"], "status": ["status"], "day": ["date"]},
+        "formats": {"day": BUCKET_FORMATS["day"]},
+        "measures": {"n": "1"},
+    },
+    TICKET_ROLLUP: {
+        "source": "it_tickets",
+        "keys": {"priority": ["priority"], "status": ["status"], "day": ["created_date", "date"]},
+        "formats": {"day": BUCKET_FORMATS["day"]},
+        "measures": {"n": "1"},
+    },
+    DATASET_ROLLUP: {
+        "source": "datasets_metadata",
+        "keys": {"category": ["category"], "source": ["source"]},
+        "measures": {
+            "n": "1",
+            # Same rules as the Dataset Overview metrics (size in bytes)
+            "size_n": "CASE WHEN {row}size IS NOT NULL THEN 1 ELSE 0 END",
+            "size_sum": "COALESCE({row}size, 0)",
+            "big_n": "CASE WHEN ROUND(COALESCE({row}size, 0) / 1048576.0, 2) > 1 THEN 1 ELSE 0 END",
+        },
+        "needs": {"size_n": "size", "size_sum": "size", "big_n": "size"},
+    },
+}
+for _resolution, _name in INCIDENT_TIMESERIES.items():
+    ROLLUPS[_name] = {
+        "source": "cyber_incidents",
+        "keys": {
+            "bucket": ["date"],
+            "severity": ["severity"],
+            "status": ["status"],
+            "incident_type": ["incident_type"],
+        },
+        "formats": {"bucket": BUCKET_FORMATS[_resolution]},
+        "measures": {"n": "1"},
+    }
+
+_rollups_ready = set()
+_rollups_lock = threading.Lock()
+
+
+def _key_exprs(conn, spec, row=""):
+    """SQL expression per key for one row ('' when the column is missing)."""
+    columns = get_table_columns(conn, spec["source"])
+    formats = spec.get("formats", {})
+    exprs = {}
+    for key, candidates in spec["keys"].items():
+        column = first_column(columns, *candidates)
+        if column is None:
+            exprs[key] = "''"
+        elif key in formats:
+            bucket = formats[key].format(column=f"{row}{column}")
+            exprs[key] = f"COALESCE({bucket}, '')"
+        else:
+            exprs[key] = f"COALESCE({row}{column}, '')"
+    return exprs
+
+
+def _measure_exprs(conn, spec, row=""):
+    """SQL expression per measure for one row ('0' when its column is missing)."""
+    columns = get_table_columns(conn, spec["source"])
+    needs = spec.get("needs", {})
+    return {
+        name: (expr.format(row=row) if needs.get(name, None) in (None, *columns) else "0")
+        for name, expr in spec["measures"].items()
+    }
+
+
+def create_rollup(conn, name):
+    """
+    Create a rollup table and the triggers that keep it current.
+
+    INSERT adds the new row's measures to its key, DELETE subtracts the old
+    row's (dropping keys that reach zero rows), and UPDATE does both, so the
+    rollup never needs a full recount. A newly created rollup is filled
+    from the source table once. Returns False if the source table is missing.
+    """
+    spec = ROLLUPS[name]
+    source = spec["source"]
+    if not get_table_columns(conn, source):
+        return False
+
+    keys = list(spec["keys"])
+    measures = list(spec["measures"])
+    cur = conn.cursor()
+
+    created = not get_table_columns(conn, name)
+    key_defs = ", ".join(f"{k} TEXT NOT NULL" for k in keys)
+    measure_defs = ", ".join(f"{m} REAL NOT NULL DEFAULT 0" for m in measures)
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} ({key_defs}, {measure_defs}, PRIMARY KEY ({', '.join(keys)}))"
+    )
+
+    new_keys = _key_exprs(conn, spec, "new.")
+    old_keys = _key_exprs(conn, spec, "old.")
+    new_measures = _measure_exprs(conn, spec, "new.")
+    old_measures = _measure_exprs(conn, spec, "old.")
+
+    add_new = (
+        f"INSERT INTO {name} ({', '.join(keys + measures)}) "
+        f"VALUES ({', '.join([new_keys[k] for k in keys] + [new_measures[m] for m in measures])}) "
+        f"ON CONFLICT({', '.join(keys)}) DO UPDATE SET "
+        + ", ".join(f"{m} = {m} + excluded.{m}" for m in measures)
+        + ";"
+    )
+    old_match = " AND ".join(f"{k} = {old_keys[k]}" for k in keys)
+    remove_old = (
+        f"UPDATE {name} SET "
+        + ", ".join(f"{m} = {m} - ({old_measures[m]})" for m in measures)
+        + f" WHERE {old_match};"
+        + f" DELETE FROM {name} WHERE {old_match} AND n <= 0;"
+    )
+
+    for event, body in (
+        ("insert", add_new),
+        ("delete", remove_old),
+        ("update", remove_old + " " + add_new),
+    ):
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{name}_{event}
+            AFTER {event.upper()} ON {source}
+            BEGIN
+                {body}
+            END
+            """
+        )
+    conn.commit()
+
+    if created:
+        rebuild_rollup(conn, name)
+    return True
+
+
+def rebuild_rollup(conn, name):
+    """Recount a rollup from its source table (e.g. after a bulk load with triggers off)."""
+    spec = ROLLUPS[name]
+    keys = list(spec["keys"])
+    measures = list(spec["measures"])
+    key_exprs = _key_exprs(conn, spec)
+    measure_exprs = _measure_exprs(conn, spec)
+
+    with conn:
+        conn.execute(f"DELETE FROM {name}")
+        conn.execute(
+            f"INSERT INTO {name} ({', '.join(keys + measures)}) "
+            f"SELECT {', '.join([key_exprs[k] for k in keys] + [f'SUM({measure_exprs[m]})' for m in measures])} "
+            f"FROM {spec['source']} GROUP BY {', '.join(key_exprs[k] for k in keys)}"
+        )
+
+
+def create_rollups(conn):
+    """create_rollup() for every rollup in ROLLUPS."""
+    return {name: create_rollup(conn, name) for name in ROLLUPS}
+
+
+def ensure_rollups(conn):
+    """
+    create_rollups() once per database file and process.
+    Needs a read-write connection.
+    """
+    # The main database file of the connection
+    key = conn.execute("PRAGMA database_list").fetchone()[2]
+    if key in _rollups_ready:
+        return
+    with _rollups_lock:
+        if key not in _rollups_ready:
+            create_rollups(conn)
+            _rollups_ready.add(key)
+
+
+def has_rollup(conn, name):
+    return bool(get_table_columns(conn, name))
+
+
+# --------------------------
+# Reads
+# --------------------------
+def _rollup_query(conn, name, where=None, day_from=None, day_to=None):
+    query = SelectQuery(name, get_table_columns(conn, name))
+    for key, values in (where or {}).items():
+        query.where_in(key, values)
+    query.where_date_range("day", day_from, day_to)
+    return query
+
+
+def rollup_counts(conn, name, group_by, where=None, day_from=None, day_to=None, measure="n"):
+    """
+    SUM(measure) per value of group_by, read from a rollup table.
+
+    where maps key columns to allowed values (None = no filter) and the day
+    range is inclusive. Returns a Series sorted largest first, like
+    value_counts(); empty keys (NULL in the source) are left out.
+    """
+    sql, params = _rollup_query(conn, name, where, day_from, day_to).build(
+        select=f"{group_by}, SUM({measure})", order_by=None
+    )
+    cur = conn.execute(sql + f" GROUP BY {group_by}", params)
+    return _to_series(cur.fetchall(), group_by)
+
+
+def rollup_totals(conn, name, measures, where=None, day_from=None, day_to=None) -> dict:
+    """SUM() of several measures over the filtered rollup rows."""
+    sql, params = _rollup_query(conn, name, where, day_from, day_to).build(
+        select=", ".join(f"COALESCE(SUM({m}), 0)" for m in measures), order_by=None
+    )
+    row = conn.execute(sql, params).fetchone()
+    return dict(zip(measures, row))
+
+
+def key_expression(conn, name, key):
+    """The SQL expression a rollup key is computed with, over the source table."""
+    return _key_exprs(conn, ROLLUPS[name])[key]
+
+
+def query_totals(conn, query: SelectQuery, name, measures) -> dict:
+    """
+    rollup_totals() computed directly over a filtered source query (the
+    fallback when a filter, such as text search, has no rollup key).
+    """
+    exprs = _measure_exprs(conn, ROLLUPS[name])
+    sql, params = query.build(
+        select=", ".join(f"COALESCE(SUM({exprs[m]}), 0)" for m in measures), order_by=None
+    )
+    row = conn.execute(sql, params).fetchone()
+    return dict(zip(measures, row))
+
+
+def query_counts(conn, query: SelectQuery, expression, name):
+    """
+    COUNT(*) per value of expression over a filtered source query (the
+    fallback when a filter, such as text search, has no rollup key).
+    """
+    sql, params = query.build(select=f"{expression} AS {name}, COUNT(*)", order_by=None)
+    cur = conn.execute(sql + f" GROUP BY {name}", params)
+    return _to_series(cur.fetchall(), name)
+
+
+def _to_series(rows, name):
+    series = pd.Series(
+        {value: int(count) for value, count in rows if value not in (None, "")},
+        dtype="int64",
+        name="count",
+    )
+    series.index.name = name
+    return series.sort_values(ascending=False, kind="stable")
@@ -1,6 +1,6 @@
 import sqlite3
 
-import sqlite3
+from app.data.settings import create_settings_table
 
 
 def create_users_table(conn):
@@ -75,11 +75,19 @@ def create_it_tickets_table(conn):
     conn.commit()
 
 
+def get_table_columns(conn, table_name):
+    """Return the column names of a table ([] if it does not exist)."""
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    return [row[1] for row in cursor.fetchall()]
+
+
 def create_all_tables(conn):
     """Create all tables needed for the platform."""
     create_users_table(conn)
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
     create_it_tickets_table(conn)
+    create_settings_table(conn)
 
 
@@ -0,0 +1,246 @@
+# app/data/search_index.py
+import re
+import threading
+
+import pandas as pd
+
+from app.data.query_builder import SelectQuery
+from app.data.schema import get_table_columns
+
+# Text columns indexed per table; only those that exist in the table are used
+SEARCH_SOURCES = {
+    "cyber_incidents": ["title", "incident_type", "description", "reported_by"],
+    "it_tickets": ["title", "subject", "description"],
+    "datasets_metadata": ["name", "dataset_name", "category", "source"],
+}
+
+# Markers put around matched words in snippets (markdown bold)
+HIGHLIGHT = ("**", "**")
+SNIPPET_TOKENS = 12
+
+_index_ready = set()
+_index_lock = threading.Lock()
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_PHRASE_OR_WORD = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_table(table):
+    return f"{table}_fts"
+
+
+def _indexed_columns(conn, table):
+    existing = get_table_columns(conn, table)
+    return [c for c in SEARCH_SOURCES[table] if c in existing]
+
+
+def create_search_index(conn, table):
+    """
+    Create (or re-create, if its columns changed) the FTS5 index of a table.
+
+    The index is an external-content FTS5 table over the table's text
+    columns, kept current by insert/update/delete triggers, so rows are
+    indexed once and searched without scanning the table.
+    Returns the indexed columns ([] if the table has none of them).
+    """
+    columns = _indexed_columns(conn, table)
+    if not columns:
+        return []
+
+    fts = fts_table(table)
+    cur = conn.cursor()
+    if get_table_columns(conn, fts) == columns:
+        return columns
+
+    cur.execute(f"DROP TABLE IF EXISTS {fts}")
+    for event in ("insert", "update", "delete"):
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_{fts}_{event}")
+
+    col_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    cur.execute(
+        f"""
+        CREATE VIRTUAL TABLE {fts} USING fts5(
+            {col_list},
+            content='{table}',
+            content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_{fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {col_list}) VALUES (new.id, {new_values});
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_{fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values});
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_{fts}_update AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {col_list}) VALUES (new.id, {new_values});
+        END
+        """
+    )
+    # Index the rows that are already there
+    cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    conn.commit()
+    return columns
+
+
+def create_search_indexes(conn):
+    """create_search_index() for every table in SEARCH_SOURCES."""
+    return {table: create_search_index(conn, table) for table in SEARCH_SOURCES}
+
+
+def ensure_search_indexes(conn):
+    """
+    create_search_indexes() once per database file and process.
+    Needs a read-write connection.
+    """
+    # The main database file of the connection
+    key = conn.execute("PRAGMA database_list").fetchone()[2]
+    if key in _index_ready:
+        return
+    with _index_lock:
+        if key not in _index_ready:
+            create_search_indexes(conn)
+            _index_ready.add(key)
+
+
+def has_search_index(conn, table):
+    return bool(get_table_columns(conn, fts_table(table)))
+
+
+def match_query(text):
+    """
+    Turn free text into an FTS5 MATCH expression: every word (3+ letters)
+    quoted and OR-ed, so punctuation in a question can't break the syntax
+    and bm25 ranks rows matching more (and rarer) words first.
+    """
+    words = [w for w in _WORD.findall((text or "").lower()) if len(w) >= 3]
+    return " OR ".join(f'"{w}"' for w in dict.fromkeys(words))
+
+
+def search(conn, table, text, limit=5):
+    """
+    Best-matching rows of a table for free text, as dicts with a 'score'
+    (bm25; lower is better). [] if there is no index or nothing matches.
+    """
+    expression = match_query(text)
+    if not expression or not has_search_index(conn, table):
+        return []
+
+    fts = fts_table(table)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT t.*, bm25({fts}) AS score
+        FROM {fts}
+        JOIN {table} AS t ON t.id = {fts}.rowid
+        WHERE {fts} MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """,
+        (expression, limit),
+    )
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+# --------------------------
+# Dashboard search boxes
+# --------------------------
+def search_expression(text, columns=None, prefix=True):
+    """
+    Turn a search box entry into an FTS5 MATCH expression.
+
+    "Quoted text" is a phrase, other words are terms; every term and
+    phrase must match (AND). With prefix=True the last term also matches
+    longer words, so results show up while the user is still typing.
+    columns limits the match to those index columns. Returns "" if the
+    text has no words.
+    """
+    parts = []
+    for phrase, word in _PHRASE_OR_WORD.findall(text or ""):
+        words = _WORD.findall((phrase or word).lower())
+        if words:
+            parts.append((" ".join(words), bool(word)))
+    if not parts:
+        return ""
+
+    terms = [f'"{words}"' for words, _ in parts]
+    if prefix and parts[-1][1]:
+        terms[-1] += "*"
+    expression = " AND ".join(terms)
+    if columns:
+        expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+    return expression
+
+
+def _searchable(conn, table, columns):
+    """Index columns to search in (None = all), or [] if there is no index."""
+    indexed = get_table_columns(conn, fts_table(table)) if table in SEARCH_SOURCES else []
+    if not indexed or columns is None:
+        return indexed
+    return [c for c in columns if c in indexed]
+
+
+def where_search(conn, query: SelectQuery, table, text, columns=None) -> SelectQuery:
+    """
+    Add a text search to a SelectQuery over table.
+
+    Uses the FTS5 index (an id IN (...rowids of matches) filter), so it is
+    an index lookup instead of a LIKE scan. Falls back to a substring
+    search in columns when the table has no index or the text has no
+    words to look up.
+    """
+    if not text:
+        return query
+    searchable = _searchable(conn, table, columns)
+    expression = search_expression(text, searchable) if searchable else ""
+    if not expression:
+        return query.where_text(columns or SEARCH_SOURCES.get(table, []), text)
+    fts = fts_table(table)
+    return query.where(f"id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)", expression)
+
+
+def search_matches(conn, table, text, columns=None, limit=10) -> pd.DataFrame:
+    """
+    Best matches for a search box entry, ranked by bm25 (best first).
+
+    Returns the matching rows' id, score and a snippet of the best
+    matching column with the matched words between HIGHLIGHT markers.
+    Empty if there is no index or nothing matches.
+    """
+    empty = pd.DataFrame(columns=["id", "score", "snippet"])
+    searchable = _searchable(conn, table, columns)
+    expression = search_expression(text, searchable) if searchable else ""
+    if not expression:
+        return empty
+
+    fts = fts_table(table)
+    start, end = HIGHLIGHT
+    return pd.read_sql_query(
+        f"""
+        SELECT rowid AS id,
+               bm25({fts}) AS score,
+               snippet({fts}, -1, ?, ?, '…', ?) AS snippet
+        FROM {fts}
+        WHERE {fts} MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """,
+        conn,
+        params=(start, end, SNIPPET_TOKENS, expression, limit),
+    )
@@ -0,0 +1,47 @@
+# app/data/settings.py
+
+
+def create_settings_table(conn):
+    """Create the key/value settings table."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.commit()
+
+
+def get_setting(conn, key, default=None):
+    """
+    Return a setting's value, or default if it (or the table) does not exist.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'settings'"
+    )
+    if cur.fetchone() is None:
+        return default
+    cur.execute("SELECT value FROM settings WHERE key = ?", (key,))
+    row = cur.fetchone()
+    return default if row is None else row[0]
+
+
+def set_setting(conn, key, value):
+    """Insert or update a setting (stored as text)."""
+    create_settings_table(conn)
+    conn.execute(
+        """
+        INSERT INTO settings (key, value, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET
+            value = excluded.value,
+            updated_at = excluded.updated_at
+        """,
+        (key, str(value)),
+    )
+    conn.commit()
@@ -1,7 +1,26 @@
 # app/data/tickets.py
 import pandas as pd
 
+from app.data.cache import cached_read
+from app.data.query_builder import SelectQuery, first_column
+from app.data.rollups import (
+    TICKET_ROLLUP,
+    has_rollup,
+    key_expression,
+    query_counts,
+    rollup_counts,
+    rollup_totals,
+)
+from app.data.schema import get_table_columns
+from app.data.search_index import where_search
 
+TICKETS_TABLE = "it_tickets"
+
+# Columns the dashboard text search looks in
+TICKET_SEARCH_COLUMNS = ["title", "subject"]
+
+
+@cached_read(TICKETS_TABLE)
 def get_all_tickets(conn):
     """
     Get all IT tickets.
@@ -24,3 +43,74 @@ def insert_ticket(conn, title, priority, status="open", created_date=None):
         (title, priority, status, created_date),
     )
     conn.commit()
+
+
+def ticket_query(
+    conn,
+    priority=None,
+    status=None,
+    date_from=None,
+    date_to=None,
+    text=None,
+):
+    """
+    Build a SelectQuery over it_tickets for the dashboard filters.
+
+    The date range applies to created_date (or date in older tables) and
+    text is looked up in the ticket title/subject through the full-text
+    index (see where_search).
+    """
+    columns = get_table_columns(conn, TICKETS_TABLE)
+    query = SelectQuery(TICKETS_TABLE, columns)
+    query.where_in("priority", priority)
+    query.where_in("status", status)
+    query.where_date_range(first_column(columns, "created_date", "date"), date_from, date_to)
+    where_search(conn, query, TICKETS_TABLE, text, TICKET_SEARCH_COLUMNS)
+    return query
+
+
+@cached_read(TICKETS_TABLE)
+def ticket_counts(
+    conn,
+    group_by,
+    priority=None,
+    status=None,
+    date_from=None,
+    date_to=None,
+    text=None,
+):
+    """
+    Count the filtered tickets per priority, status or day.
+
+    Read from the ticket rollup table; a text search falls back to
+    GROUP BY over the matching rows.
+    """
+    if text or not has_rollup(conn, TICKET_ROLLUP):
+        query = ticket_query(conn, priority, status, date_from, date_to, text)
+        return query_counts(conn, query, key_expression(conn, TICKET_ROLLUP, group_by), group_by)
+    return rollup_counts(
+        conn,
+        TICKET_ROLLUP,
+        group_by,
+        where={"priority": priority, "status": status},
+        day_from=date_from,
+        day_to=date_to,
+    )
+
+
+@cached_read(TICKETS_TABLE)
+def count_tickets(conn, priority=None, status=None, date_from=None, date_to=None, text=None):
+    """
+    Number of tickets matching the filters (rollup first, like ticket_counts).
+    """
+    if text or not has_rollup(conn, TICKET_ROLLUP):
+        return ticket_query(conn, priority, status, date_from, date_to, text).count(conn)
+    totals = rollup_totals(
+        conn,
+        TICKET_ROLLUP,
+        ["n"],
+        where={"priority": priority, "status": status},
+        day_from=date_from,
+        day_to=date_to,
+    )
+    return int(totals["n"])
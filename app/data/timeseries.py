@@ -0,0 +1,161 @@
+# app/data/timeseries.py
+import pandas as pd
+
+from app.data.cache import cached_read
+from app.data.incidents import INCIDENTS_TABLE, incident_query
+from app.data.query_builder import SelectQuery, get_column_range
+from app.data.rollups import INCIDENT_TIMESERIES, has_rollup, key_expression
+from app.data.schema import get_table_columns
+
+# Finest first; pick_resolution() walks this list
+RESOLUTIONS = ["hour", "day", "week", "month"]
+
+# pandas frequency of each resolution (matches the bucket start in SQL)
+RESOLUTION_FREQ = {"hour": "h", "day": "D", "week": "W-MON", "month": "MS"}
+
+# Approximate length of one bucket, used to estimate how many points a range has
+RESOLUTION_DAYS = {"hour": 1 / 24, "day": 1, "week": 7, "month": 30.44}
+
+# Most points a chart should get when the resolution is "auto"
+MAX_POINTS = 400
+
+# Columns an incident series can be split by
+SERIES_GROUPS = ["severity", "status", "incident_type"]
+
+
+def bucket_start(value, resolution):
+    """Start of the bucket holding value (a date or timestamp)."""
+    ts = pd.Timestamp(value)
+    if resolution == "hour":
+        return ts.floor("h")
+    if resolution == "day":
+        return ts.normalize()
+    if resolution == "week":
+        return (ts - pd.Timedelta(days=ts.weekday())).normalize()
+    if resolution == "month":
+        return ts.normalize().replace(day=1)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def pick_resolution(date_from, date_to, max_points=MAX_POINTS):
+    """
+    The finest resolution that shows the range in at most max_points
+    buckets ("month" if even that is too many).
+    """
+    days = (pd.Timestamp(date_to) - pd.Timestamp(date_from)).days + 1
+    for resolution in RESOLUTIONS:
+        if days / RESOLUTION_DAYS[resolution] <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def _bucket_range(conn, table):
+    """(first, last) bucket text of a time-series table, or (None, None)."""
+    return conn.execute(f"SELECT MIN(bucket), MAX(bucket) FROM {table} WHERE bucket != ''").fetchone()
+
+
+def _bucket_rows(conn, query: SelectQuery, bucket, group, measure):
+    select = f"{bucket} AS bucket, {group} AS grp, {measure}"
+    sql, params = query.build(select=select, order_by=None)
+    return conn.execute(sql + " GROUP BY bucket, grp", params).fetchall()
+
+
+@cached_read(INCIDENTS_TABLE)
+def incident_series(
+    conn,
+    date_from=None,
+    date_to=None,
+    resolution="auto",
+    by=None,
+    severity=None,
+    status=None,
+    incident_type=None,
+    text=None,
+    max_points=MAX_POINTS,
+):
+    """
+    Incident counts per time bucket, as a DataFrame indexed by bucket start.
+
+    resolution is one of RESOLUTIONS or "auto" (pick_resolution() over the
+    date range, or over all data if no range is given). by splits the
+    counts into one column per severity/status/incident_type; otherwise
+    there is one "incidents" column. Empty buckets are filled with 0.
+
+    Counts come from the pre-bucketed rollup of that resolution, so the
+    cost depends on the number of buckets, not incidents. A text search
+    falls back to GROUP BY over the matching rows. Buckets at the ends of
+    the range are counted whole.
+    """
+    if by is not None and by not in SERIES_GROUPS:
+        raise ValueError(f"Cannot split incidents by: {by}")
+
+    day_table = INCIDENT_TIMESERIES["day"]
+    use_rollup = not text and has_rollup(conn, day_table)
+
+    if date_from is None or date_to is None:
+        if use_rollup:
+            first, last = _bucket_range(conn, day_table)
+        else:
+            first, last = get_column_range(conn, INCIDENTS_TABLE, "date")
+        if not first or not last:
+            return pd.DataFrame(columns=["incidents"], dtype="int64")
+        date_from = date_from if date_from is not None else first
+        date_to = date_to if date_to is not None else last
+
+    if resolution == "auto":
+        resolution = pick_resolution(date_from, date_to, max_points)
+    table = INCIDENT_TIMESERIES[resolution]
+    start = bucket_start(date_from, resolution)
+    # The range covers whole days, so the last bucket is the one holding 23:59:59
+    end = bucket_start(pd.Timestamp(date_to).normalize() + pd.Timedelta(days=1, seconds=-1), resolution)
+
+    if use_rollup:
+        query = SelectQuery(table, get_table_columns(conn, table))
+        query.where_in("severity", severity)
+        query.where_in("status", status)
+        query.where_in("incident_type", incident_type)
+        query.where("bucket != ''")
+        query.where_date_range("bucket", start, date_to)
+        rows = _bucket_rows(conn, query, "bucket", by or "''", "SUM(n)")
+    else:
+        query = incident_query(conn, severity, status, start, date_to, text)
+        query.where_in("incident_type", incident_type)
+        bucket = key_expression(conn, table, "bucket")
+        group = key_expression(conn, table, by) if by else "''"
+        query.where(f"{bucket} != ''")
+        rows = _bucket_rows(conn, query, bucket, group, "COUNT(*)")
+
+    index = pd.date_range(start, end, freq=RESOLUTION_FREQ[resolution], name="bucket")
+    if not rows:
+        return pd.DataFrame({"incidents": 0}, index=index, dtype="int64")
+
+    frame = pd.DataFrame(rows, columns=["bucket", "group", "count"])
+    frame["bucket"] = pd.to_datetime(frame["bucket"], format="ISO8601", errors="coerce")
+    frame = frame.dropna(subset=["bucket"])
+    if by:
+        frame["group"] = frame["group"].replace("", "(none)")
+        counts = frame.pivot_table(index="bucket", columns="group", values="count", aggfunc="sum")
+        counts.columns.name = by
+    else:
+        counts = frame.groupby("bucket")["count"].sum().to_frame("incidents")
+    return counts.reindex(index, fill_value=0).fillna(0).astype("int64")
+
+
+def rolling_sum(series, window):
+    """Total over the last `window` buckets (shorter at the start)."""
+    return series.rolling(window, min_periods=1).sum()
+
+
+def moving_average(series, window):
+    """Mean over the last `window` buckets (shorter at the start)."""
+    return series.rolling(window, min_periods=1).mean()
+
+
+def with_trend(frame, window, column="incidents"):
+    """
+    A copy of a one-column series frame with its moving average added,
+    ready for st.line_chart.
+    """
+    result = frame[[column]].copy()
+    result[f"{window}-bucket average"] = moving_average(result[column], window)
+    return result
@@ -1,35 +1,15 @@
 # app/data/users.py
 import sqlite3
-import bcrypt
 
-
-def hash_password(plain_text_password):
-    """
-    Hash a password using bcrypt.
-    """
-    password_bytes = plain_text_password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed_bytes = bcrypt.hashpw(password_bytes, salt)
-    return hashed_bytes.decode("utf-8")
-
-
-def verify_password(plain_text_password, hashed_password):
-    """
-    Check a plaintext password against a stored hash.
+def insert_user(conn, registry, username, plain_password, role="user"):
     """
-    password_bytes = plain_text_password.encode("utf-8")
-    hash_bytes = hashed_password.encode("utf-8")
-    return bcrypt.checkpw(password_bytes, hash_bytes)
-
-
-def insert_user(conn, username, plain_password, role="user"):
-    """
-    Insert a new user row.
+    Insert a new user row, hashing the password with registry's default
+    scheme (the HasherRegistry is passed in by the service layer).
 
     Returns True if inserted, False if username already exists.
     """
     cur = conn.cursor()
-    password_hash = hash_password(plain_password)
+    password_hash = registry.hash_password(plain_password)
 
     try:
         cur.execute(
@@ -46,6 +26,32 @@ def insert_user(conn, username, plain_password, role="user"):
         return False
 
 
+def update_password_hash(conn, username, password_hash):
+    """
+    Replace a user's stored hash. Returns number of rows updated.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE users SET password_hash = ? WHERE username = ?",
+        (password_hash, username),
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def rehash_if_needed(conn, registry, username, plain_password, password_hash):
+    """
+    After a successful login, re-hash the password if registry reports the
+    stored hash as legacy SHA-256 (moved to bcrypt) or its scheme's
+    parameters are out of date, e.g. a different bcrypt cost than the
+    current policy. scrypt and pbkdf2 accounts keep their scheme.
+    Returns True if the hash was replaced.
+    """
+    if not registry.needs_rehash(password_hash):
+        return False
+    return update_password_hash(conn, username, registry.rehash(plain_password, password_hash)) > 0
+
+
 def get_user_by_username(conn, username):
     """
     Return a single user row by username, or None.
@@ -1,16 +1,31 @@
-from openai import OpenAI
+import time
+
+from app.services.ai_cache import make_cache_key
+from app.services.ai_client import get_client
+from app.services.chat_history import ChatHistory, token_budget
 
 
 class AIAssistant:
     """
     Handles AI chat logic for different domains.
-    Keeps prompts in one place and provides a simple 'ask()' method.
+    Keeps prompts in one place and provides a simple 'ask()' method,
+    plus 'ask_stream()' for answers that are shown as they arrive.
     """
 
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
-        self.__client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str = "gpt-4o-mini", base_url: str | None = None,
+                 cache=None, client=None, retriever=None):
+        # base_url lets the assistant talk to any OpenAI-compatible server
+        # (e.g. a local fake server while testing). Every assistant shares
+        # the process-wide AIClient unless another one is passed in.
+        self.__client = client if client is not None else get_client(api_key, base_url)
         self.__model = model
+        # Optional ResponseCache (app/services/ai_cache.py) shared between sessions
+        self.__cache = cache
+        # Optional Retriever (app/services/retriever.py) that adds matching
+        # platform records to each question
+        self.__retriever = retriever
         self.__domain = "Cybersecurity"
+        self.__last_stats = {}
 
     def set_domain(self, domain: str) -> None:
         """Set the current domain (Cybersecurity / Data Science / IT Operations)."""
@@ -22,6 +37,16 @@ class AIAssistant:
     def get_domain(self) -> str:
         return self.__domain
 
+    def get_model(self) -> str:
+        return self.__model
+
+    def get_last_stats(self) -> dict:
+        """
+        Timing of the last ask_stream() call: ttft_ms (time to first token),
+        tokens, tokens_per_sec, total_ms, cancelled and cached.
+        """
+        return dict(self.__last_stats)
+
     def get_system_prompt(self) -> str:
         """Return the system prompt based on the currently selected domain."""
         if self.__domain == "Cybersecurity":
@@ -42,7 +67,37 @@ class AIAssistant:
             "Help troubleshoot issues, optimize systems, and manage tickets."
         )
 
-    def ask(self, chat_history: list[dict], user_prompt: str) -> str:
+    def build_messages(self, chat_history, user_prompt: str) -> list[dict]:
+        """
+        System prompt + retrieved records + existing chat history + the new
+        user prompt. A ChatHistory is compacted to the domain's token budget first.
+        """
+        if isinstance(chat_history, ChatHistory):
+            chat_history = chat_history.payload(token_budget(self.__domain))
+
+        messages = [{"role": "system", "content": self.get_system_prompt()}]
+
+        if self.__retriever is not None:
+            context = self.__retriever.context_for(user_prompt, self.__domain)
+            if context:
+                messages.append({
+                    "role": "system",
+                    "content": "Relevant records from the platform database "
+                               "(cite them by #id when you use them):\n" + context,
+                })
+
+        # Add existing conversation messages
+        for m in chat_history:
+            messages.append({"role": m["role"], "content": m["content"]})
+
+        # Add the new user prompt
+        messages.append({"role": "user", "content": user_prompt})
+        return messages
+
+    def _cache_key(self, messages):
+        return make_cache_key(self.__model, self.__domain, messages[0]["content"], messages[1:])
+
+    def ask(self, chat_history: list[dict], user_prompt: str, use_cache: bool = True) -> str:
         """
         Send a message to the ChatGPT API using:
         - a domain-specific system prompt
@@ -51,19 +106,106 @@ class AIAssistant:
 
         chat_history should be a list of dicts like:
         [{"role":"user","content":"..."}, {"role":"assistant","content":"..."}]
+        or a ChatHistory, which keeps long conversations within a token budget.
+
+        With a cache, a repeated question (same domain, model and history)
+        is answered from it; use_cache=False always asks the model.
         """
-        messages = [{"role": "system", "content": self.get_system_prompt()}]
+        messages = self.build_messages(chat_history, user_prompt)
+        use_cache = use_cache and self.__cache is not None
+        if use_cache:
+            key = self._cache_key(messages)
+            cached = self.__cache.get(key)
+            if cached is not None:
+                return cached
 
-        # Add existing conversation messages
-        for m in chat_history:
-            messages.append({"role": m["role"], "content": m["content"]})
+        reply = self.__client.complete(self.__model, messages)
 
-        # Add the new user prompt
-        messages.append({"role": "user", "content": user_prompt})
+        if use_cache and reply:
+            self.__cache.put(key, reply, model=self.__model, domain=self.__domain)
+        return reply
 
-        completion = self.__client.chat.completions.create(
-            model=self.__model,
-            messages=messages,
+    def ask_many(self, user_prompts: list[str], system_prompt: str | None = None) -> list:
+        """
+        Send independent one-shot prompts concurrently (no history, no cache).
+        Returns the answers in order; a failed prompt gives its exception.
+        """
+        system = system_prompt or self.get_system_prompt()
+        return self.__client.complete_many(
+            [
+                {
+                    "model": self.__model,
+                    "messages": [
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": prompt},
+                    ],
+                }
+                for prompt in user_prompts
+            ]
         )
 
-        return completion.choices[0].message.content
+    def ask_stream(self, chat_history: list[dict], user_prompt: str, cancel_event=None,
+                   use_cache: bool = True):
+        """
+        Like ask(), but yields the answer in pieces as the model produces them.
+
+        Stop early by setting cancel_event (a threading.Event) or by closing
+        the generator; either way the HTTP stream is closed right away.
+        Timing is available from get_last_stats() once the generator ends.
+        A cached answer is yielded in one piece; a complete (not cancelled)
+        streamed answer is stored in the cache.
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        cancelled = False
+
+        messages = self.build_messages(chat_history, user_prompt)
+        use_cache = use_cache and self.__cache is not None
+        if use_cache:
+            key = self._cache_key(messages)
+            cached = self.__cache.get(key)
+            if cached is not None:
+                elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                self.__last_stats = {
+                    "ttft_ms": elapsed_ms,
+                    "tokens": 0,
+                    "tokens_per_sec": 0.0,
+                    "total_ms": elapsed_ms,
+                    "cancelled": False,
+                    "cached": True,
+                }
+                yield cached
+                return
+
+        parts = []
+        stream = self.__client.stream(self.__model, messages)
+        try:
+            for delta in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                # One streamed chunk is (about) one token
+                tokens += 1
+                parts.append(delta)
+                yield delta
+        except GeneratorExit:
+            cancelled = True
+            raise
+        finally:
+            stream.close()
+            ended = time.perf_counter()
+            generating = ended - first_token_at if first_token_at is not None else 0.0
+            self.__last_stats = {
+                "ttft_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+                "tokens": tokens,
+                "tokens_per_sec": round(tokens / generating, 1) if generating > 0 else 0.0,
+                "total_ms": round((ended - started) * 1000, 1),
+                "cancelled": cancelled,
+                "cached": False,
+            }
+
+        if use_cache and not cancelled and parts:
+            self.__cache.put(key, "".join(parts), model=self.__model, domain=self.__domain)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import re
+import threading
+import time
+
+from app.data.cache import QueryCache
+from app.data.db import connect_database
+
+AI_CACHE_DB = "DATA/ai_cache.db"
+
+# Cached answers are reused for this long (memory and disk)
+AI_CACHE_TTL = 7 * 24 * 60 * 60
+
+AI_CACHE_MAX_ENTRIES = 512
+
+# Expired answers are deleted from disk at start-up and every this many stores
+AI_CACHE_PURGE_EVERY = 100
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lower-case, collapse whitespace and drop trailing punctuation, so
+    'How do I triage ransomware?' and 'how do i  triage ransomware' match.
+    """
+    return _SPACES.sub(" ", (text or "").lower()).strip().rstrip("?!. ")
+
+
+def make_cache_key(model: str, domain: str, system_prompt: str, messages: list[dict]) -> str:
+    """SHA-256 over the model, domain, system prompt and normalized messages."""
+    payload = {
+        "model": model,
+        "domain": domain,
+        "system": normalize_text(system_prompt),
+        "messages": [(m["role"], normalize_text(m["content"])) for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def create_ai_cache_table(conn):
+    """Create the table that keeps cached answers on disk."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_responses (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT,
+            domain TEXT,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ai_responses_created ON ai_responses (created_at)")
+    conn.commit()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of assistant answers.
+
+    The memory tier is an LRU with a TTL (shared by every session in the
+    process); the disk tier is a SQLite table that survives restarts.
+    A disk hit is copied back into memory. Pass db_path=None for memory only.
+    Expired rows are purged from disk when the cache is created and after
+    every AI_CACHE_PURGE_EVERY stores, so the file does not grow forever.
+    """
+
+    def __init__(self, db_path: str | None = AI_CACHE_DB, ttl: float = AI_CACHE_TTL,
+                 max_entries: int = AI_CACHE_MAX_ENTRIES):
+        self.__memory = QueryCache(ttl=ttl, max_entries=max_entries)
+        self.__db_path = db_path
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+        self.__counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        if db_path is not None:
+            create_ai_cache_table(connect_database(db_path))
+            self.purge_expired()
+
+    def _count(self, name):
+        with self.__lock:
+            self.__counts[name] += 1
+
+    def get(self, key: str):
+        """The cached answer for key, or None."""
+        hit, value = self.__memory.get(key)
+        if hit:
+            self._count("memory_hits")
+            return value
+
+        if self.__db_path is not None:
+            conn = connect_database(self.__db_path)
+            row = conn.execute(
+                "SELECT response FROM ai_responses WHERE cache_key = ? AND created_at >= ?",
+                (key, time.time() - self.__ttl),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE ai_responses SET hits = hits + 1 WHERE cache_key = ?", (key,))
+                conn.commit()
+                self.__memory.put(key, row[0])
+                self._count("disk_hits")
+                return row[0]
+
+        self._count("misses")
+        return None
+
+    def put(self, key: str, response: str, model: str = "", domain: str = "") -> None:
+        self.__memory.put(key, response)
+        if self.__db_path is not None:
+            conn = connect_database(self.__db_path)
+            conn.execute(
+                """
+                INSERT INTO ai_responses (cache_key, model, domain, response, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at
+                """,
+                (key, model, domain, response, time.time()),
+            )
+            conn.commit()
+        self._count("stores")
+        if self.__db_path is not None and self.__counts["stores"] % AI_CACHE_PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired answers from disk. Returns rows deleted."""
+        if self.__db_path is None:
+            return 0
+        conn = connect_database(self.__db_path)
+        cur = conn.execute("DELETE FROM ai_responses WHERE created_at < ?", (time.time() - self.__ttl,))
+        conn.commit()
+        return cur.rowcount
+
+    def clear(self) -> None:
+        self.__memory.clear()
+        if self.__db_path is not None:
+            conn = connect_database(self.__db_path)
+            conn.execute("DELETE FROM ai_responses")
+            conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counts and the hit rate since start-up."""
+        with self.__lock:
+            result = dict(self.__counts)
+        lookups = result["memory_hits"] + result["disk_hits"] + result["misses"]
+        result["hit_rate"] = round((lookups - result["misses"]) / lookups, 3) if lookups else 0.0
+        return result
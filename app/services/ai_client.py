@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+
+import openai
+from openai import AsyncOpenAI
+
+# Requests to the provider in flight at once, for the whole process
+MAX_CONCURRENCY = 8
+
+# Retries on 429 / 5xx / connection errors, with jittered exponential backoff
+MAX_RETRIES = 4
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+
+REQUEST_TIMEOUT = 60.0
+
+_RETRYABLE = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _is_retryable(error) -> bool:
+    if isinstance(error, _RETRYABLE):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _request_key(model, messages, kwargs) -> str:
+    payload = {"model": model, "messages": messages, "kwargs": kwargs}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AIClient:
+    """
+    One AsyncOpenAI client shared by the whole process.
+
+    The client runs on its own event loop in a background thread, so its
+    HTTP connections are kept alive and reused by every caller, sync or
+    async. All requests pass one semaphore (max_concurrency), 429/5xx
+    answers are retried with jittered backoff, and identical requests that
+    are already in flight share one API call instead of sending another.
+
+    Sync code uses create() / complete() / stream() / complete_many();
+    coroutines running on the client's loop can await acreate() directly.
+    """
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None,
+                 max_concurrency: int = MAX_CONCURRENCY, max_retries: int = MAX_RETRIES,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.__max_retries = max_retries
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__in_flight = {}
+        self.__lock = threading.Lock()
+        self.__counts = {"requests": 0, "api_calls": 0, "retries": 0, "coalesced": 0, "errors": 0}
+
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(
+            target=self.__loop.run_forever, name="ai-client-loop", daemon=True
+        )
+        self.__thread.start()
+
+        async def setup():
+            # Created on the loop so they are bound to it
+            client = AsyncOpenAI(
+                api_key=api_key or os.environ.get("OPENAI_API_KEY"),
+                base_url=base_url,
+                timeout=timeout,
+                max_retries=0,  # retries are done here, with jitter
+            )
+            return client, asyncio.Semaphore(max_concurrency)
+
+        self.__client, self.__semaphore = self._run(setup())
+
+    # ---- Event loop helpers ----
+    def _run(self, coro):
+        """Run a coroutine on the client's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.__loop).result()
+
+    def _count(self, name, amount=1):
+        with self.__lock:
+            self.__counts[name] += amount
+
+    async def _backoff(self, attempt, error):
+        delay = min(self.__max_delay, self.__base_delay * (2 ** attempt))
+        # Full jitter: callers that failed together don't retry together
+        wait = random.uniform(0, delay)
+        retry_after = getattr(getattr(error, "response", None), "headers", {}).get("retry-after")
+        if retry_after is not None:
+            try:
+                # The server's Retry-After is a floor, not something to jitter below
+                wait = max(wait, float(retry_after))
+            except ValueError:
+                pass
+        await asyncio.sleep(wait)
+
+    # ---- Async API (runs on the client's loop) ----
+    async def _call(self, model, messages, kwargs):
+        attempt = 0
+        while True:
+            try:
+                async with self.__semaphore:
+                    self._count("api_calls")
+                    return await self.__client.chat.completions.create(
+                        model=model, messages=messages, **kwargs
+                    )
+            except Exception as e:
+                if attempt >= self.__max_retries or not _is_retryable(e):
+                    self._count("errors")
+                    raise
+                self._count("retries")
+                await self._backoff(attempt, e)
+                attempt += 1
+
+    async def acreate(self, model: str, messages: list[dict], **kwargs):
+        """
+        Chat completion with the concurrency limit, retries and coalescing.
+        Must be awaited on this client's loop.
+        """
+        self._count("requests")
+        key = _request_key(model, messages, kwargs)
+        task = self.__in_flight.get(key)
+        if task is not None:
+            self._count("coalesced")
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(self._call(model, messages, kwargs))
+        self.__in_flight[key] = task
+        task.add_done_callback(lambda _: self.__in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _stream_into(self, model, messages, kwargs, out):
+        """Push streamed deltas into a queue.Queue; None marks the end."""
+        attempt = 0
+        try:
+            while True:
+                started = False
+                try:
+                    async with self.__semaphore:
+                        self._count("api_calls")
+                        stream = await self.__client.chat.completions.create(
+                            model=model, messages=messages, stream=True, **kwargs
+                        )
+                        try:
+                            async for chunk in stream:
+                                if chunk.choices and chunk.choices[0].delta.content:
+                                    started = True
+                                    out.put(chunk.choices[0].delta.content)
+                        finally:
+                            await stream.close()
+                    return
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Only retry if nothing was handed to the caller yet
+                    if started or attempt >= self.__max_retries or not _is_retryable(e):
+                        self._count("errors")
+                        out.put(e)
+                        return
+                    self._count("retries")
+                    await self._backoff(attempt, e)
+                    attempt += 1
+        finally:
+            out.put(None)
+
+    # ---- Sync API ----
+    def create(self, model: str, messages: list[dict], **kwargs):
+        """Blocking chat completion (the full response object)."""
+        return self._run(self.acreate(model, messages, **kwargs))
+
+    def complete(self, model: str, messages: list[dict], **kwargs) -> str:
+        """Blocking chat completion; returns the answer text."""
+        return self.create(model, messages, **kwargs).choices[0].message.content
+
+    def complete_many(self, requests: list[dict]) -> list:
+        """
+        Run many requests concurrently ({"model", "messages", ...} dicts).
+        Returns answer texts in order; a failed request gives its exception.
+        """
+        async def run_all():
+            return await asyncio.gather(
+                *(self.acreate(**request) for request in requests), return_exceptions=True
+            )
+
+        results = self._run(run_all())
+        return [r if isinstance(r, Exception) else r.choices[0].message.content for r in results]
+
+    def stream(self, model: str, messages: list[dict], **kwargs):
+        """
+        Blocking generator of text deltas. Closing it early cancels the
+        request on the loop (and closes the HTTP stream).
+        """
+        self._count("requests")
+        out = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._stream_into(model, messages, kwargs, out), self.__loop
+        )
+        try:
+            while True:
+                item = out.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+    # ---- Monitoring ----
+    def stats(self) -> dict:
+        with self.__lock:
+            result = dict(self.__counts)
+        result["in_flight"] = len(self.__in_flight)
+        return result
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the loop; get_client() then makes a new one."""
+        with _clients_lock:
+            for key in [k for k, client in _clients.items() if client is self]:
+                del _clients[key]
+        self._run(self.__client.close())
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+
+
+def get_client(api_key: str | None = None, base_url: str | None = None) -> AIClient:
+    """The shared AIClient for this key and base URL (created on first use)."""
+    key = (api_key or os.environ.get("OPENAI_API_KEY"), base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = AIClient(api_key=key[0], base_url=base_url)
+            _clients[key] = client
+        return client
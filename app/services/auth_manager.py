@@ -1,3 +1,4 @@
+from app.services.hashers import get_registry
 from models.user import User
 
 
@@ -5,11 +6,13 @@ class AuthManager:
     """
     Handles registration and login.
     Uses DatabaseManager for DB access and a hasher object for password checks.
+    The default hasher is the shared HasherRegistry, which verifies any
+    supported scheme and upgrades outdated hashes on login.
     """
 
-    def __init__(self, db_manager, hasher):
+    def __init__(self, db_manager, hasher=None):
         self.__db_manager = db_manager
-        self.__hasher = hasher
+        self.__hasher = hasher if hasher is not None else get_registry()
 
     def register_user(self, username: str, plain_password: str, role: str = "user") -> bool:
         """
@@ -47,6 +50,20 @@ class AuthManager:
         user_id, db_username, password_hash, role = row
 
         if self.__hasher.check_password(plain_password, password_hash):
+            # Replace legacy / outdated hashes while we have the plain password
+            needs_rehash = getattr(self.__hasher, "needs_rehash", None)
+            if needs_rehash is not None and needs_rehash(password_hash):
+                # The registry keeps the hash's own scheme (scrypt/pbkdf2 stay cheap)
+                rehash = getattr(self.__hasher, "rehash", None)
+                if rehash is not None:
+                    password_hash = rehash(plain_password, password_hash)
+                else:
+                    password_hash = self.__hasher.hash_password(plain_password)
+                self.__db_manager.execute_query(
+                    "UPDATE users SET password_hash = ? WHERE id = ?",
+                    (password_hash, user_id),
+                )
+
             # Create and return User object (Week 11 OOP style)
             return User(db_username, password_hash, role)
 
@@ -0,0 +1,404 @@
+"""
+Overnight AI triage of incidents and tickets.
+
+Rows are streamed from the table with a keyset cursor, packed into
+prompts up to a token budget, and the prompts are sent concurrently
+through AIAssistant (the shared AI client bounds how many are in flight).
+Each suggestion is written to ai_triage. A checkpoint records the last id
+that was sent and answered, so a stopped run resumes where it left off.
+Records the reply did not cover (missing or unparsable) are written to
+ai_triage_failed and retried with --retry-failed.
+
+Run from the project root:
+    python -m app.services.batch_triage --table cyber_incidents
+    python -m app.services.batch_triage --table it_tickets --base-url http://127.0.0.1:8000/v1
+    python -m app.services.batch_triage --table cyber_incidents --retry-failed
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import time
+
+from app.data.incidents import incident_query
+from app.data.pagination import fetch_page
+from app.data.tickets import ticket_query
+from app.services.chat_history import count_tokens
+
+# Prompt size (tokens of row text) and row count per request
+BATCH_TOKENS = 2500
+BATCH_MAX_ROWS = 25
+
+# Requests sent together before results are written and checkpointed
+PARALLEL_BATCHES = 4
+
+# Rows read from the table per keyset page
+READ_PAGE_ROWS = 500
+
+# Characters kept from each field of a row
+FIELD_CHARS = 300
+
+# Per table: how to query it, the assistant domain and the allowed labels
+TRIAGE_SOURCES = {
+    "cyber_incidents": {
+        "query": incident_query,
+        "domain": "Cybersecurity",
+        "labels": ["Low", "Medium", "High", "Critical"],
+    },
+    "it_tickets": {
+        "query": ticket_query,
+        "domain": "IT Operations",
+        "labels": ["Low", "Medium", "High", "Critical"],
+    },
+}
+
+SKIP_COLUMNS = {"created_at"}
+
+TRIAGE_INSTRUCTIONS = (
+    "Triage each record below. Reply with only a JSON array, one object per "
+    'record: {{"id": <record id>, "severity": one of {labels}, '
+    '"summary": "<one sentence>"}}.\n\nRecords:\n'
+)
+
+_JSON_OBJECT = re.compile(r"\{[^{}]*\}")
+
+
+def create_triage_tables(conn):
+    """Create the results, per-table checkpoint and failed-record tables."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_triage (
+            source_table TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            suggested_severity TEXT,
+            summary TEXT,
+            model TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_table, record_id)
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_triage_checkpoint (
+            source_table TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_triage_failed (
+            source_table TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            reason TEXT,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_table, record_id)
+        )
+        """
+    )
+    conn.commit()
+
+
+def get_checkpoint(conn, table):
+    """Last id triaged for a table, or None if it was never run."""
+    row = conn.execute(
+        "SELECT last_id FROM ai_triage_checkpoint WHERE source_table = ?", (table,)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def get_failed_ids(conn, table) -> list[int]:
+    """Ids whose last triage attempt got no usable suggestion."""
+    rows = conn.execute(
+        "SELECT record_id FROM ai_triage_failed WHERE source_table = ? ORDER BY record_id",
+        (table,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def reset_checkpoint(conn, table):
+    """Start the next run for this table from the first row again."""
+    conn.execute("DELETE FROM ai_triage_checkpoint WHERE source_table = ?", (table,))
+    conn.commit()
+
+
+def row_text(row: dict) -> str:
+    """One line per record: 'id=7 | severity=High | description=...'."""
+    parts = []
+    for name, value in row.items():
+        if name in SKIP_COLUMNS or value is None or value != value:  # NaN check
+            continue
+        text = " ".join(str(value).split())
+        if len(text) > FIELD_CHARS:
+            text = text[: FIELD_CHARS - 3] + "..."
+        parts.append(f"{name}={text}")
+    return " | ".join(parts)
+
+
+def iter_rows(conn, table, after_id=None, page_rows=READ_PAGE_ROWS):
+    """Yield the table's rows as dicts in id order, one keyset page at a time."""
+    query = TRIAGE_SOURCES[table]["query"](conn)
+    while True:
+        page = fetch_page(conn, query, after_id=after_id, page_size=page_rows, descending=False)
+        for row in page.get_rows().to_dict("records"):
+            yield row
+        if not page.has_next():
+            return
+        after_id = page.last_id()
+
+
+def iter_failed_rows(conn, table, page_rows=READ_PAGE_ROWS):
+    """Yield the rows listed in ai_triage_failed for a table, in id order."""
+    failed = get_failed_ids(conn, table)
+    for start in range(0, len(failed), page_rows):
+        query = TRIAGE_SOURCES[table]["query"](conn)
+        query.where_in("id", failed[start:start + page_rows])
+        for row in query.fetch_df(conn, order_by="id ASC").to_dict("records"):
+            yield row
+
+
+def iter_batches(rows, budget_tokens=BATCH_TOKENS, max_rows=BATCH_MAX_ROWS):
+    """
+    Group rows into lists of (id, text) whose text fits budget_tokens.
+    A single row larger than the budget still gets a batch of its own.
+    """
+    batch = []
+    used = 0
+    for row in rows:
+        text = row_text(row)
+        tokens = count_tokens(text) + 1
+        if batch and (used + tokens > budget_tokens or len(batch) >= max_rows):
+            yield batch
+            batch = []
+            used = 0
+        batch.append((int(row["id"]), text))
+        used += tokens
+    if batch:
+        yield batch
+
+
+def build_prompt(batch, labels) -> str:
+    return TRIAGE_INSTRUCTIONS.format(labels=", ".join(labels)) + "\n".join(
+        text for _, text in batch
+    )
+
+
+def parse_triage(reply: str, batch, labels) -> list[tuple]:
+    """
+    (record_id, severity, summary) for every record of the batch the reply
+    covers. Accepts a JSON array, or JSON objects scattered in the text.
+    """
+    try:
+        items = json.loads(reply)
+        if isinstance(items, dict):
+            items = [items]
+    except (TypeError, ValueError):
+        items = []
+        for match in _JSON_OBJECT.findall(reply or ""):
+            try:
+                items.append(json.loads(match))
+            except ValueError:
+                continue
+
+    wanted = {record_id for record_id, _ in batch}
+    by_label = {label.lower(): label for label in labels}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            record_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if record_id not in wanted:
+            continue
+        severity = by_label.get(str(item.get("severity", "")).strip().lower())
+        results[record_id] = (record_id, severity, str(item.get("summary", "")).strip())
+    return list(results.values())
+
+
+def _save_round(conn, table, model, rows, missing, last_id):
+    # Results, failures and checkpoint in one transaction
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO ai_triage (source_table, record_id, suggested_severity, summary, model)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source_table, record_id) DO UPDATE SET
+                suggested_severity = excluded.suggested_severity,
+                summary = excluded.summary,
+                model = excluded.model,
+                created_at = CURRENT_TIMESTAMP
+            """,
+            [(table, record_id, severity, summary, model) for record_id, severity, summary in rows],
+        )
+        conn.executemany(
+            "DELETE FROM ai_triage_failed WHERE source_table = ? AND record_id = ?",
+            [(table, record_id) for record_id, _, _ in rows],
+        )
+        conn.executemany(
+            """
+            INSERT INTO ai_triage_failed (source_table, record_id, reason)
+            VALUES (?, ?, 'no suggestion in reply')
+            ON CONFLICT(source_table, record_id) DO UPDATE SET
+                attempts = attempts + 1,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            [(table, record_id) for record_id in missing],
+        )
+        if last_id is not None:
+            conn.execute(
+                """
+                INSERT INTO ai_triage_checkpoint (source_table, last_id, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source_table) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    updated_at = excluded.updated_at
+                """,
+                (table, last_id),
+            )
+
+
+def triage_table(
+    conn,
+    assistant,
+    table="cyber_incidents",
+    budget_tokens=BATCH_TOKENS,
+    max_rows=BATCH_MAX_ROWS,
+    parallel=PARALLEL_BATCHES,
+    limit=None,
+    progress=None,
+    retry_failed=False,
+):
+    """
+    Triage a table's rows after its checkpoint.
+
+    Every round sends `parallel` batch prompts at once, then saves the
+    parsed suggestions and moves the checkpoint past the last batch that
+    came back without a failed one before it. Records of an answered
+    batch that got no suggestion are saved in ai_triage_failed instead of
+    being lost. If a request fails, the round's other answers are still
+    saved and the run stops, so the next run sends the failed batch again.
+    limit caps how many rows this run reads. retry_failed=True triages the
+    rows in ai_triage_failed instead and leaves the checkpoint alone.
+    progress(rows_done, seconds) is called after every round.
+
+    Returns a dict with rows, triaged, missing, requests, failed,
+    pending_failed (rows in ai_triage_failed afterwards) and seconds.
+    """
+    if table not in TRIAGE_SOURCES:
+        raise ValueError(f"No triage setup for table: {table}")
+    source = TRIAGE_SOURCES[table]
+    labels = source["labels"]
+
+    create_triage_tables(conn)
+    assistant.set_domain(source["domain"])
+
+    if retry_failed:
+        rows = iter_failed_rows(conn, table)
+    else:
+        rows = iter_rows(conn, table, after_id=get_checkpoint(conn, table))
+    if limit is not None:
+        rows = itertools.islice(rows, limit)
+    batches = iter_batches(rows, budget_tokens, max_rows)
+
+    started = time.perf_counter()
+    stats = {"rows": 0, "triaged": 0, "missing": 0, "requests": 0, "failed": 0, "seconds": 0.0}
+
+    while True:
+        round_batches = [batch for _, batch in zip(range(parallel), batches)]
+        if not round_batches:
+            break
+
+        replies = assistant.ask_many([build_prompt(batch, labels) for batch in round_batches])
+        stats["requests"] += len(round_batches)
+
+        saved = []
+        missing = []
+        last_id = None
+        contiguous = True
+        for batch, reply in zip(round_batches, replies):
+            if isinstance(reply, Exception):
+                stats["failed"] += 1
+                contiguous = False
+                continue
+            # Answers after a failed batch are kept too; only the
+            # checkpoint stops before the failed batch
+            results = parse_triage(reply, batch, labels)
+            covered = {record_id for record_id, _, _ in results}
+            saved.extend(results)
+            missing.extend(record_id for record_id, _ in batch if record_id not in covered)
+            if contiguous:
+                last_id = batch[-1][0]
+            stats["rows"] += len(batch)
+
+        if retry_failed:
+            last_id = None
+        _save_round(conn, table, assistant.get_model(), saved, missing, last_id)
+        stats["triaged"] += len(saved)
+        stats["missing"] += len(missing)
+        if progress is not None:
+            progress(stats["rows"], time.perf_counter() - started)
+        if stats["failed"]:
+            break
+
+    stats["pending_failed"] = len(get_failed_ids(conn, table))
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main():
+    from app.data.db import connect_database
+    from app.services.ai_assistant import AIAssistant
+
+    parser = argparse.ArgumentParser(description="Pre-triage incidents or tickets with the AI model.")
+    parser.add_argument("--table", choices=sorted(TRIAGE_SOURCES), default="cyber_incidents")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"))
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--parallel", type=int, default=PARALLEL_BATCHES)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="only triage the rows in ai_triage_failed"
+    )
+    args = parser.parse_args()
+
+    conn = connect_database()
+    create_triage_tables(conn)
+    if args.restart:
+        reset_checkpoint(conn, args.table)
+
+    assistant = AIAssistant(
+        api_key=os.environ.get("OPENAI_API_KEY", ""), model=args.model, base_url=args.base_url
+    )
+    stats = triage_table(
+        conn,
+        assistant,
+        table=args.table,
+        parallel=args.parallel,
+        limit=args.limit,
+        retry_failed=args.retry_failed,
+        progress=lambda done, secs: print("Triaged {} rows ({:.1f}s)".format(done, secs)),
+    )
+    print(
+        "{}: {} rows in {} requests, {} suggestions saved, {} without a suggestion, "
+        "{} requests failed, {}s".format(
+            args.table, stats["rows"], stats["requests"], stats["triaged"],
+            stats["missing"], stats["failed"], stats["seconds"],
+        )
+    )
+    if stats["pending_failed"]:
+        print(
+            "{} rows in ai_triage_failed; run again with --retry-failed".format(
+                stats["pending_failed"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import hashlib
+import io
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.data.cache import QueryCache
+from app.data.downsample import lttb
+
+# Rendered PNGs kept per process (a chart is a few tens of KB)
+CHART_CACHE_ENTRIES = 128
+CHART_CACHE_TTL = 3600
+
+# Scatter plots with more points than this are downsampled before drawing
+SCATTER_MAX_POINTS = 2000
+
+# Hexagons across a binned scatter
+HEXBIN_GRIDSIZE = 40
+
+FIGSIZE = (5, 4)
+DPI = 100
+
+_png_cache = QueryCache(ttl=CHART_CACHE_TTL, max_entries=CHART_CACHE_ENTRIES)
+
+
+def _render(draw, figsize=FIGSIZE) -> bytes:
+    """
+    Draw on a new Figure and return it as PNG bytes.
+
+    The Figure is created through the object API, not pyplot, so it is
+    never registered globally; it is cleared once saved and nothing holds
+    it afterwards, so the process does not keep figures between reruns.
+    """
+    fig = Figure(figsize=figsize, dpi=DPI)
+    FigureCanvasAgg(fig)
+    try:
+        draw(fig.add_subplot())
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def _cached(key, draw, figsize=FIGSIZE) -> bytes:
+    hit, png = _png_cache.get(key)
+    if not hit:
+        png = _render(draw, figsize)
+        _png_cache.put(key, png)
+    return png
+
+
+def _array_digest(*arrays) -> str:
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype, array.shape)).encode("utf-8"))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def pie_png(counts, title=None, figsize=FIGSIZE) -> bytes:
+    """
+    Pie chart of aggregated counts (a Series like value_counts()) as PNG.
+    The image is cached by the labels and counts, so unchanged data is
+    not drawn again.
+    """
+    labels = [str(label) for label in counts.index]
+    values = [float(value) for value in counts.values]
+
+    def draw(ax):
+        ax.pie(values, labels=labels, autopct="%1.0f%%")
+        if title:
+            ax.set_title(title)
+
+    return _cached(("pie", tuple(labels), tuple(values), title, figsize), draw, figsize)
+
+
+def scatter_png(x, y, xlabel="", ylabel="", max_points=SCATTER_MAX_POINTS, figsize=FIGSIZE) -> bytes:
+    """
+    Scatter plot (x ordered) as PNG. Inputs above max_points are reduced
+    with LTTB first, and the image is cached by a digest of the points.
+    """
+    x, y = lttb(x, y, max_points)
+
+    def draw(ax):
+        ax.scatter(x, y, s=8)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+
+    key = ("scatter", _array_digest(x, y), xlabel, ylabel, figsize)
+    return _cached(key, draw, figsize)
+
+
+def binned_scatter_png(bins, xlabel="", ylabel="", gridsize=HEXBIN_GRIDSIZE, figsize=FIGSIZE) -> bytes:
+    """
+    Density (hexbin) plot of a scatter already binned in SQL: bins has one
+    row per grid cell with its mean x, mean y and row count (see xy_bins).
+    Drawing cost depends on the number of cells, not rows.
+    """
+    x = bins["x"].to_numpy(dtype=float)
+    y = bins["y"].to_numpy(dtype=float)
+    counts = bins["count"].to_numpy(dtype=float)
+
+    def draw(ax):
+        cells = ax.hexbin(
+            x, y, C=counts, reduce_C_function=np.sum, gridsize=gridsize, mincnt=1, cmap="viridis"
+        )
+        ax.figure.colorbar(cells, ax=ax, label="Rows")
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+
+    key = ("hexbin", _array_digest(x, y, counts), xlabel, ylabel, gridsize, figsize)
+    return _cached(key, draw, figsize)
+
+
+def chart_cache_stats() -> dict:
+    """Entries, hits and misses of the rendered-chart cache."""
+    return _png_cache.stats()
@@ -0,0 +1,142 @@
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character estimate
+    tiktoken = None
+
+# Most tokens the history part of a request may use, per assistant domain
+DOMAIN_TOKEN_BUDGETS = {
+    "Cybersecurity": 3000,
+    "Data Science": 3000,
+    "IT Operations": 2000,
+}
+DEFAULT_TOKEN_BUDGET = 2000
+
+# Share of the budget the rolling summary of older turns may take
+SUMMARY_SHARE = 0.25
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+# Characters kept from each older message when it is folded into the summary
+SUMMARY_LINE_CHARS = 200
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in a piece of text: exact with tiktoken installed, otherwise
+    estimated as one token per four characters.
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text or ""))
+    return (len(text or "") + 3) // 4
+
+
+def token_budget(domain: str) -> int:
+    return DOMAIN_TOKEN_BUDGETS.get(domain, DEFAULT_TOKEN_BUDGET)
+
+
+def summarize_extractive(previous_summary: str, messages: list[dict]) -> str:
+    """
+    Default summarizer: one shortened line per message, appended to the
+    previous summary. Costs no API call, so compaction never adds latency.
+    """
+    lines = [previous_summary] if previous_summary else []
+    for m in messages:
+        text = " ".join(m["content"].split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[: SUMMARY_LINE_CHARS - 3] + "..."
+        lines.append(f"{m['role']}: {text}")
+    return "\n".join(lines)
+
+
+class ChatHistory:
+    """
+    Full conversation for display, plus a compact version for the API.
+
+    payload() returns a rolling summary of older turns followed by the most
+    recent messages that fit the token budget, so the request size stays
+    bounded however long the conversation gets. Token counts are computed
+    once per message, and messages that leave the window are summarized once.
+    """
+
+    def __init__(self, summarizer=summarize_extractive):
+        self.__messages = []
+        self.__tokens = []
+        self.__summary = ""
+        self.__summarized_upto = 0
+        self.__summarizer = summarizer
+
+    def add(self, role: str, content: str) -> None:
+        self.__messages.append({"role": role, "content": content})
+        self.__tokens.append(count_tokens(content) + MESSAGE_OVERHEAD)
+
+    def get_messages(self) -> list[dict]:
+        """Every message, for showing the conversation."""
+        return list(self.__messages)
+
+    def get_summary(self) -> str:
+        return self.__summary
+
+    def clear(self) -> None:
+        self.__messages.clear()
+        self.__tokens.clear()
+        self.__summary = ""
+        self.__summarized_upto = 0
+
+    def __len__(self) -> int:
+        return len(self.__messages)
+
+    def _trim_summary(self, max_tokens):
+        # Drop the oldest summary lines until it fits its share
+        lines = self.__summary.split("\n")
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        self.__summary = "\n".join(lines)
+
+    def payload(self, budget: int = DEFAULT_TOKEN_BUDGET) -> list[dict]:
+        """
+        Messages to send: [summary] + recent window, within about budget tokens.
+        The newest message is always included.
+        """
+        summary_budget = int(budget * SUMMARY_SHARE)
+        unsummarized = sum(self.__tokens[self.__summarized_upto:])
+        if self.__summarized_upto or unsummarized > budget:
+            # Leave room for the summary
+            window_budget = budget - summary_budget
+        else:
+            window_budget = budget
+
+        # Walk back from the newest message while the window still fits
+        start = len(self.__messages)
+        used = 0
+        while start > self.__summarized_upto:
+            cost = self.__tokens[start - 1]
+            if used + cost > window_budget and start < len(self.__messages):
+                break
+            used += cost
+            start -= 1
+
+        # Fold the messages that just left the window into the summary
+        if start > self.__summarized_upto:
+            dropped = self.__messages[self.__summarized_upto:start]
+            self.__summary = self.__summarizer(self.__summary, dropped)
+            self.__summarized_upto = start
+            self._trim_summary(summary_budget)
+
+        window = self.__messages[start:]
+        if not self.__summary:
+            return list(window)
+        summary = {
+            "role": "system",
+            "content": "Summary of the earlier conversation:\n" + self.__summary,
+        }
+        return [summary] + window
+
+    def payload_tokens(self, budget: int = DEFAULT_TOKEN_BUDGET) -> int:
+        """Token estimate of payload(budget)."""
+        return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in self.payload(budget))
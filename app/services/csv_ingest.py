@@ -0,0 +1,231 @@
+import csv
+import hashlib
+import os
+import time
+
+from app.data.schema import get_table_columns
+
+# Rows per executemany/transaction. Each chunk is committed together with
+# its checkpoint, so an interrupted load resumes where it stopped.
+CHUNK_ROWS = 5000
+
+
+def _mb_to_bytes(value):
+    return int(round(float(value) * 1024 * 1024))
+
+
+# CSV headers that older copies of the database store under another name:
+# CSV column -> (table column, converter for the value or None). Used only
+# when the table lacks the CSV column and the CSV lacks the table column.
+COLUMN_ALIASES = {
+    "dataset_name": ("name", None),
+    "file_size_mb": ("size", _mb_to_bytes),
+    "subject": ("title", None),
+}
+
+
+def create_ingest_log_table(conn):
+    """Create the table that remembers which CSV files were loaded."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ingest_log (
+            source_path TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_path, table_name)
+        )
+        """
+    )
+    conn.commit()
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Hash a file in blocks (never reads the whole file into memory)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_upsert_sql(table, columns, key):
+    """
+    INSERT ... ON CONFLICT(key) DO UPDATE, so re-loading a row updates it
+    instead of duplicating it or failing on a UNIQUE constraint.
+    """
+    placeholders = ", ".join(["?"] * len(columns))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != key)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    if updates:
+        return sql + f" ON CONFLICT({key}) DO UPDATE SET {updates}"
+    return sql + f" ON CONFLICT({key}) DO NOTHING"
+
+
+def _required_columns(conn, table):
+    """NOT NULL columns without a default (the primary key excluded)."""
+    cur = conn.cursor()
+    cur.execute(f"PRAGMA table_info({table})")
+    # Rows are (cid, name, type, notnull, default, pk)
+    return [row[1] for row in cur.fetchall() if row[3] and row[4] is None and not row[5]]
+
+
+def map_columns(conn, csv_path, header, table, key):
+    """
+    Match the CSV header against the table's columns.
+
+    Returns (positions, columns, converters, key): the CSV positions to
+    read, the table column each one goes to, a converter (or None) per
+    column, and the upsert key that was picked. key is a column name or a
+    sequence of candidates; the first one the CSV provides is used.
+
+    Raises ValueError, before anything is written, if no key candidate is
+    present or a NOT NULL column of the table would be left empty.
+    """
+    table_columns = get_table_columns(conn, table)
+    positions, columns, converters = [], [], []
+    for i, name in enumerate(header):
+        target, convert = name, None
+        if name not in table_columns and name in COLUMN_ALIASES:
+            alias, alias_convert = COLUMN_ALIASES[name]
+            if alias in table_columns and alias not in header:
+                target, convert = alias, alias_convert
+        if target in table_columns and target not in columns:
+            positions.append(i)
+            columns.append(target)
+            converters.append(convert)
+
+    candidates = [key] if isinstance(key, str) else list(key)
+    picked = next((c for c in candidates if c in columns), None)
+    if picked is None:
+        raise ValueError(
+            f"{csv_path} has no column to upsert {table} on "
+            f"(tried {', '.join(candidates)}; CSV columns: {', '.join(header)})"
+        )
+
+    unfilled = [c for c in _required_columns(conn, table) if c not in columns]
+    if unfilled:
+        raise ValueError(
+            f"{csv_path} does not match {table}: no CSV column for required "
+            f"column(s) {', '.join(unfilled)} (CSV columns: {', '.join(header)}; "
+            f"table columns: {', '.join(table_columns)})"
+        )
+    return positions, columns, converters, picked
+
+
+def _get_log(conn, source_path, table):
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT content_hash, rows_done, completed
+        FROM ingest_log
+        WHERE source_path = ? AND table_name = ?
+        """,
+        (source_path, table),
+    )
+    return cur.fetchone()
+
+
+def _save_log(conn, source_path, table, content_hash, rows_done, completed):
+    conn.execute(
+        """
+        INSERT INTO ingest_log (source_path, table_name, content_hash, rows_done, completed, updated_at)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(source_path, table_name) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            rows_done = excluded.rows_done,
+            completed = excluded.completed,
+            updated_at = excluded.updated_at
+        """,
+        (source_path, table, content_hash, rows_done, int(completed)),
+    )
+
+
+def ingest_csv(conn, csv_path, table, key="id", chunk_rows=CHUNK_ROWS, force=False):
+    """
+    Stream a CSV file into a table in chunks, upserting on the key column.
+
+    - Only columns that exist in the table are loaded; CSV headers an
+      older schema names differently are mapped through COLUMN_ALIASES.
+    - key is the column to upsert on, or a sequence of candidates (the
+      first one the CSV provides is used).
+    - A file whose content hash matches a completed earlier load is skipped
+      (unless force=True).
+    - If an earlier load of the same content stopped part-way, the load
+      resumes after the last committed chunk.
+
+    Returns a dict with rows, seconds, rows_per_sec and skipped.
+    Raises FileNotFoundError if the CSV file does not exist, and
+    ValueError if the CSV does not fit the table (see map_columns; nothing
+    is loaded) or a row has a different number of fields than the header
+    (the chunks before it stay committed).
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)
+
+    create_ingest_log_table(conn)
+    source_path = os.path.abspath(csv_path)
+    content_hash = file_sha256(csv_path)
+
+    start_row = 0
+    log = _get_log(conn, source_path, table)
+    if log is not None and log[0] == content_hash and not force:
+        if log[2]:
+            return {"table": table, "rows": 0, "seconds": 0.0, "rows_per_sec": 0.0, "skipped": True}
+        start_row = log[1]
+
+    started = time.perf_counter()
+    loaded = 0
+    row_number = 0
+
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+
+        # Positions of the CSV columns that the table actually has
+        positions, columns, converters, key = map_columns(conn, csv_path, header, table, key)
+        fields = list(zip(positions, converters))
+
+        sql = build_upsert_sql(table, columns, key)
+        batch = []
+
+        def flush():
+            # One transaction per chunk: the rows and their checkpoint together
+            with conn:
+                conn.executemany(sql, batch)
+                _save_log(conn, source_path, table, content_hash, row_number, completed=False)
+            batch.clear()
+
+        for values in reader:
+            row_number += 1
+            if row_number <= start_row or not values:
+                continue
+            if len(values) != len(header):
+                raise ValueError(
+                    f"{csv_path} row {row_number} has {len(values)} fields, expected {len(header)}"
+                )
+            batch.append(tuple(
+                None if values[i] == "" else (convert(values[i]) if convert else values[i])
+                for i, convert in fields
+            ))
+            loaded += 1
+            if len(batch) >= chunk_rows:
+                flush()
+
+        if batch:
+            flush()
+
+    with conn:
+        _save_log(conn, source_path, table, content_hash, row_number, completed=True)
+
+    seconds = time.perf_counter() - started
+    return {
+        "table": table,
+        "rows": loaded,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(loaded / seconds, 1) if seconds > 0 else 0.0,
+        "skipped": False,
+    }
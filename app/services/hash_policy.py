@@ -0,0 +1,115 @@
+import math
+import os
+import re
+import threading
+import time
+
+import bcrypt
+
+from app.data.settings import get_setting, set_setting
+
+# Settings key under which the chosen bcrypt cost is stored
+COST_SETTING = "bcrypt_cost"
+
+# Environment variable that overrides calibration (e.g. BCRYPT_ROUNDS=12)
+COST_ENV = "BCRYPT_ROUNDS"
+
+# One bcrypt check should take about this long on the host
+TARGET_MS = 250.0
+
+# Never go below MIN_COST, whatever the hardware; MAX_COST caps calibration
+MIN_COST = 10
+MAX_COST = 16
+
+_BCRYPT_COST = re.compile(r"^\$2[abxy]?\$(\d\d)\$")
+
+_cost = None
+_lock = threading.Lock()
+
+
+def hash_cost(password_hash):
+    """
+    The work factor of a bcrypt hash ('$2b$12$...' -> 12), or None if the
+    value is not a bcrypt hash.
+    """
+    match = _BCRYPT_COST.match(password_hash or "")
+    return int(match.group(1)) if match else None
+
+
+def calibrate_cost(target_ms=TARGET_MS, min_cost=MIN_COST, max_cost=MAX_COST):
+    """
+    Pick the highest bcrypt cost whose hash time stays within target_ms.
+
+    Times one hash at min_cost (best of two) and extrapolates: every extra
+    cost step doubles the work.
+    """
+    password = b"calibration-password"
+    best = None
+    for _ in range(2):
+        started = time.perf_counter()
+        bcrypt.hashpw(password, bcrypt.gensalt(rounds=min_cost))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        best = elapsed_ms if best is None else min(best, elapsed_ms)
+
+    if best <= 0:
+        return max_cost
+    steps = math.floor(math.log2(target_ms / best)) if best < target_ms else 0
+    return max(min_cost, min(max_cost, min_cost + steps))
+
+
+def load_policy(conn=None, target_ms=TARGET_MS):
+    """
+    Decide the bcrypt cost for this process and return it.
+
+    Order: the BCRYPT_ROUNDS environment variable, then the cost stored in
+    the settings table, then a fresh calibration (which is stored when a
+    connection is given, so every worker uses the same cost).
+    """
+    global _cost
+
+    env_value = os.environ.get(COST_ENV)
+    if env_value:
+        cost = int(env_value)
+    else:
+        stored = get_setting(conn, COST_SETTING) if conn is not None else None
+        if stored is not None:
+            cost = int(stored)
+        else:
+            cost = calibrate_cost(target_ms)
+            if conn is not None:
+                set_setting(conn, COST_SETTING, cost)
+
+    with _lock:
+        _cost = cost
+    return cost
+
+
+def recalibrate(conn, target_ms=TARGET_MS):
+    """Re-measure the host and store the new cost (e.g. after a hardware change)."""
+    global _cost
+
+    cost = calibrate_cost(target_ms)
+    set_setting(conn, COST_SETTING, cost)
+    with _lock:
+        _cost = cost
+    return cost
+
+
+def current_cost():
+    """
+    The bcrypt cost new hashes should use. Loads the policy (without a
+    database) on first use if load_policy() has not run yet.
+    """
+    cost = _cost
+    return cost if cost is not None else load_policy()
+
+
+def needs_rehash(password_hash, cost=None):
+    """
+    True if a bcrypt hash was made with a different cost than the policy's.
+    Non-bcrypt values are left alone here.
+    """
+    stored = hash_cost(password_hash)
+    if stored is None:
+        return False
+    return stored != (cost if cost is not None else current_cost())
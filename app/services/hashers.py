@@ -0,0 +1,272 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from app.services.hash_policy import current_cost, hash_cost, needs_rehash
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _parse_params(text: str, required=()) -> dict:
+    """
+    'n=16384,r=8,p=1' -> {'n': 16384, 'r': 8, 'p': 1}
+    Raises ValueError if a value is not an integer or a required name is
+    missing, so a malformed stored hash fails verification cleanly.
+    """
+    params = {}
+    for part in text.split(","):
+        name, _, value = part.partition("=")
+        params[name] = int(value)
+    missing = [name for name in required if name not in params]
+    if missing:
+        raise ValueError(f"Hash parameters missing: {', '.join(missing)}")
+    return params
+
+
+class BcryptHasher:
+    """bcrypt ($2b$NN$...). The cost comes from the hashing policy."""
+
+    name = "bcrypt"
+
+    def __init__(self, cost: int | None = None):
+        self.__cost = cost
+
+    def get_cost(self) -> int:
+        return self.__cost if self.__cost is not None else current_cost()
+
+    def identify(self, stored_hash: str) -> bool:
+        return hash_cost(stored_hash) is not None
+
+    def hash_password(self, plain_password: str, cost: int | None = None) -> str:
+        salt = bcrypt.gensalt(rounds=cost if cost is not None else self.get_cost())
+        return bcrypt.hashpw(plain_password.encode("utf-8"), salt).decode("utf-8")
+
+    def check_password(self, plain_password: str, stored_hash: str) -> bool:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), stored_hash.encode("utf-8"))
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return needs_rehash(stored_hash, self.get_cost())
+
+
+class ScryptHasher:
+    """hashlib.scrypt, stored as $scrypt$n=..,r=..,p=..$salt$hash."""
+
+    name = "scrypt"
+    prefix = "$scrypt$"
+
+    def __init__(self, n: int = 2**14, r: int = 8, p: int = 1, dklen: int = 32):
+        self.__params = {"n": n, "r": r, "p": p}
+        self.__dklen = dklen
+
+    def identify(self, stored_hash: str) -> bool:
+        return stored_hash.startswith(self.prefix)
+
+    def _derive(self, plain_password, salt, params, dklen):
+        n, r, p = params["n"], params["r"], params["p"]
+        return hashlib.scrypt(
+            plain_password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+            maxmem=128 * n * r * 2, dklen=dklen,
+        )
+
+    def hash_password(self, plain_password: str) -> str:
+        salt = os.urandom(16)
+        key = self._derive(plain_password, salt, self.__params, self.__dklen)
+        params = ",".join(f"{k}={v}" for k, v in self.__params.items())
+        return f"{self.prefix}{params}${_b64encode(salt)}${_b64encode(key)}"
+
+    def check_password(self, plain_password: str, stored_hash: str) -> bool:
+        _, _, params, salt, key = stored_hash.split("$")
+        expected = _b64decode(key)
+        actual = self._derive(
+            plain_password, _b64decode(salt), _parse_params(params, ("n", "r", "p")), len(expected)
+        )
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        try:
+            return _parse_params(stored_hash.split("$")[2]) != self.__params
+        except (IndexError, ValueError):
+            return True
+
+
+class Pbkdf2Hasher:
+    """
+    hashlib.pbkdf2_hmac, stored as $pbkdf2-sha256$i=..$salt$hash.
+
+    Stands in for argon2, which hashlib does not provide; the parameter
+    string follows the same PHC layout, so a real argon2 hasher can be
+    registered next to it later.
+    """
+
+    name = "pbkdf2"
+    prefix = "$pbkdf2-sha256$"
+
+    def __init__(self, iterations: int = 600_000):
+        self.__iterations = iterations
+
+    def identify(self, stored_hash: str) -> bool:
+        return stored_hash.startswith(self.prefix)
+
+    def hash_password(self, plain_password: str) -> str:
+        salt = os.urandom(16)
+        key = hashlib.pbkdf2_hmac("sha256", plain_password.encode("utf-8"), salt, self.__iterations)
+        return f"{self.prefix}i={self.__iterations}${_b64encode(salt)}${_b64encode(key)}"
+
+    def check_password(self, plain_password: str, stored_hash: str) -> bool:
+        _, _, params, salt, key = stored_hash.split("$")
+        expected = _b64decode(key)
+        actual = hashlib.pbkdf2_hmac(
+            "sha256", plain_password.encode("utf-8"), _b64decode(salt),
+            _parse_params(params, ("i",))["i"], len(expected),
+        )
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        try:
+            return _parse_params(stored_hash.split("$")[2], ("i",))["i"] != self.__iterations
+        except (IndexError, ValueError):
+            # Unreadable parameters: write a fresh hash
+            return True
+
+
+class LegacySha256Hasher:
+    """
+    Unsalted SHA-256 hex digests written by the old SimpleHasher.
+    Verify-only: such hashes are always replaced on the next login.
+    """
+
+    name = "sha256"
+    verify_only = True
+
+    _HEX64 = re.compile(r"^[0-9a-f]{64}$")
+
+    def identify(self, stored_hash: str) -> bool:
+        return bool(self._HEX64.match(stored_hash))
+
+    def hash_password(self, plain_password: str) -> str:
+        raise ValueError("Legacy SHA-256 hashes can only be verified, not created")
+
+    def check_password(self, plain_password: str, stored_hash: str) -> bool:
+        digest = hashlib.sha256(plain_password.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(digest, stored_hash)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return True
+
+
+class HasherRegistry:
+    """
+    Picks the hasher for a stored hash from its prefix, so callers never
+    need to know which scheme a user's row was written with.
+
+    New hashes use the default scheme unless another one is asked for
+    (e.g. a cheaper scheme for service accounts). Rehashing keeps a hash's
+    own scheme, so such accounts stay on it; only verify-only (legacy)
+    hashes move to the default.
+    """
+
+    def __init__(self, hashers: list, default: str = "bcrypt"):
+        self.__hashers = {hasher.name: hasher for hasher in hashers}
+        if default not in self.__hashers:
+            raise ValueError(f"Unknown default hasher: {default}")
+        self.__default = default
+
+    def get_hasher(self, name: str | None = None):
+        return self.__hashers[name or self.__default]
+
+    def identify(self, stored_hash: str):
+        """The hasher that wrote stored_hash, or None if no scheme matches."""
+        for hasher in self.__hashers.values():
+            if stored_hash and hasher.identify(stored_hash):
+                return hasher
+        return None
+
+    def hash_password(self, plain_password: str, scheme: str | None = None) -> str:
+        return self.get_hasher(scheme).hash_password(plain_password)
+
+    def check_password(self, plain_password: str, stored_hash: str) -> bool:
+        hasher = self.identify(stored_hash)
+        if hasher is None:
+            return False
+        try:
+            return hasher.check_password(plain_password, stored_hash)
+        except ValueError:
+            # Malformed hash for its scheme
+            return False
+
+    def needs_rehash(self, stored_hash: str, scheme: str | None = None) -> bool:
+        """
+        True if the hash is legacy / unknown or its scheme's parameters are
+        out of date. With scheme given, a hash of any other scheme is also
+        reported (for moving accounts to that scheme on purpose).
+        """
+        hasher = self.identify(stored_hash)
+        if hasher is None:
+            return True
+        if scheme is not None and hasher.name != scheme:
+            return True
+        return hasher.needs_rehash(stored_hash)
+
+    def rehash_scheme(self, stored_hash: str) -> str:
+        """The scheme a replacement for stored_hash is written with."""
+        hasher = self.identify(stored_hash)
+        if hasher is None or getattr(hasher, "verify_only", False):
+            return self.__default
+        return hasher.name
+
+    def rehash(self, plain_password: str, stored_hash: str) -> str:
+        """A fresh hash of plain_password in the scheme rehash_scheme() picks."""
+        return self.hash_password(plain_password, self.rehash_scheme(stored_hash))
+
+    def verify_many(self, pairs, workers: int | None = None) -> list[bool]:
+        """
+        Check many (plain_password, stored_hash) pairs, in parallel threads
+        (bcrypt, scrypt and pbkdf2 all release the GIL).
+        Results are in the same order as pairs.
+        """
+        pairs = list(pairs)
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(pairs) <= 1:
+            return [self.check_password(plain, stored) for plain, stored in pairs]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda pair: self.check_password(*pair), pairs))
+
+
+_registry = None
+
+
+def get_registry() -> HasherRegistry:
+    """The shared registry: bcrypt by default, scrypt/pbkdf2, legacy SHA-256."""
+    global _registry
+    if _registry is None:
+        _registry = HasherRegistry(
+            [BcryptHasher(), ScryptHasher(), Pbkdf2Hasher(), LegacySha256Hasher()]
+        )
+    return _registry
+
+
+def hash_password(plain_password: str, cost: int | None = None) -> str:
+    """
+    Hash a password using bcrypt.
+    cost defaults to the work factor chosen by the hashing policy.
+    """
+    return get_registry().get_hasher("bcrypt").hash_password(plain_password, cost)
+
+
+def verify_password(plain_password: str, stored_hash: str) -> bool:
+    """
+    Check a plaintext password against a stored hash.
+    The scheme (bcrypt, scrypt, pbkdf2, legacy SHA-256) is read from the hash.
+    """
+    return get_registry().check_password(plain_password, stored_hash)
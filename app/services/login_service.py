@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.data.db import release_thread_connections
+
+# Completed checks between two metrics lines in the log
+METRICS_LOG_EVERY = 100
+
+# record() calls between two sweeps of expired throttle keys
+THROTTLE_SWEEP_EVERY = 256
+
+logger = logging.getLogger(__name__)
+
+
+class LoginThrottle:
+    """
+    Sliding-window attempt limiter.
+
+    A key (username or IP address) that reaches max_attempts within
+    window_seconds is blocked until its oldest attempt leaves the window.
+    Keys whose attempts have all expired are swept out every
+    THROTTLE_SWEEP_EVERY records, so random usernames cannot grow it forever.
+    """
+
+    def __init__(self, max_attempts: int, window_seconds: float):
+        self.__max_attempts = max_attempts
+        self.__window = window_seconds
+        self.__attempts = {}
+        self.__records = 0
+        self.__lock = threading.Lock()
+
+    def _prune(self, key, now):
+        attempts = self.__attempts.get(key)
+        if attempts is None:
+            return None
+        while attempts and now - attempts[0] > self.__window:
+            attempts.popleft()
+        if not attempts:
+            del self.__attempts[key]
+            return None
+        return attempts
+
+    def retry_after(self, key) -> float:
+        """Seconds until the key may try again (0 if it is allowed now)."""
+        now = time.monotonic()
+        with self.__lock:
+            attempts = self._prune(key, now)
+            if attempts is None or len(attempts) < self.__max_attempts:
+                return 0.0
+            return max(0.0, self.__window - (now - attempts[0]))
+
+    def record(self, key) -> None:
+        now = time.monotonic()
+        with self.__lock:
+            self.__attempts.setdefault(key, deque()).append(now)
+            self.__records += 1
+            if self.__records % THROTTLE_SWEEP_EVERY == 0:
+                for old_key in list(self.__attempts):
+                    self._prune(old_key, now)
+
+    def __len__(self) -> int:
+        return len(self.__attempts)
+
+    def reset(self, key) -> None:
+        with self.__lock:
+            self.__attempts.pop(key, None)
+
+
+class LoginService:
+    """
+    Runs password checks on a worker pool, away from the Streamlit script thread.
+
+    - lookup(username) returns (password_hash, role) or None; it runs on the
+      calling thread because it is a cheap indexed SELECT.
+    - check_password(plain, password_hash) is the expensive bcrypt call and
+      runs on one of the workers.
+    - At most max_pending checks may be queued or running. A login waits up
+      to queue_wait seconds for a free slot and is then rejected as busy
+      instead of queueing behind the storm.
+    - Failed logins per username and all attempts per IP are throttled
+      (the IP limit only applies when the caller knows the address).
+    - on_success(username, plain, password_hash), if given, runs on the
+      worker after a successful check (used for rehash-on-login); an
+      error in it is logged and does not fail the login.
+    - metrics() is written to the log every METRICS_LOG_EVERY checks.
+    """
+
+    def __init__(
+        self,
+        lookup,
+        check_password,
+        workers: int | None = None,
+        max_pending: int = 64,
+        queue_wait: float = 1.0,
+        user_limit: tuple[int, float] = (5, 300.0),
+        ip_limit: tuple[int, float] = (30, 60.0),
+        on_success=None,
+    ):
+        self.__lookup = lookup
+        self.__check_password = check_password
+        self.__on_success = on_success
+        self.__pool = ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 2, thread_name_prefix="login"
+        )
+        self.__slots = threading.BoundedSemaphore(max_pending)
+        self.__queue_wait = queue_wait
+        self.__user_throttle = LoginThrottle(*user_limit)
+        self.__ip_throttle = LoginThrottle(*ip_limit)
+
+        self.__lock = threading.Lock()
+        self.__latencies = deque(maxlen=1000)
+        self.__pending = 0
+        self.__finished = 0
+        self.__counts = {"ok": 0, "failed": 0, "throttled": 0, "rejected": 0}
+
+    # ---- Login ----
+    def submit(self, username: str, plain_password: str, ip: str | None = None) -> Future:
+        """
+        Queue a login check. The future resolves to (ok, role, message).
+        ip is the client address, or None if it isn't known (no IP limit).
+        """
+        started = time.perf_counter()
+
+        wait = self.__user_throttle.retry_after(username)
+        if ip is not None:
+            wait = max(wait, self.__ip_throttle.retry_after(ip))
+        if wait > 0:
+            self._count("throttled")
+            return self._done((False, None, f"Too many attempts. Try again in {int(wait) + 1}s."))
+        if ip is not None:
+            self.__ip_throttle.record(ip)
+
+        if not self.__slots.acquire(timeout=self.__queue_wait):
+            self._count("rejected")
+            return self._done((False, None, "Login service is busy. Please try again."))
+
+        try:
+            row = self.__lookup(username)
+            future = self.__pool.submit(self._run_check, username, plain_password, row)
+        except BaseException:
+            # Lookup error or shut-down pool: give the slot back
+            self.__slots.release()
+            raise
+        with self.__lock:
+            self.__pending += 1
+        future.add_done_callback(lambda _: self._finish(started))
+        return future
+
+    def verify(self, username: str, plain_password: str, ip: str | None = None, timeout: float = 30.0):
+        """
+        Blocking helper: returns (ok, role, message).
+        """
+        return self.submit(username, plain_password, ip).result(timeout=timeout)
+
+    def _run_check(self, username, plain_password, row):
+        try:
+            return self._check(username, plain_password, row)
+        finally:
+            # The worker outlives this login: hand back any connection
+            # on_success (or check_password) checked out
+            release_thread_connections()
+
+    def _check(self, username, plain_password, row):
+        if row is None:
+            self.__user_throttle.record(username)
+            self._count("failed")
+            return False, None, "Invalid username or password."
+
+        password_hash, role = row
+        if not self.__check_password(plain_password, password_hash):
+            self.__user_throttle.record(username)
+            self._count("failed")
+            return False, None, "Invalid username or password."
+
+        self.__user_throttle.reset(username)
+        self._count("ok")
+        if self.__on_success is not None:
+            try:
+                self.__on_success(username, plain_password, password_hash)
+            except Exception:
+                logger.exception("on_success failed after a good login for %s", username)
+        return True, role, ""
+
+    def _finish(self, started):
+        with self.__lock:
+            self.__pending -= 1
+            self.__latencies.append(time.perf_counter() - started)
+            self.__finished += 1
+            log_now = self.__finished % METRICS_LOG_EVERY == 0
+        self.__slots.release()
+        if log_now:
+            logger.info("Login metrics: %s", self.metrics())
+
+    def _count(self, name):
+        with self.__lock:
+            self.__counts[name] += 1
+
+    @staticmethod
+    def _done(result) -> Future:
+        future = Future()
+        future.set_result(result)
+        return future
+
+    # ---- Monitoring ----
+    def metrics(self) -> dict:
+        """Queue depth, outcome counts and latency percentiles (ms)."""
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+            result = dict(self.__counts)
+            result["queue_depth"] = self.__pending
+
+        for name, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            if latencies:
+                index = min(len(latencies) - 1, int(q * len(latencies)))
+                result[name] = round(latencies[index] * 1000, 1)
+            else:
+                result[name] = None
+        return result
+
+    def shutdown(self) -> None:
+        self.__pool.shutdown(wait=False)
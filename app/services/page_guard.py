@@ -0,0 +1,85 @@
+import streamlit as st
+
+from app.data.db import DB_PATH
+from app.services.session_store import SessionStore
+
+
+@st.cache_resource
+def get_session_store():
+    """
+    One session store per server process; roles are re-checked against the
+    main database's users table.
+    """
+    return SessionStore(db_path=DB_PATH)
+
+
+def _remember_user(user, token):
+    # The older pages and home.py still read these keys
+    st.session_state.session_token = token
+    st.session_state.user = user
+    st.session_state.logged_in = True
+    st.session_state.username = user.get_username()
+    st.session_state.role = user.get_role()
+
+
+def start_session(username: str, role: str):
+    """
+    Log a user in: create a session and keep its token in session_state.
+
+    The token never goes into the URL, where it would end up in the
+    browser history, Referer headers and proxy logs. Streamlit cannot set
+    an HttpOnly cookie, so a reload or a server restart means logging in
+    again.
+    """
+    token = get_session_store().create(username, role or "user")
+    user = get_session_store().get(token)
+    _remember_user(user, token)
+    return user
+
+
+def current_user():
+    """
+    The logged-in User, or None.
+
+    The User is re-resolved from the session store on every call, so a
+    revoked session, an expired one or a changed role takes effect on the
+    next rerun.
+    """
+    token = st.session_state.get("session_token")
+    if token is None:
+        return None
+
+    user = get_session_store().get(token)
+    if user is None:
+        st.session_state.pop("session_token", None)
+        st.session_state.logged_in = False
+        return None
+
+    if st.session_state.get("user") is not user:
+        _remember_user(user, token)
+    return user
+
+
+def logout():
+    """End the session and forget it in this browser tab."""
+    token = st.session_state.pop("session_token", None)
+    if token is not None:
+        get_session_store().revoke(token)
+    st.session_state.pop("user", None)
+    st.session_state.logged_in = False
+    st.session_state.username = ""
+    st.session_state.role = "user"
+
+
+def require_login():
+    """
+    Page guard: return the logged-in User, or show a message with a way
+    back to the login page and stop.
+    """
+    user = current_user()
+    if user is None:
+        st.error("You must be logged in to view this page.")
+        if st.button("Go to login page"):
+            st.switch_page("home.py")
+        st.stop()
+    return user
@@ -0,0 +1,70 @@
+from app.data.db import DB_PATH, connect_database
+from app.data.search_index import search
+from app.services.chat_history import count_tokens
+
+# Tables searched for each assistant domain
+DOMAIN_SOURCES = {
+    "Cybersecurity": ["cyber_incidents"],
+    "Data Science": ["datasets_metadata"],
+    "IT Operations": ["it_tickets"],
+}
+
+TOP_K = 5
+
+# Most tokens the injected records may use
+CONTEXT_TOKENS = 800
+
+# Characters kept from each field of a record
+FIELD_CHARS = 240
+
+SKIP_COLUMNS = {"score", "created_at"}
+
+
+def record_line(table, row) -> str:
+    """'[cyber_incidents #12] severity=High | status=Open | description=...'"""
+    parts = []
+    for name, value in row.items():
+        if name in SKIP_COLUMNS or name == "id" or value is None or value == "":
+            continue
+        text = " ".join(str(value).split())
+        if len(text) > FIELD_CHARS:
+            text = text[: FIELD_CHARS - 3] + "..."
+        parts.append(f"{name}={text}")
+    return f"[{table} #{row['id']}] " + " | ".join(parts)
+
+
+class Retriever:
+    """
+    Finds platform records relevant to a question with the local FTS5
+    index and formats the best ones as prompt context within a token budget.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, k: int = TOP_K, budget_tokens: int = CONTEXT_TOKENS):
+        self.__db_path = db_path
+        self.__k = k
+        self.__budget_tokens = budget_tokens
+
+    def retrieve(self, question: str, domain: str) -> list[tuple[str, dict]]:
+        """(table, row) pairs for the domain's tables, best bm25 score first."""
+        conn = connect_database(self.__db_path, read_only=True)
+        hits = []
+        for table in DOMAIN_SOURCES.get(domain, []):
+            hits.extend((table, row) for row in search(conn, table, question, limit=self.__k))
+        hits.sort(key=lambda hit: hit[1]["score"])
+        return hits[: self.__k]
+
+    def context_for(self, question: str, domain: str) -> str:
+        """
+        Matching records as one text block, stopping before the token
+        budget is exceeded. '' if nothing matches.
+        """
+        lines = []
+        used = 0
+        for table, row in self.retrieve(question, domain):
+            line = record_line(table, row)
+            tokens = count_tokens(line) + 1
+            if used + tokens > self.__budget_tokens:
+                break
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines)
@@ -0,0 +1,141 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from app.data.cache import get_table_version
+from app.data.db import connect_database
+from app.data.users import get_user_by_username
+from models.user import User
+
+# Sessions last this long after login
+SESSION_TTL = 60 * 60
+
+# Sessions kept in memory; the least recently used ones are dropped first
+MAX_SESSIONS = 1024
+
+
+def sign_token(session_id: str, secret: str) -> str:
+    """'<session_id>.<hmac>' so a token cannot be guessed or altered."""
+    mac = hmac.new(secret.encode("utf-8"), session_id.encode("utf-8"), hashlib.sha256)
+    return f"{session_id}.{mac.hexdigest()}"
+
+
+def unsign_token(token: str, secret: str):
+    """The session id of a correctly signed token, otherwise None."""
+    session_id, _, _ = (token or "").partition(".")
+    if not session_id or not hmac.compare_digest(sign_token(session_id, secret), token):
+        return None
+    return session_id
+
+
+class SessionStore:
+    """
+    Server-side sessions resolved from signed tokens.
+
+    Sessions live only in this process, in an LRU dict with a TTL; the
+    token is only ever held in the tab's session_state, which does not
+    survive a reload or a restart either, so nothing is persisted. Expired
+    sessions are purged whenever a new one is created. With a db_path the
+    cached User is checked against the users table whenever its version
+    counter moves: a changed role is picked up and a deleted user's
+    session ends.
+    """
+
+    def __init__(self, secret: str | None = None, ttl: float = SESSION_TTL,
+                 max_entries: int = MAX_SESSIONS, db_path: str | None = None):
+        # A fresh secret per process is enough: tokens never outlive it
+        self.__secret = secret or secrets.token_hex(32)
+        self.__ttl = ttl
+        self.__max_entries = max_entries
+        self.__db_path = db_path
+        self.__sessions = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def _remember(self, session_id, user, expires_at, users_version=None):
+        with self.__lock:
+            self.__sessions[session_id] = (expires_at, user, users_version)
+            self.__sessions.move_to_end(session_id)
+            while len(self.__sessions) > self.__max_entries:
+                self.__sessions.popitem(last=False)
+
+    def _recall(self, session_id):
+        with self.__lock:
+            entry = self.__sessions.get(session_id)
+            if entry is None:
+                return None
+            self.__sessions.move_to_end(session_id)
+            return entry
+
+    def _refresh(self, session_id, entry):
+        """
+        The entry with the user's current role, or None if the user is gone.
+        Only reads the users row when the users table changed since the
+        entry was cached (or when the table has no version counter).
+        """
+        expires_at, user, users_version = entry
+        if self.__db_path is None:
+            return entry
+        conn = connect_database(self.__db_path)
+        version = get_table_version(conn, "users")
+        if version is not None and version == users_version:
+            return entry
+
+        row = get_user_by_username(conn, user.get_username())
+        if row is None:
+            return None
+        if row[3] != user.get_role():
+            user = User(row[1], "", row[3])
+        entry = (expires_at, user, version)
+        self._remember(session_id, user, expires_at, version)
+        return entry
+
+    # ---- Sessions ----
+    def create(self, username: str, role: str) -> str:
+        """Start a session and return its signed token."""
+        self.purge_expired()
+        session_id = secrets.token_urlsafe(24)
+        expires_at = time.time() + self.__ttl
+        user = User(username, "", role)
+        self._remember(session_id, user, expires_at)
+        return sign_token(session_id, self.__secret)
+
+    def get(self, token: str):
+        """The User for a valid, unexpired token, otherwise None."""
+        session_id = unsign_token(token, self.__secret)
+        if session_id is None:
+            return None
+
+        entry = self._recall(session_id)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            self.revoke(token)
+            return None
+        entry = self._refresh(session_id, entry)
+        if entry is None:
+            self.revoke(token)
+            return None
+        return entry[1]
+
+    def revoke(self, token: str) -> None:
+        """End a session (logout)."""
+        session_id = unsign_token(token, self.__secret)
+        if session_id is None:
+            return
+        with self.__lock:
+            self.__sessions.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        """Drop expired sessions. Returns how many were dropped."""
+        now = time.time()
+        with self.__lock:
+            expired = [s for s, (exp, _, _) in self.__sessions.items() if exp < now]
+            for session_id in expired:
+                del self.__sessions[session_id]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self.__sessions)
@@ -0,0 +1,84 @@
+import streamlit as st
+
+from app.data.pagination import DEFAULT_PAGE_SIZE, PAGE_SIZES, count_rows, fetch_page
+
+
+def _go_next(key: str, cursor: int) -> None:
+    st.session_state[key]["cursors"].append(cursor)
+
+
+def _go_prev(key: str) -> None:
+    if st.session_state[key]["cursors"]:
+        st.session_state[key]["cursors"].pop()
+
+
+def render_paged_table(
+    key: str,
+    conn,
+    query,
+    to_display=None,
+    descending: bool = True,
+    empty_message: str = "No rows found.",
+) -> None:
+    """
+    Show one page of a query as a table with page-size and prev/next controls.
+
+    Only the current page is fetched and sent to the browser. The cursor
+    stack lives in st.session_state[key] and is reset whenever the filters
+    (the query's WHERE clause) or the page size change, and when a later
+    page turns out to be empty.
+    to_display can turn the page's rows into the DataFrame to show.
+    """
+    signature = repr(query.where_sql())
+
+    if key not in st.session_state or st.session_state[key]["signature"] != signature:
+        st.session_state[key] = {"signature": signature, "cursors": [], "page_size": DEFAULT_PAGE_SIZE}
+    state = st.session_state[key]
+
+    page_size = st.selectbox(
+        "Rows per page",
+        PAGE_SIZES,
+        index=PAGE_SIZES.index(state["page_size"]) if state["page_size"] in PAGE_SIZES else 0,
+        key=f"{key}_page_size",
+    )
+    if page_size != state["page_size"]:
+        state["page_size"] = page_size
+        state["cursors"] = []
+
+    after_id = state["cursors"][-1] if state["cursors"] else None
+    page = fetch_page(conn, query, after_id=after_id, page_size=page_size, descending=descending)
+    if len(page) == 0 and state["cursors"]:
+        # The rows of this page are gone (e.g. deleted): back to the first page
+        state["cursors"] = []
+        page = fetch_page(conn, query, after_id=None, page_size=page_size, descending=descending)
+
+    if len(page) == 0:
+        st.info(empty_message)
+        return
+
+    rows = page.get_rows()
+    st.dataframe(to_display(rows) if to_display else rows, use_container_width=True)
+
+    total, is_estimate = count_rows(conn, query)
+    start = len(state["cursors"]) * page_size + 1
+    st.caption(
+        "Rows {}–{} of {}{}".format(start, start + len(page) - 1, "~" if is_estimate else "", total)
+    )
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        st.button(
+            "◀ Previous",
+            key=f"{key}_prev",
+            disabled=not state["cursors"],
+            on_click=_go_prev,
+            args=(key,),
+        )
+    with next_col:
+        st.button(
+            "Next ▶",
+            key=f"{key}_next",
+            disabled=not page.has_next(),
+            on_click=_go_next,
+            args=(key, page.last_id()),
+        )
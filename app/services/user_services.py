@@ -1,25 +1,26 @@
 # app/services/user_service.py
-import sqlite3
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from app.data.users import hash_password
+from app.services.hashers import hash_password
 
+# Progress is reported every this many hashed passwords
+PROGRESS_EVERY = 100
 
-def migrate_users_from_file(conn, filepath="DATA/users.txt"):
-    """
-    Read users from users.txt and insert them into the users table.
 
-    Supports lines like:
-    username,plain_password
-    or
-    username,password_hash,role
-    """
-    if not os.path.exists(filepath):
-        print("users.txt not found at {}. No users migrated.".format(filepath))
-        return 0
+def print_progress(done, total, hashes_per_sec):
+    """Default progress reporter for migrate_users_from_file."""
+    print("Hashed {}/{} passwords ({:.1f}/sec)".format(done, total, hashes_per_sec))
 
-    migrated = 0
-    cur = conn.cursor()
+
+def _read_user_lines(filepath):
+    """
+    Parse users.txt into (username, password_or_hash, role) tuples.
+    The first line for a username wins, like the old one-by-one INSERTs.
+    """
+    users = []
+    seen = set()
 
     with open(filepath, "r", encoding="utf-8") as f:
         lines = f.readlines()
@@ -44,25 +45,79 @@ def migrate_users_from_file(conn, filepath="DATA/users.txt"):
         if len(parts) >= 3:
             role = parts[2].strip() or "user"
 
-        # If second part looks like a bcrypt hash (starts with $2),
-        # use it directly, otherwise treat as plain password.
-        if second.startswith("$2"):
-            password_hash = second
-        else:
-            password_hash = hash_password(second)
-
-        try:
-            cur.execute(
-                """
-                INSERT INTO users (username, password_hash, role)
-                VALUES (?, ?, ?)
-                """,
-                (username, password_hash, role),
-            )
-            migrated += 1
-        except sqlite3.IntegrityError:
-            # Username already exists, skip
+        if username in seen:
             continue
+        seen.add(username)
+        users.append((username, second, role))
+
+    return users
+
+
+def migrate_users_from_file(conn, filepath="DATA/users.txt", workers=1, progress=None):
+    """
+    Read users from users.txt and insert them into the users table.
+
+    Supports lines like:
+    username,plain_password
+    or
+    username,password_hash,role
+
+    Lines whose second value already is a bcrypt hash (starts with $2) are
+    stored as-is. Plain passwords are hashed; with workers > 1 the hashing
+    runs in a thread pool (bcrypt releases the GIL, so threads use all
+    cores). Users already in the table are skipped before hashing, and all
+    rows are inserted with one executemany in a single transaction.
+    progress(done, total, hashes_per_sec) is called while hashing.
+
+    Returns the number of users inserted.
+    """
+    if not os.path.exists(filepath):
+        print("users.txt not found at {}. No users migrated.".format(filepath))
+        return 0
+
+    cur = conn.cursor()
+    cur.execute("SELECT username FROM users")
+    existing = {row[0] for row in cur.fetchall()}
+
+    users = [u for u in _read_user_lines(filepath) if u[0] not in existing]
+    if not users:
+        return 0
+
+    # Index of every user whose password still needs hashing
+    to_hash = [i for i, (_, second, _) in enumerate(users) if not second.startswith("$2")]
+    hashes = {}
+    started = time.perf_counter()
+
+    def report(done):
+        if progress is not None and (done % PROGRESS_EVERY == 0 or done == len(to_hash)):
+            elapsed = time.perf_counter() - started
+            progress(done, len(to_hash), done / elapsed if elapsed > 0 else 0.0)
+
+    if workers > 1 and len(to_hash) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(hash_password, users[i][1]): i for i in to_hash}
+            for done, future in enumerate(as_completed(futures), start=1):
+                hashes[futures[future]] = future.result()
+                report(done)
+    else:
+        for done, i in enumerate(to_hash, start=1):
+            hashes[i] = hash_password(users[i][1])
+            report(done)
+
+    rows = [
+        (username, hashes.get(i, second), role)
+        for i, (username, second, role) in enumerate(users)
+    ]
 
-    conn.commit()
-    return migrated
+    with conn:
+        # OR IGNORE: a username registered meanwhile is skipped, like before
+        cur = conn.executemany(
+            """
+            INSERT OR IGNORE INTO users (username, password_hash, role)
+            VALUES (?, ?, ?)
+            """,
+            rows,
+        )
+    # rowcount counts the inserted users only (conn.total_changes would
+    # also count the table_versions update made by the users trigger)
+    return cur.rowcount
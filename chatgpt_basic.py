@@ -1,9 +1,9 @@
-from openai import OpenAI
+from app.services.ai_client import get_client
 
-#	Initialize	the	OpenAI	client	with	your	API	key
-client	= OpenAI(api_key='YOUR_API_KEY')
+#	Shared	OpenAI	client	(pooled	connections,	retries,	rate	limit)
+client	= get_client(api_key='YOUR_API_KEY')
 #	Make	a	simple	API	call
-completion	= client.chat.completions.create(
+completion	= client.create(
 				model="gpt-4o",
 				messages=[
 								{"role":	"system",	"content":	"You	are	a	helpful	assistant."},
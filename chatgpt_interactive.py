@@ -1,7 +1,7 @@
-from openai import OpenAI
+from app.services.ai_client import get_client
 
-# Initialize OpenAI client
-client = OpenAI(api_key="YOUR_API_KEY_HERE")
+# Shared OpenAI client (pooled connections, retries, rate limit)
+client = get_client(api_key="YOUR_API_KEY_HERE")
 
 # Initialize converstion history
 messages = [
@@ -24,7 +24,7 @@ while True:
     messages.append({"role": "user", "content": user_input})
 
     # Get AI response
-    completion = client.chat.completions.create(
+    completion = client.create(
         model="gpt-4o",
         messages=messages,
     )
@@ -1,8 +1,8 @@
 import streamlit as st
-from openai import OpenAI
+from app.services.ai_client import get_client
 
-# Initialize OpenAI clinet
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# Shared OpenAI client: created once per process, not on every rerun
+client = get_client(api_key=st.secrets["OPENAI_API_KEY"])
 
 st.title("🛡 Cybersecurity AI Assistant")
 
@@ -43,7 +43,7 @@ if prompt:
     )
 
     # call OpenAI API
-    completion = client.chat.completions.create(
+    completion = client.create(
         model="gpt-4o",
         messages=st.session_state.messages,
     )
@@ -1,8 +1,8 @@
 import streamlit as st
-from openai import OpenAI
+from app.services.ai_client import get_client
 
-# Create OpenAI client from Streamlit secrets
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# Shared OpenAI client from Streamlit secrets: created once per process, not on every rerun
+client = get_client(api_key=st.secrets["OPENAI_API_KEY"])
 
 # Basic page config
 st.set_page_config(
@@ -67,12 +67,11 @@ if prompt:
         {"role": "user", "content": prompt}
     )
 
-    # Call ChatGPT with streaming enabled
-    completion = client.chat.completions.create(
+    # Call ChatGPT with streaming enabled (yields text pieces)
+    completion = client.stream(
         model=model,
         messages=st.session_state.messages,
         temperature=temperature,
-        stream=True,  # important for streaming
     )
 
     # Stream the response chunk by chunk
@@ -81,11 +80,9 @@ if prompt:
     with st.chat_message("assistant"):
         container = st.empty()  # this will be updated repeatedly
 
-        for chunk in completion:
-            delta = chunk.choices[0].delta
-            if delta.content:
-                full_reply += delta.content
-                container.markdown(full_reply)
+        for delta in completion:
+            full_reply += delta
+            container.markdown(full_reply)
 
     # Store final reply in history
     st.session_state.messages.append(
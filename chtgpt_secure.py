@@ -1,4 +1,4 @@
-from openai import OpenAI
+from app.services.ai_client import get_client
 from dotenv import load_dotenv
 import os
 
@@ -14,7 +14,7 @@ if not api_key:
         "Make sure you created a .env file with OPENAI_API_KEY=..."
     )
 
-client = OpenAI(api_key=api_key)
+client = get_client(api_key=api_key)
 
 messages = [
     {"role": "system", "content": "You are a helpful assistant."}
@@ -32,7 +32,7 @@ while True:
 
     messages.append({"role": "user", "content": user_input})
 
-    completion = client.chat.completions.create(
+    completion = client.create(
         model="gpt-4o",
         messages=messages,
     )
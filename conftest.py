@@ -0,0 +1 @@
+# Lets pytest import the app/ and models/ packages from the repository root
@@ -1,7 +1,8 @@
 from pathlib import Path
 
-from app.data.db import connect_database
-from app.data.users import verify_password, insert_user
+from app.data.db import connect_database, get_pool
+from app.data.users import insert_user, rehash_if_needed
+from app.services.hashers import get_registry, verify_password
 
 
 class DatabaseManager:
@@ -12,38 +13,61 @@ class DatabaseManager:
 
     def __init__(self, db_path: str = "DATA/intelligence_platform.db"):
         self.db_path = Path(db_path)
-        self.conn = connect_database(str(self.db_path))
 
-    def verify_user(self, username: str, plain_password: str):
+    @property
+    def conn(self):
         """
-        Check username and password against the users table.
-        Returns (True, role) if correct, otherwise (False, None).
+        The calling thread's pooled connection.
+
+        The manager is cached with st.cache_resource and shared by every
+        script thread, so it must not hold on to one thread's connection.
+        """
+        return connect_database(str(self.db_path))
+
+    def get_credentials(self, username: str):
+        """
+        Look up a user's stored hash and role.
+        Returns (password_hash, role), or None if the user does not exist.
         """
         cur = self.conn.cursor()
         cur.execute(
             "SELECT password_hash, role FROM users WHERE username = ?",
             (username,),
         )
-        row = cur.fetchone()
+        return cur.fetchone()
+
+    def verify_user(self, username: str, plain_password: str):
+        """
+        Check username and password against the users table.
+        Returns (True, role) if correct, otherwise (False, None).
+        """
+        row = self.get_credentials(username)
         if row is None:
             return False, None
 
         password_hash, role = row
 
         if verify_password(plain_password, password_hash):
+            self.rehash_if_needed(username, plain_password, password_hash)
             return True, role
 
         return False, None
 
+    def rehash_if_needed(self, username: str, plain_password: str, password_hash: str):
+        """
+        Upgrade a legacy or out-of-date stored hash after a good login
+        (bcrypt to the current cost; scrypt/pbkdf2 keep their scheme).
+        Returns True if it was replaced.
+        """
+        return rehash_if_needed(self.conn, get_registry(), username, plain_password, password_hash)
+
     def register_user(self, username: str, plain_password: str, role: str = "user"):
         """
         Register a new user in the database.
         Returns True if created, False if the username already exists.
         """
-        return insert_user(self.conn, username, plain_password, role)
+        return insert_user(self.conn, get_registry(), username, plain_password, role)
 
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Give the calling thread's connection back to the pool."""
+        get_pool(str(self.db_path)).release_current()
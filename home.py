@@ -1,4 +1,10 @@
+import os
+
 import streamlit as st
+from app.services.hashers import verify_password
+from app.services.hash_policy import load_policy
+from app.services.login_service import LoginService
+from app.services.page_guard import current_user, start_session
 from database import DatabaseManager
 
 st.set_page_config(
@@ -23,13 +29,74 @@ def get_db():
     return DatabaseManager("DATA/intelligence_platform.db")
 
 
+@st.cache_resource
+def get_login_service():
+    # Shared by every session: bcrypt runs on its worker pool, not here
+    db = get_db()
+    load_policy(db.conn)
+
+    # Runs on a login worker, which releases its connection after each login
+    return LoginService(db.get_credentials, verify_password, on_success=db.rehash_if_needed)
+
+
+# Reverse proxies in front of the app that append to X-Forwarded-For.
+# 0 (the default) means none: the header is then client-supplied and not trusted.
+TRUSTED_PROXIES = int(os.environ.get("LOGIN_TRUSTED_PROXIES", "0"))
+
+
+def get_request_headers() -> dict:
+    """
+    Headers of the current browser connection ({} if they can't be read).
+
+    Uses st.context.headers where Streamlit has it (1.37+). Older versions
+    only offer the private _get_websocket_headers(), so it is tried as a
+    fallback and any failure of it just means "no headers".
+    """
+    context = getattr(st, "context", None)
+    if context is not None:
+        try:
+            return dict(context.headers)
+        except Exception:
+            return {}
+    try:
+        from streamlit.web.server.websocket_headers import _get_websocket_headers
+
+        return dict(_get_websocket_headers() or {})
+    except Exception:
+        return {}
+
+
+def get_client_ip():
+    """
+    Client address for the per-IP login limit, or None to skip that limit.
+
+    Only known when LOGIN_TRUSTED_PROXIES proxies sit in front of the app:
+    the address the outermost trusted proxy saw is taken from the right
+    end of X-Forwarded-For (entries further left are client-supplied and
+    can be spoofed). Without a proxy there is no trustworthy address, and
+    a shared placeholder would turn the per-IP limit into a global one.
+    """
+    if TRUSTED_PROXIES <= 0:
+        return None
+    headers = {name.lower(): value for name, value in get_request_headers().items()}
+    hops = [hop.strip() for hop in headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    if len(hops) < TRUSTED_PROXIES:
+        return None
+    return hops[-TRUSTED_PROXIES]
+
+
 db = get_db()
+login_service = get_login_service()
 
 st.title("🔐 Intelligence Platform")
 
 # If already logged in, allow quick navigation
-if st.session_state.logged_in:
-    st.success(f"Already logged in as **{st.session_state.username}**.")
+user = current_user()
+if user is not None:
+    st.success(f"Already logged in as **{user.get_username()}**.")
+    if user.get_role() == "admin":
+        # Queue depth and latency of the shared login workers
+        st.caption("Login service: {}".format(login_service.metrics()))
     if st.button("Go to dashboard"):
         st.switch_page("pages/1_Cyber_security.py")
     st.stop()
@@ -49,15 +116,17 @@ with tab_login:
         if not login_username or not login_password:
             st.warning("Please enter both username and password.")
         else:
-            ok, role = db.verify_user(login_username, login_password)
+            with st.spinner("Checking credentials..."):
+                ok, role, message = login_service.verify(
+                    login_username, login_password, ip=get_client_ip()
+                )
             if ok:
-                st.session_state.logged_in = True
-                st.session_state.username = login_username
-                st.session_state.role = role or "user"
+                # Signed session token, kept server-side in session_state
+                start_session(login_username, role or "user")
                 st.success(f"Welcome back, {login_username}!")
                 st.switch_page("pages/2_Cybersecurity.py")
             else:
-                st.error("Invalid username or password.")
+                st.error(message)
 
 # -------- REGISTER TAB --------
 with tab_register:
@@ -1,9 +1,16 @@
-import pandas as pd  # used by some helper functions
-
+import os
+import sqlite3
 
 from app.data.db import connect_database
 from app.data.schema import create_all_tables
-from app.services.user_services import migrate_users_from_file
+from app.data.cache import create_version_tracking
+from app.data.indexes import create_indexes, report_indexes
+from app.data.rollups import create_rollups
+from app.data.search_index import create_search_indexes
+from app.services.hash_policy import load_policy
+from app.services.hashers import get_registry
+from app.services.user_services import migrate_users_from_file, print_progress
+from app.services.csv_ingest import ingest_csv
 from app.data.users import insert_user, get_all_users
 from app.data.incidents import (
     get_all_incidents,
@@ -18,33 +25,61 @@ def main():
     # Connect and set up tables
     conn = connect_database()
     create_all_tables(conn)
+    # Triggers that invalidate cached dashboard reads on every write
+    create_version_tracking(conn)
+    # bcrypt cost for new hashes (calibrated once, then read from settings)
+    print("bcrypt cost: {}".format(load_policy(conn)))
 
     # Migrate users from Week 7 file (if it exists)
-    migrated = migrate_users_from_file(conn)
+    migrated = migrate_users_from_file(
+        conn, workers=os.cpu_count() or 1, progress=print_progress
+    )
     if migrated > 0:
         print("Migrated {} user(s) from users.txt".format(migrated))
 
-        # 4. Load CSV data into the database
-    try:
-        pd.read_csv("DATA/cyber_incidents.csv").to_sql(
-            "cyber_incidents", conn, if_exists="append", index=False
-        )
-        pd.read_csv("DATA/datasets_metadata.csv").to_sql(
-            "datasets_metadata", conn, if_exists="append", index=False
-        )
-        pd.read_csv("DATA/it_tickets.csv").to_sql(
-            "it_tickets", conn, if_exists="append", index=False
-        )
-        print("Loaded CSV data into tables")
-    except FileNotFoundError as e:
-        print("CSV file not found:", e)
-
+    # 4. Load CSV data into the database (chunked upserts; unchanged files are skipped)
+    # (path, table, column to upsert on: the table's UNIQUE business key,
+    # or id for older databases whose it_tickets has no ticket_id)
+    for csv_path, table, key in [
+        ("DATA/cyber_incidents.csv", "cyber_incidents", "id"),
+        ("DATA/datasets_metadata.csv", "datasets_metadata", "id"),
+        ("DATA/it_tickets.csv", "it_tickets", ("ticket_id", "id")),
+    ]:
+        try:
+            result = ingest_csv(conn, csv_path, table, key=key)
+        except FileNotFoundError as e:
+            print("CSV file not found:", e)
+            continue
+        except (ValueError, sqlite3.Error) as e:
+            # e.g. an older database whose columns don't match the CSV
+            print("Could not load {}: {}".format(csv_path, e))
+            continue
+
+        if result["skipped"]:
+            print("{} unchanged since last load, skipped".format(csv_path))
+        else:
+            print(
+                "Loaded {} rows into {} ({} rows/sec)".format(
+                    result["rows"], table, result["rows_per_sec"]
+                )
+            )
 
     # Optional: create a demo user for testing
-    inserted = insert_user(conn, "alice", "SecurePass123", role="admin")
+    inserted = insert_user(conn, get_registry(), "alice", "SecurePass123", role="admin")
     if inserted:
         print("Created demo user 'alice'.")
 
+    # Secondary indexes for the dashboard filters (after the data is loaded
+    # so ANALYZE sees real row counts)
+    create_indexes(conn)
+    # Full-text indexes for the dashboard search boxes and the AI assistant's retrieval
+    create_search_indexes(conn)
+    # Pre-aggregated counts for the dashboard metrics and charts
+    create_rollups(conn)
+    report = report_indexes(conn)
+    if report["missing"]:
+        print("Queries still doing full scans:", ", ".join(report["missing"]))
+
     print("\n=== Users ===")
     for row in get_all_users(conn):
         print(row)
@@ -1,6 +1,16 @@
+import pandas as pd
+
+from models.frame_utils import int_column, str_column
+
+
 class Dataset:
     """Represents a dataset in the Data Science domain."""
 
+    COLUMNS = ["id", "name", "source", "category", "size"]
+
+    # Fixed attribute slots instead of a per-object __dict__
+    __slots__ = ("__dataset_id", "__name", "__source", "__category", "__size")
+
     def __init__(self, dataset_id: int, name: str, source: str, category: str, size: int):
         self.__dataset_id = dataset_id
         self.__name = name
@@ -48,3 +58,39 @@ class Dataset:
             f"Dataset(id={self.__dataset_id}, name={self.__name}, "
             f"category={self.__category}, size={self.__size})"
         )
+
+    # ---- Bulk helpers (work on whole columns instead of DataFrame.iterrows) ----
+    @classmethod
+    def frame_columns(cls, df: pd.DataFrame) -> list[list]:
+        """
+        The constructor arguments for every row of a datasets DataFrame, as
+        one list per argument.
+        """
+        return [
+            int_column(df, "id"),
+            str_column(df, "name", "Unnamed Dataset"),
+            str_column(df, "source", "Unknown"),
+            str_column(df, "category", "Other"),
+            int_column(df, "size"),
+        ]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> list["Dataset"]:
+        """Build one object per row of a datasets DataFrame, column by column."""
+        if df.empty:
+            return []
+        return [cls(*row) for row in zip(*cls.frame_columns(df))]
+
+    @classmethod
+    def to_frame(cls, datasets: list["Dataset"]) -> pd.DataFrame:
+        """Turn a list of datasets into a DataFrame (same columns as to_dict)."""
+        return pd.DataFrame(
+            {
+                "id": [d.get_id() for d in datasets],
+                "name": [d.get_name() for d in datasets],
+                "source": [d.get_source() for d in datasets],
+                "category": [d.get_category() for d in datasets],
+                "size": [d.get_size() for d in datasets],
+            },
+            columns=cls.COLUMNS,
+        )
@@ -0,0 +1,18 @@
+"""Column helpers shared by the models' bulk (DataFrame) constructors."""
+import pandas as pd
+
+
+def int_column(df: pd.DataFrame, name: str) -> list:
+    """Integer column with NaN/None as 0 (like int(value or 0))."""
+    if name not in df.columns:
+        return [0] * len(df)
+    return pd.to_numeric(df[name], errors="coerce").fillna(0).astype(int).tolist()
+
+
+def str_column(df: pd.DataFrame, name: str, default) -> list:
+    """String column, or the default (a value or a fallback Series) if missing."""
+    if name in df.columns:
+        return df[name].astype(str).tolist()
+    if isinstance(default, pd.Series):
+        return default.astype(str).tolist()
+    return [default] * len(df)
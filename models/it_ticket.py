@@ -1,6 +1,18 @@
+import pandas as pd
+
+from models.frame_utils import int_column, str_column
+
+
 class ITTicket:
     """Represents an IT support ticket in the IT Operations domain."""
 
+    HIGH_PRIORITY = "High"
+    ACTIVE_STATUSES = ("open", "in-progress")
+    COLUMNS = ["id", "title", "priority", "status", "created_date"]
+
+    # Fixed attribute slots instead of a per-object __dict__
+    __slots__ = ("__ticket_id", "__title", "__priority", "__status", "__created_date")
+
     def __init__(self, ticket_id: int, title: str, priority: str, status: str, created_date: str):
         self.__ticket_id = ticket_id
         self.__title = title
@@ -26,11 +38,11 @@ class ITTicket:
 
     # ---- Helper methods ----
     def is_high_priority(self) -> bool:
-        return self.__priority == "High"
+        return self.__priority == self.HIGH_PRIORITY
 
     def is_active(self) -> bool:
         """Active tickets are those not closed."""
-        return self.__status in ["open", "in-progress"]
+        return self.__status in self.ACTIVE_STATUSES
 
     def to_dict(self) -> dict:
         return {
@@ -46,3 +58,40 @@ class ITTicket:
             f"ITTicket(id={self.__ticket_id}, title={self.__title}, "
             f"priority={self.__priority}, status={self.__status})"
         )
+
+    # ---- Bulk helpers (work on whole columns instead of DataFrame.iterrows) ----
+    @classmethod
+    def frame_columns(cls, df: pd.DataFrame, date_col: str | None = "created_date") -> list[list]:
+        """
+        The constructor arguments for every row of a tickets DataFrame, as
+        one list per argument. date_col is the column holding the created
+        date (None for "").
+        """
+        return [
+            int_column(df, "id"),
+            str_column(df, "title", "Untitled Ticket"),
+            str_column(df, "priority", "Low"),
+            str_column(df, "status", "open"),
+            str_column(df, date_col, "") if date_col else [""] * len(df),
+        ]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, date_col: str | None = "created_date") -> list["ITTicket"]:
+        """Build one object per row of a tickets DataFrame, column by column."""
+        if df.empty:
+            return []
+        return [cls(*row) for row in zip(*cls.frame_columns(df, date_col))]
+
+    @classmethod
+    def to_frame(cls, tickets: list["ITTicket"]) -> pd.DataFrame:
+        """Turn a list of tickets into a DataFrame (same columns as to_dict)."""
+        return pd.DataFrame(
+            {
+                "id": [t.get_id() for t in tickets],
+                "title": [t.get_title() for t in tickets],
+                "priority": [t.get_priority() for t in tickets],
+                "status": [t.get_status() for t in tickets],
+                "created_date": [t.get_created_date() for t in tickets],
+            },
+            columns=cls.COLUMNS,
+        )
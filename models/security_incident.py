@@ -1,6 +1,28 @@
+import pandas as pd
+
+from models.frame_utils import int_column, str_column
+
+
 class SecurityIncident:
     """Represents a cybersecurity incident in the platform."""
 
+    HIGH_RISK_SEVERITIES = ("High", "Critical")
+    OPEN_STATUSES = ("open", "in-progress")
+    COLUMNS = ["id", "title", "incident_type", "severity", "status", "date", "description", "reported_by"]
+
+    # Fixed attribute slots instead of a per-object __dict__ (about 96 B
+    # instead of 144 B per object, ~1.5x; see benchmarks/bench_models.py)
+    __slots__ = (
+        "__incident_id",
+        "__title",
+        "__incident_type",
+        "__severity",
+        "__status",
+        "__date",
+        "__description",
+        "__reported_by",
+    )
+
     def __init__(
         self,
         incident_id: int,
@@ -48,10 +70,10 @@ class SecurityIncident:
 
     # ---- Helper methods (used in dashboards/filters) ----
     def is_high_risk(self) -> bool:
-        return self.__severity in ["High", "Critical"]
+        return self.__severity in self.HIGH_RISK_SEVERITIES
 
     def is_open_or_in_progress(self) -> bool:
-        return self.__status in ["open", "in-progress"]
+        return self.__status in self.OPEN_STATUSES
 
     def get_severity_level(self) -> int:
         """
@@ -79,3 +101,52 @@ class SecurityIncident:
             f"SecurityIncident(id={self.__incident_id}, title={self.__title}, "
             f"severity={self.__severity}, status={self.__status})"
         )
+
+    # ---- Bulk helpers (work on whole columns instead of DataFrame.iterrows) ----
+    @classmethod
+    def frame_columns(cls, df: pd.DataFrame) -> list[list]:
+        """
+        The constructor arguments for every row of an incidents DataFrame,
+        as one list per argument. Missing columns get the same defaults the
+        dashboards used.
+        """
+        type_default = df["type"] if "type" in df.columns else "Unknown"
+        return [
+            int_column(df, "id"),
+            str_column(df, "title", "Untitled"),
+            str_column(df, "incident_type", type_default),
+            str_column(df, "severity", "Low"),
+            str_column(df, "status", "open"),
+            str_column(df, "date", ""),
+            str_column(df, "description", ""),
+            df["reported_by"].tolist() if "reported_by" in df.columns else [None] * len(df),
+        ]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> list["SecurityIncident"]:
+        """
+        Build one object per row of an incidents DataFrame.
+
+        Columns are converted once each and zipped together, which is far
+        cheaper than iterrows() (that builds a Series per row).
+        """
+        if df.empty:
+            return []
+        return [cls(*row) for row in zip(*cls.frame_columns(df))]
+
+    @classmethod
+    def to_frame(cls, incidents: list["SecurityIncident"]) -> pd.DataFrame:
+        """Turn a list of incidents into a DataFrame (same columns as to_dict)."""
+        return pd.DataFrame(
+            {
+                "id": [i.get_id() for i in incidents],
+                "title": [i.get_title() for i in incidents],
+                "incident_type": [i.get_incident_type() for i in incidents],
+                "severity": [i.get_severity() for i in incidents],
+                "status": [i.get_status() for i in incidents],
+                "date": [i.get_date() for i in incidents],
+                "description": [i.get_description() for i in incidents],
+                "reported_by": [i.get_reported_by() for i in incidents],
+            },
+            columns=cls.COLUMNS,
+        )
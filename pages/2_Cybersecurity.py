@@ -1,9 +1,22 @@
 import streamlit as st
 import pandas as pd
 
+from app.data.cache import ensure_version_tracking
 from app.data.db import connect_database
-from app.data.incidents import get_all_incidents
-from app.data.tickets import get_all_tickets
+from app.data.incidents import (
+    INCIDENT_SEARCH_COLUMNS,
+    count_incidents,
+    incident_counts,
+    incident_query,
+)
+from app.data.query_builder import get_column_range, get_distinct_values
+from app.data.rollups import ensure_rollups
+from app.data.search_index import ensure_search_indexes, search_matches
+from app.data.tickets import ticket_counts, ticket_query
+from app.data.timeseries import RESOLUTIONS, incident_series, with_trend
+from app.services.charts import pie_png
+from app.services.page_guard import logout, require_login
+from app.services.table_pager import render_paged_table
 
 from models.security_incident import SecurityIncident
 from models.it_ticket import ITTicket
@@ -19,136 +32,86 @@ st.set_page_config(
 
 INCIDENTS_TABLE = "cyber_incidents"
 
+# Buckets in the moving average drawn over "Incidents Over Time"
+TREND_WINDOW = 7
 
-# --------------------------
-# Session checks (only set if missing)
-# --------------------------
-if "logged_in" not in st.session_state:
-    st.session_state.logged_in = False
-
-if "username" not in st.session_state:
-    st.session_state.username = ""
-
-if "role" not in st.session_state:
-    st.session_state.role = "user"
 
 # --------------------------
-# Guard: if not logged in, send user back
+# Guard: resolves the signed session token to a cached User (stops if none)
 # --------------------------
-if not st.session_state.logged_in:
-    st.error("You must be logged in to view this page.")
-    if st.button("Go to login page"):
-        st.switch_page("home.py") 
+user = require_login()
 
 # --------------------------
 # Page header
 # --------------------------
 st.title("🛡 Cybersecurity Dashboard")
-st.success(f"Hello, **{st.session_state.username}**! You are logged in.")
+st.success(f"Hello, **{user.get_username()}**! You are logged in.")
 
 # --------------------------
-# Load data from DB using your existing functions
+# Sidebar filters (real dashboard-style filters)
+# Filter options come from small DISTINCT / MIN-MAX queries and the filters
+# themselves are applied in SQL, so only matching rows are loaded.
 # --------------------------
 try:
     conn = connect_database()
+    read_conn = connect_database(read_only=True)
 
-    incidents_df = get_all_incidents(conn)
-    tickets_df = get_all_tickets(conn)
-
-    # If your functions already return DataFrames, this keeps them as-is.
-    # If they return lists, this safely turns them into DataFrames.
-    if not isinstance(incidents_df, pd.DataFrame):
-        incidents_df = pd.DataFrame(incidents_df)
+    # Reads below are cached until a write bumps the table's version counter
+    ensure_version_tracking(conn)
+    # Metrics and charts read the pre-aggregated rollup tables
+    ensure_rollups(conn)
+    # Sidebar search is answered by the FTS5 indexes
+    ensure_search_indexes(conn)
 
-    if not isinstance(tickets_df, pd.DataFrame):
-        tickets_df = pd.DataFrame(tickets_df)
+    st.sidebar.header("Filters")
 
-except Exception as e:
-    st.error(f"Failed to load tables: {e}")
-    st.stop()
-
-
-# --------------------------
-# Sidebar filters (real dashboard-style filters)
-# --------------------------
-st.sidebar.header("Filters")
-
-filtered_incidents = incidents_df.copy()
-
-# Severity filter
-if not filtered_incidents.empty and "severity" in filtered_incidents.columns:
-    severity_options = sorted(filtered_incidents["severity"].dropna().unique().tolist())
+    # Severity filter
+    severity_options = get_distinct_values(read_conn, INCIDENTS_TABLE, "severity")
     selected_severity = st.sidebar.multiselect("Severity", severity_options, default=severity_options)
-    filtered_incidents = filtered_incidents[filtered_incidents["severity"].isin(selected_severity)]
 
-# Status filter
-if not filtered_incidents.empty and "status" in filtered_incidents.columns:
-    status_options = sorted(filtered_incidents["status"].dropna().unique().tolist())
+    # Status filter
+    status_options = get_distinct_values(read_conn, INCIDENTS_TABLE, "status")
     selected_status = st.sidebar.multiselect("Status", status_options, default=status_options)
-    filtered_incidents = filtered_incidents[filtered_incidents["status"].isin(selected_status)]
 
-# Date range filter (only if "date" exists)
-if not filtered_incidents.empty and "date" in filtered_incidents.columns:
-    filtered_incidents["date"] = pd.to_datetime(filtered_incidents["date"], errors="coerce")
-    min_d = filtered_incidents["date"].min()
-    max_d = filtered_incidents["date"].max()
+    # Date range filter
+    date_from, date_to = None, None
+    min_d, max_d = get_column_range(read_conn, INCIDENTS_TABLE, "date")
+    min_d = pd.to_datetime(min_d, errors="coerce")
+    max_d = pd.to_datetime(max_d, errors="coerce")
 
     if pd.notna(min_d) and pd.notna(max_d):
         date_range = st.sidebar.date_input("Date range", value=(min_d.date(), max_d.date()))
         if date_range and len(date_range) == 2:
-            start = pd.to_datetime(date_range[0])
-            end = pd.to_datetime(date_range[1])
-            filtered_incidents = filtered_incidents[
-                (filtered_incidents["date"] >= start) & (filtered_incidents["date"] <= end)
-            ]
-
-# Search filter
-search_text = st.sidebar.text_input("Search (title/description/reported_by)", "").strip().lower()
-
-if search_text and not filtered_incidents.empty:
-    search_fields = [c for c in ["title", "description", "reported_by"] if c in filtered_incidents.columns]
-    if search_fields:
-        mask = False
-        for f in search_fields:
-            mask = mask | filtered_incidents[f].astype(str).str.lower().str.contains(search_text)
-        filtered_incidents = filtered_incidents[mask]
-
-
-
-# Convert filtered incidents into SecurityIncident objects
-# --------------------------
-incident_objects = []
-
-if not filtered_incidents.empty:
-    for _, r in filtered_incidents.iterrows():
-        incident_objects.append(
-            SecurityIncident(
-                incident_id=int(r.get("id", 0) or 0),
-                title=str(r.get("title", "Untitled")),
-                incident_type=str(r.get("incident_type", r.get("type", "Unknown"))),
-                severity=str(r.get("severity", "Low")),
-                status=str(r.get("status", "open")),
-                date=str(r.get("date", "")),
-                description=str(r.get("description", "")),
-                reported_by=r.get("reported_by", None),
-            )
-        )
-
-# Convert tickets into ITTicket objects
-ticket_objects = []
-
-if not tickets_df.empty:
-    for _, r in tickets_df.iterrows():
-        ticket_objects.append(
-            ITTicket(
-                ticket_id=int(r.get("id", 0) or 0),
-                title=str(r.get("title", "Untitled Ticket")),
-                priority=str(r.get("priority", "Low")),
-                status=str(r.get("status", "open")),
-                created_date=str(r.get("created_date", r.get("date", ""))),
-            )
-        )
+            date_from, date_to = date_range
+
+    # Search filter
+    search_text = st.sidebar.text_input(
+        "Search (title/description/reported_by)",
+        "",
+        help='Matches whole words, or word beginnings for the last word. Use "quotes" for a phrase.',
+    ).strip()
+    # Top hits for the search (bm25-ranked, matched words highlighted)
+    if search_text:
+        for hit in search_matches(read_conn, INCIDENTS_TABLE, search_text, INCIDENT_SEARCH_COLUMNS, limit=5).itertuples():
+            st.sidebar.markdown(f"**#{hit.id}** {hit.snippet}")
+
+    incident_filters = dict(
+        severity=selected_severity,
+        status=selected_status,
+        date_from=date_from,
+        date_to=date_to,
+        text=search_text,
+    )
+
+    # Counts per key from the rollups (GROUP BY over the matches when searching)
+    total_incidents = count_incidents(read_conn, **incident_filters)
+    severity_counts = incident_counts(read_conn, "severity", **incident_filters)
+    status_counts = incident_counts(read_conn, "status", **incident_filters)
+    ticket_priority_counts = ticket_counts(read_conn, "priority")
 
+except Exception as e:
+    st.error(f"Failed to load tables: {e}")
+    st.stop()
 
 # --------------------------
 # Metrics 
@@ -156,14 +119,16 @@ st.subheader("Security Overview")
 
 col1, col2, col3 = st.columns(3)
 
+# Same rules as SecurityIncident.is_high_risk / is_open_or_in_progress,
+# applied to the per-severity and per-status counts
 with col1:
-    st.metric("Total incidents (filtered)", len(incident_objects))
+    st.metric("Total incidents (filtered)", total_incidents)
 
 with col2:
-    st.metric("High/Critical", sum(1 for i in incident_objects if i.is_high_risk()))
+    st.metric("High/Critical", int(severity_counts.reindex(SecurityIncident.HIGH_RISK_SEVERITIES).sum()))
 
 with col3:
-    st.metric("Open/In progress", sum(1 for i in incident_objects if i.is_open_or_in_progress()))
+    st.metric("Open/In progress", int(status_counts.reindex(SecurityIncident.OPEN_STATUSES).sum()))
 
 st.divider()
 
@@ -267,24 +232,18 @@ with st.expander("➕ Add / 🗑 Delete Incident", expanded=False):
         # DELETE INCIDENT
         # -------------------------
         with tab_delete:
-            st.caption("Select an incident ID and confirm deletion.")
-
-            if incidents_df.empty or "id" not in incidents_df.columns:
-                st.info("No incidents available to delete (or missing 'id' column).")
-            else:
-                incident_ids = incidents_df["id"].dropna().astype(int).tolist()
-                incident_ids = sorted(set(incident_ids))
+            st.caption("Enter an incident ID (from the current filters) and confirm deletion.")
 
-                chosen_id = st.selectbox("Incident ID", incident_ids)
+            # Looks up the one row instead of loading every matching ID
+            chosen_id = int(st.number_input("Incident ID", min_value=1, step=1, key="delete_incident_id"))
+            chosen = incident_query(read_conn, **incident_filters).fetch_row(read_conn, chosen_id)
 
-                # Simple preview (optional)
-                if "title" in incidents_df.columns:  # show title if available
-                    title_preview = incidents_df.loc[incidents_df["id"] == chosen_id, "title"]
-                    if not title_preview.empty:
-                        st.write("Selected:", title_preview.iloc[0])
+            if chosen is None:
+                st.info("No incident with that ID matches the current filters.")
+            else:
+                st.write("Selected:", chosen.get("title") or chosen.get("description") or chosen_id)
 
                 confirm = st.checkbox("I understand this will permanently delete the incident.")
-
                 if st.button("Delete incident", disabled=not confirm):
                     try:
                         cur = conn.cursor()
@@ -293,7 +252,6 @@ with st.expander("➕ Add / 🗑 Delete Incident", expanded=False):
 
                         st.success(f"Incident {chosen_id} deleted.")
                         st.rerun()
-
                     except Exception as e:
                         st.error(f"Failed to delete incident: {e}")
 
@@ -305,29 +263,26 @@ g1, g2, g3 = st.columns(3)
 
 with g1:
     st.subheader("Incidents by Severity")
-    if not filtered_incidents.empty and "severity" in filtered_incidents.columns:
-        st.bar_chart(filtered_incidents["severity"].value_counts())
+    if not severity_counts.empty:
+        st.bar_chart(severity_counts)
     else:
         st.info("No severity data available.")
 
 with g2:
     st.subheader("Incidents Over Time")
-    if not filtered_incidents.empty and "date" in filtered_incidents.columns and filtered_incidents["date"].notna().any():
-        by_day = filtered_incidents.dropna(subset=["date"]).groupby(filtered_incidents["date"].dt.date).size()
-        st.line_chart(by_day)
+    # Pre-bucketed counts; "auto" keeps long ranges to a few hundred points
+    resolution = st.selectbox("Resolution", ["auto"] + RESOLUTIONS, key="incident_resolution")
+    over_time = incident_series(read_conn, resolution=resolution, **incident_filters)
+    if not over_time.empty and over_time["incidents"].any():
+        st.line_chart(with_trend(over_time, TREND_WINDOW))
     else:
         st.info("No date data available.")
 
 with g3:
     st.subheader("Ticket Priority (Pie)")
-    if not tickets_df.empty and "priority" in tickets_df.columns:
-        counts = tickets_df["priority"].value_counts()
-        # streamlit doesn't have a built-in pie chart, so use matplotlib quickly
-        import matplotlib.pyplot as plt
-
-        fig = plt.figure()
-        plt.pie(counts.values, labels=counts.index, autopct="%1.0f%%")
-        st.pyplot(fig)
+    if not ticket_priority_counts.empty:
+        # streamlit doesn't have a built-in pie chart; the PNG is cached per counts
+        st.image(pie_png(ticket_priority_counts))
     else:
         st.info("No ticket priority data available.")
 
@@ -341,19 +296,28 @@ st.subheader("Database Tables")
 
 colA, colB = st.columns(2)
 
+# Only the visible page is fetched and converted (keyset pagination)
 with colA:
     st.markdown("### 🛡 Cyber Incidents (Filtered)")
-    if not incident_objects:
-        st.info("No incidents found with current filters.")
-    else:
-        st.dataframe(pd.DataFrame([i.to_dict() for i in incident_objects]), use_container_width=True)
+    render_paged_table(
+        "cyber_incidents_table",
+        read_conn,
+        incident_query(read_conn, **incident_filters),
+        to_display=lambda rows: SecurityIncident.to_frame(SecurityIncident.from_frame(rows)),
+        descending=True,
+        empty_message="No incidents found with current filters.",
+    )
 
 with colB:
     st.markdown("### 🛠 IT Tickets")
-    if not ticket_objects:
-        st.info("No tickets found in the database.")
-    else:
-        st.dataframe(pd.DataFrame([t.to_dict() for t in ticket_objects]), use_container_width=True)
+    render_paged_table(
+        "cyber_tickets_table",
+        read_conn,
+        ticket_query(read_conn),
+        to_display=lambda rows: ITTicket.to_frame(ITTicket.from_frame(rows, date_col="created_date")),
+        descending=False,
+        empty_message="No tickets found in the database.",
+    )
 
 
 # --------------------------
@@ -362,8 +326,6 @@ with colB:
 st.divider()
 
 if st.button("Log out"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
-    st.session_state.role = "user"
+    logout()
     st.info("You have been logged out.")
-    st.switch_page("home.py")  # change to Home.py if needed
+    st.stop()
@@ -1,9 +1,21 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
+from app.data.cache import ensure_version_tracking
 from app.data.db import connect_database
-from app.data.datasets import get_all_datasets  # <-- if your function name differs, change this line only
+from app.data.datasets import (
+    dataset_counts,
+    dataset_query,
+    dataset_size_bins,
+    dataset_size_points,
+    dataset_totals,
+)
+from app.data.query_builder import get_column_range, get_distinct_values
+from app.data.rollups import ensure_rollups
+from app.data.schema import get_table_columns
+from app.data.search_index import ensure_search_indexes, search_matches
+from app.services.charts import SCATTER_MAX_POINTS, binned_scatter_png, scatter_png
+from app.services.page_guard import logout, require_login
+from app.services.table_pager import render_paged_table
 
 from models.dataset import Dataset
 
@@ -16,102 +28,101 @@ st.set_page_config(
     layout="wide"
 )
 
-# ---- Session defaults ----
-if "logged_in" not in st.session_state:
-    st.session_state.logged_in = False
-
-if "username" not in st.session_state:
-    st.session_state.username = ""
-
-if "role" not in st.session_state:
-    st.session_state.role = "user"
-
-# ---- Guard ----
-if not st.session_state.logged_in:
-    st.error("You must be logged in to view this page.")
-    if st.button("Go to login page"):
-        st.switch_page("home.py")  # change to Home.py if needed
-    st.stop()
+# ---- Guard: resolves the signed session token to a cached User (stops if none) ----
+user = require_login()
 
 # ---- Header ----
 st.title("📦 Data Science Dashboard")
-st.success(f"Hello, **{st.session_state.username}**! You are logged in.")
+st.success(f"Hello, **{user.get_username()}**! You are logged in.")
 
-# ---- Load datasets from DB using your existing function ----
+# ---- Sidebar filters (applied in SQL, only matching rows are loaded) ----
 try:
     conn = connect_database()
-    datasets_df = get_all_datasets(conn)
-
-    if not isinstance(datasets_df, pd.DataFrame):
-        datasets_df = pd.DataFrame(datasets_df)
+    read_conn = connect_database(read_only=True)
+
+    # Reads below are cached until a write bumps the table's version counter
+    ensure_version_tracking(conn)
+    # Metrics and charts read the pre-aggregated rollup table
+    ensure_rollups(conn)
+    # Sidebar search is answered by the FTS5 indexes
+    ensure_search_indexes(conn)
+    table_cols = get_table_columns(read_conn, DATASETS_TABLE)
+
+    if not table_cols or get_column_range(read_conn, DATASETS_TABLE, "id")[0] is None:
+        st.info("No dataset data found.")
+        st.stop()
+
+    st.sidebar.header("Filters")
+
+    # Category filter
+    selected_cat = None
+    if "category" in table_cols:
+        cat_opts = get_distinct_values(read_conn, DATASETS_TABLE, "category")
+        selected_cat = st.sidebar.multiselect("Category", cat_opts, default=cat_opts)
+
+    # Source filter
+    selected_src = None
+    if "source" in table_cols:
+        src_opts = get_distinct_values(read_conn, DATASETS_TABLE, "source")
+        selected_src = st.sidebar.multiselect("Source", src_opts, default=src_opts)
+
+    # Search by name
+    search = st.sidebar.text_input(
+        "Search dataset name",
+        "",
+        help='Matches whole words, or word beginnings for the last word. Use "quotes" for a phrase.',
+    ).strip()
+    # Top hits for the search (bm25-ranked, matched words highlighted)
+    if search:
+        hits = search_matches(read_conn, DATASETS_TABLE, search, ["name", "dataset_name"], limit=5)
+        for hit in hits.itertuples():
+            st.sidebar.markdown(f"**#{hit.id}** {hit.snippet}")
+
+    # Size range (if size exists)
+    size_range = (None, None)
+    if "size" in table_cols:
+        min_size, max_size = get_column_range(read_conn, DATASETS_TABLE, "size")
+        if min_size is not None and int(min_size) < int(max_size):
+            size_range = st.sidebar.slider(
+                "Size range", int(min_size), int(max_size), (int(min_size), int(max_size))
+            )
+            # The full range is no filter (and lets the rollup answer)
+            if size_range == (int(min_size), int(max_size)):
+                size_range = (None, None)
+
+    dataset_filters = dict(
+        category=selected_cat,
+        source=selected_src,
+        text=search,
+        size_min=size_range[0],
+        size_max=size_range[1],
+    )
+
+    # Totals and counts per key from the rollup (GROUP BY over the matches
+    # when searching by name or size)
+    totals = dataset_totals(read_conn, **dataset_filters)
+    category_counts = dataset_counts(read_conn, "category", **dataset_filters)
+    source_counts = dataset_counts(read_conn, "source", **dataset_filters)
 
 except Exception as e:
     st.error(f"Failed to load dataset table: {e}")
     st.stop()
 
-if datasets_df.empty:
-    st.info("No dataset data found.")
-    st.stop()
-
-# ---- Sidebar filters ----
-st.sidebar.header("Filters")
-
-filtered = datasets_df.copy()
-
-# Category filter
-if "category" in filtered.columns:
-    cat_opts = sorted(filtered["category"].dropna().unique().tolist())
-    selected_cat = st.sidebar.multiselect("Category", cat_opts, default=cat_opts)
-    filtered = filtered[filtered["category"].isin(selected_cat)]
-
-# Source filter
-if "source" in filtered.columns:
-    src_opts = sorted(filtered["source"].dropna().unique().tolist())
-    selected_src = st.sidebar.multiselect("Source", src_opts, default=src_opts)
-    filtered = filtered[filtered["source"].isin(selected_src)]
-
-# Search by name
-search = st.sidebar.text_input("Search dataset name", "").strip().lower()
-if search and "name" in filtered.columns:
-    filtered = filtered[filtered["name"].astype(str).str.lower().str.contains(search)]
-
-# Size range (if size exists)
-if "size" in filtered.columns and not filtered.empty:
-    min_size = int(filtered["size"].min())
-    max_size = int(filtered["size"].max())
-    size_range = st.sidebar.slider("Size range", min_size, max_size, (min_size, max_size))
-    filtered = filtered[(filtered["size"] >= size_range[0]) & (filtered["size"] <= size_range[1])]
-
-# ---- OOP conversion (Week 11 requirement) ----
-dataset_objects = []
-
-if not filtered.empty:
-    for _, r in filtered.iterrows():
-        dataset_objects.append(
-            Dataset(
-                int(r.get("id", 0) or 0),
-                str(r.get("name", "Unnamed Dataset")),
-                str(r.get("source", "Unknown")),
-                str(r.get("category", "Other")),
-                int(r.get("size", 0) or 0),
-            )
-        )
 
-# ---- Metrics using object methods ----
+# ---- Metrics (Dataset's rules, pre-aggregated in the rollup) ----
 st.subheader("Dataset Overview")
 
 c1, c2, c3 = st.columns(3)
 
 with c1:
-    st.metric("Datasets (filtered)", len(dataset_objects))
+    st.metric("Datasets (filtered)", int(totals["n"]))
 
 with c2:
-    avg_size = int(filtered["size"].mean()) if ("size" in filtered.columns and not filtered.empty) else 0
+    avg_size = int(totals["size_sum"] / totals["size_n"]) if totals["size_n"] else 0
     st.metric("Average size", avg_size)
 
 with c3:
-    big_count = sum(1 for d in dataset_objects if d.size_mb() > 1)
-    st.metric("Datasets > 1MB", big_count)
+    st.metric("Datasets > 1MB", int(totals["big_n"]))
 
 st.divider()
 
@@ -174,16 +185,16 @@ with st.expander("➕ Add / 🗑 Delete Dataset", expanded=False):
     # DELETE DATASET
     # -------------------------
     with tab_delete:
-        if datasets_df.empty or "id" not in datasets_df.columns:
-            st.info("No datasets available to delete (or missing 'id' column).")
-        else:
-            dataset_ids = sorted(set(datasets_df["id"].dropna().astype(int).tolist()))
-            chosen_id = st.selectbox("Dataset ID", dataset_ids)
+        st.caption("Enter a dataset ID (from the current filters) and confirm deletion.")
+
+        # Looks up the one row instead of loading every matching ID
+        chosen_id = int(st.number_input("Dataset ID", min_value=1, step=1, key="delete_dataset_id"))
+        chosen = dataset_query(read_conn, **dataset_filters).fetch_row(read_conn, chosen_id)
 
-            if "name" in datasets_df.columns:
-                name_preview = datasets_df.loc[datasets_df["id"] == chosen_id, "name"]
-                if not name_preview.empty:
-                    st.write("Selected:", name_preview.iloc[0])
+        if chosen is None:
+            st.info("No dataset with that ID matches the current filters.")
+        else:
+            st.write("Selected:", chosen.get("name") or chosen.get("dataset_name") or chosen_id)
 
             confirm = st.checkbox("I understand this will permanently delete the dataset.")
             if st.button("Delete dataset", disabled=not confirm):
@@ -203,44 +214,49 @@ g1, g2, g3 = st.columns(3)
 
 with g1:
     st.subheader("Datasets by Category")
-    if "category" in filtered.columns and not filtered.empty:
-        st.bar_chart(filtered["category"].value_counts())
+    if not category_counts.empty:
+        st.bar_chart(category_counts)
     else:
         st.info("No category data to chart.")
 
 with g2:
     st.subheader("Datasets by Source")
-    if "source" in filtered.columns and not filtered.empty:
-        st.bar_chart(filtered["source"].value_counts())
+    if not source_counts.empty:
+        st.bar_chart(source_counts)
     else:
         st.info("No source data to chart.")
 
 with g3:
     st.subheader("Size Scatter (ID vs Size)")
-    if "size" in filtered.columns and not filtered.empty:
-        fig = plt.figure()
-        x = filtered["id"] if "id" in filtered.columns else range(len(filtered))
-        plt.scatter(x, filtered["size"])
-        plt.xlabel("Dataset ID")
-        plt.ylabel("Size")
-        st.pyplot(fig)
+    # Decided from the pre-aggregated count: never loads every matching row
+    if totals["size_n"] > 0:
+        if totals["size_n"] <= SCATTER_MAX_POINTS:
+            points = dataset_size_points(read_conn, SCATTER_MAX_POINTS, **dataset_filters)
+            st.image(scatter_png(points["id"], points["size"], xlabel="Dataset ID", ylabel="Size"))
+        else:
+            # Too many points to draw one by one: bin them in SQL and draw the density
+            bins = dataset_size_bins(read_conn, **dataset_filters)
+            st.image(binned_scatter_png(bins, xlabel="Dataset ID", ylabel="Size"))
     else:
         st.info("No size data to chart.")
 
 st.divider()
 
-# ---- Table (from objects -> dict) ----
+# ---- Table (from objects -> dict), one page at a time ----
 st.subheader("Datasets Table (Filtered)")
 
-if not dataset_objects:
-    st.info("No datasets match your filters.")
-else:
-    st.dataframe(pd.DataFrame([d.to_dict() for d in dataset_objects]), use_container_width=True)
+render_paged_table(
+    "datasets_table",
+    read_conn,
+    dataset_query(read_conn, **dataset_filters),
+    to_display=lambda rows: Dataset.to_frame(Dataset.from_frame(rows)),
+    descending=False,
+    empty_message="No datasets match your filters.",
+)
 
 # ---- Logout ----
 st.divider()
 if st.button("Log out"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
-    st.session_state.role = "user"
-    st.switch_page("home.py")  # change to Home.py if needed
+    logout()
+    st.info("You have been logged out.")
+    st.stop()
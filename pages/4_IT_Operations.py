@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 
+from app.data.cache import ensure_version_tracking
 from app.data.db import connect_database
-from app.data.tickets import get_all_tickets
+from app.data.query_builder import get_column_range, get_distinct_values
+from app.data.rollups import ensure_rollups
+from app.data.schema import get_table_columns
+from app.data.search_index import ensure_search_indexes, search_matches
+from app.data.tickets import (
+    TICKET_SEARCH_COLUMNS,
+    count_tickets,
+    ticket_counts,
+    ticket_query,
+)
+from app.services.charts import pie_png
+from app.services.page_guard import logout, require_login
+from app.services.table_pager import render_paged_table
 
 from models.it_ticket import ITTicket
 
@@ -16,108 +28,99 @@ st.set_page_config(
     layout="wide"
 )
 
-# ---- Session defaults ----
-if "logged_in" not in st.session_state:
-    st.session_state.logged_in = False
-
-if "username" not in st.session_state:
-    st.session_state.username = ""
-
-if "role" not in st.session_state:
-    st.session_state.role = "user"
-
-# ---- Guard ----
-if not st.session_state.logged_in:
-    st.error("You must be logged in to view this page.")
-    if st.button("Go to login page"):
-        st.switch_page("home.py")  # change to Home.py if needed
-    st.stop()
+# ---- Guard: resolves the signed session token to a cached User (stops if none) ----
+user = require_login()
 
 # ---- Header ----
 st.title("🛠 IT Operations Dashboard")
-st.success(f"Hello, **{st.session_state.username}**! You are logged in.")
+st.success(f"Hello, **{user.get_username()}**! You are logged in.")
 
 
 
-# ---- Load tickets from DB using your existing function ----
+# ---- Sidebar filters (applied in SQL, only matching rows are loaded) ----
 try:
     conn = connect_database()
-    tickets_df = get_all_tickets(conn)
-
-    if not isinstance(tickets_df, pd.DataFrame):
-        tickets_df = pd.DataFrame(tickets_df)
+    read_conn = connect_database(read_only=True)
+
+    # Reads below are cached until a write bumps the table's version counter
+    ensure_version_tracking(conn)
+    # Metrics and charts read the pre-aggregated rollup tables
+    ensure_rollups(conn)
+    # Sidebar search is answered by the FTS5 indexes
+    ensure_search_indexes(conn)
+    table_cols = get_table_columns(read_conn, TICKETS_TABLE)
+
+    if not table_cols or get_column_range(read_conn, TICKETS_TABLE, "id")[0] is None:
+        st.info("No ticket data found.")
+        st.stop()
+
+    st.sidebar.header("Filters")
+
+    # Priority filter
+    selected_prio = None
+    if "priority" in table_cols:
+        prio_opts = get_distinct_values(read_conn, TICKETS_TABLE, "priority")
+        selected_prio = st.sidebar.multiselect("Priority", prio_opts, default=prio_opts)
+
+    # Status filter
+    selected_status = None
+    if "status" in table_cols:
+        status_opts = get_distinct_values(read_conn, TICKETS_TABLE, "status")
+        selected_status = st.sidebar.multiselect("Status", status_opts, default=status_opts)
+
+    # Date range filter (created_date if available)
+    date_col = "created_date" if "created_date" in table_cols else ("date" if "date" in table_cols else None)
+    date_from, date_to = None, None
+    if date_col:
+        min_d, max_d = get_column_range(read_conn, TICKETS_TABLE, date_col)
+        min_d = pd.to_datetime(min_d, errors="coerce")
+        max_d = pd.to_datetime(max_d, errors="coerce")
+        if pd.notna(min_d) and pd.notna(max_d):
+            date_range = st.sidebar.date_input("Date range", value=(min_d.date(), max_d.date()))
+            if date_range and len(date_range) == 2:
+                date_from, date_to = date_range
+
+    # Search by title
+    search = st.sidebar.text_input(
+        "Search ticket title",
+        "",
+        help='Matches whole words, or word beginnings for the last word. Use "quotes" for a phrase.',
+    ).strip()
+    # Top hits for the search (bm25-ranked, matched words highlighted)
+    if search:
+        for hit in search_matches(read_conn, TICKETS_TABLE, search, TICKET_SEARCH_COLUMNS, limit=5).itertuples():
+            st.sidebar.markdown(f"**#{hit.id}** {hit.snippet}")
+
+    ticket_filters = dict(
+        priority=selected_prio,
+        status=selected_status,
+        date_from=date_from,
+        date_to=date_to,
+        text=search,
+    )
+
+    # Counts per key from the rollups (GROUP BY over the matches when searching)
+    total_tickets = count_tickets(read_conn, **ticket_filters)
+    priority_counts = ticket_counts(read_conn, "priority", **ticket_filters)
+    status_counts = ticket_counts(read_conn, "status", **ticket_filters)
 
 except Exception as e:
     st.error(f"Failed to load ticket table: {e}")
     st.stop()
 
-if tickets_df.empty:
-    st.info("No ticket data found.")
-    st.stop()
-
-# ---- Sidebar filters ----
-st.sidebar.header("Filters")
-
-filtered = tickets_df.copy()
-
-# Priority filter
-if "priority" in filtered.columns:
-    prio_opts = sorted(filtered["priority"].dropna().unique().tolist())
-    selected_prio = st.sidebar.multiselect("Priority", prio_opts, default=prio_opts)
-    filtered = filtered[filtered["priority"].isin(selected_prio)]
-
-# Status filter
-if "status" in filtered.columns:
-    status_opts = sorted(filtered["status"].dropna().unique().tolist())
-    selected_status = st.sidebar.multiselect("Status", status_opts, default=status_opts)
-    filtered = filtered[filtered["status"].isin(selected_status)]
-
-# Date range filter (created_date if available)
-date_col = "created_date" if "created_date" in filtered.columns else ("date" if "date" in filtered.columns else None)
-if date_col:
-    filtered[date_col] = pd.to_datetime(filtered[date_col], errors="coerce")
-    min_d = filtered[date_col].min()
-    max_d = filtered[date_col].max()
-    if pd.notna(min_d) and pd.notna(max_d):
-        date_range = st.sidebar.date_input("Date range", value=(min_d.date(), max_d.date()))
-        if date_range and len(date_range) == 2:
-            start = pd.to_datetime(date_range[0])
-            end = pd.to_datetime(date_range[1])
-            filtered = filtered[(filtered[date_col] >= start) & (filtered[date_col] <= end)]
-
-# Search by title
-search = st.sidebar.text_input("Search ticket title", "").strip().lower()
-if search and "title" in filtered.columns:
-    filtered = filtered[filtered["title"].astype(str).str.lower().str.contains(search)]
-
-# ---- OOP conversion (Week 11 requirement) ----
-ticket_objects = []
-
-if not filtered.empty:
-    for _, r in filtered.iterrows():
-        ticket_objects.append(
-            ITTicket(
-                ticket_id=int(r.get("id", 0) or 0),
-                title=str(r.get("title", "Untitled Ticket")),
-                priority=str(r.get("priority", "Low")),
-                status=str(r.get("status", "open")),
-                created_date=str(r.get(date_col, "")) if date_col else "",
-            )
-        )
-
-# ---- Metrics using object methods ----
+# ---- Metrics (ITTicket's rules applied to the per-key counts) ----
 st.subheader("Ticket Overview")
 
 c1, c2, c3 = st.columns(3)
 
 with c1:
-    st.metric("Tickets (filtered)", len(ticket_objects))
+    st.metric("Tickets (filtered)", total_tickets)
 
 with c2:
-    st.metric("High priority", sum(1 for t in ticket_objects if t.is_high_priority()))
+    st.metric("High priority", int(priority_counts.get(ITTicket.HIGH_PRIORITY, 0)))
 
 with c3:
-    st.metric("Active (open / in-progress)", sum(1 for t in ticket_objects if t.is_active()))
+    st.metric("Active (open / in-progress)", int(status_counts.reindex(ITTicket.ACTIVE_STATUSES).sum()))
 
 st.divider()
 st.subheader("Ticket Actions")
@@ -184,16 +187,16 @@ with st.expander("➕ Add / 🗑 Delete Ticket", expanded=False):
     # DELETE TICKET
     # -------------------------
     with tab_delete:
-        if tickets_df.empty or "id" not in tickets_df.columns:
-            st.info("No tickets available to delete (or missing 'id' column).")
-        else:
-            ticket_ids = sorted(set(tickets_df["id"].dropna().astype(int).tolist()))
-            chosen_id = st.selectbox("Ticket ID", ticket_ids)
+        st.caption("Enter a ticket ID (from the current filters) and confirm deletion.")
+
+        # Looks up the one row instead of loading every matching ID
+        chosen_id = int(st.number_input("Ticket ID", min_value=1, step=1, key="delete_ticket_id"))
+        chosen = ticket_query(read_conn, **ticket_filters).fetch_row(read_conn, chosen_id)
 
-            if "title" in tickets_df.columns:
-                title_preview = tickets_df.loc[tickets_df["id"] == chosen_id, "title"]
-                if not title_preview.empty:
-                    st.write("Selected:", title_preview.iloc[0])
+        if chosen is None:
+            st.info("No ticket with that ID matches the current filters.")
+        else:
+            st.write("Selected:", chosen.get("title") or chosen.get("subject") or chosen_id)
 
             confirm = st.checkbox("I understand this will permanently delete the ticket.")
             if st.button("Delete ticket", disabled=not confirm):
@@ -213,43 +216,42 @@ g1, g2, g3 = st.columns(3)
 
 with g1:
     st.subheader("Tickets by Status (Area)")
-    if "status" in filtered.columns and not filtered.empty:
-        counts = filtered["status"].value_counts()
-        st.area_chart(counts)
+    if not status_counts.empty:
+        st.area_chart(status_counts)
     else:
         st.info("No status data to chart.")
 
 with g2:
     st.subheader("Priority Distribution (Pie)")
-    if "priority" in filtered.columns and not filtered.empty:
-        counts = filtered["priority"].value_counts()
-        fig = plt.figure()
-        plt.pie(counts.values, labels=counts.index, autopct="%1.0f%%")
-        st.pyplot(fig)
+    if not priority_counts.empty:
+        st.image(pie_png(priority_counts))
     else:
         st.info("No priority data to chart.")
 
 with g3:
     st.subheader("Tickets by Priority (Bar)")
-    if "priority" in filtered.columns and not filtered.empty:
-        st.bar_chart(filtered["priority"].value_counts())
+    if not priority_counts.empty:
+        st.bar_chart(priority_counts)
     else:
         st.info("No priority data to chart.")
 
 st.divider()
 
-# ---- Table (from objects -> dict) ----
+# ---- Table (from objects -> dict), one page at a time ----
 st.subheader("Tickets Table (Filtered)")
 
-if not ticket_objects:
-    st.info("No tickets match your filters.")
-else:
-    st.dataframe(pd.DataFrame([t.to_dict() for t in ticket_objects]), use_container_width=True)
+render_paged_table(
+    "tickets_table",
+    read_conn,
+    ticket_query(read_conn, **ticket_filters),
+    to_display=lambda rows: ITTicket.to_frame(ITTicket.from_frame(rows, date_col=date_col)),
+    descending=False,
+    empty_message="No tickets match your filters.",
+)
 
 # ---- Logout ----
 st.divider()
 if st.button("Log out"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
-    st.session_state.role = "user"
-    st.switch_page("home.py")  # change to Home.py if needed
+    logout()
+    st.info("You have been logged out.")
+    st.stop()
@@ -1,8 +1,12 @@
 import streamlit as st
-from openai import OpenAI
 
-# Use the API key stored in .streamlit/secrets.toml
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+from app.data.db import connect_database
+from app.data.search_index import ensure_search_indexes
+from app.services.ai_assistant import AIAssistant
+from app.services.ai_cache import ResponseCache
+from app.services.chat_history import ChatHistory, token_budget
+from app.services.page_guard import require_login
+from app.services.retriever import Retriever
 
 st.set_page_config(
     page_title="AI Assistant",
@@ -10,6 +14,8 @@ st.set_page_config(
     layout="wide",
 )
 
+user = require_login()
+
 st.title("🤖 Multi-Domain AI Assistant")
 
 st.write(
@@ -23,56 +29,80 @@ domain = st.selectbox(
     ["Cybersecurity", "Data Science", "IT Operations"],
 )
 
-# Map domain -> system prompt text (from the lab document)
-if domain == "Cybersecurity":
-    system_prompt = """
-You are a cybersecurity expert assistant.
-Analyze incidents, threats, and provide technical guidance.
-"""
-elif domain == "Data Science":
-    system_prompt = """
-You are a data science expert assistant.
-Help with analysis, visualization, and statistical insights.
-"""
-else:  # IT Operations
-    system_prompt = """
-You are an IT operations expert assistant.
-Help troubleshoot issues, optimize systems, and manage tickets.
-"""
+@st.cache_resource
+def get_response_cache():
+    # Shared by every session: repeated questions skip the API call
+    return ResponseCache()
+
+
+@st.cache_resource
+def prepare_search_indexes():
+    # Records matching each question are added to the prompt from the local
+    # full-text index: built on the first run in this process, then kept
+    # current by triggers, so later reruns skip the check entirely
+    ensure_search_indexes(connect_database())
+    return True
+
+
+prepare_search_indexes()
+
+# One assistant per browser session; the system prompt follows the domain.
+# The API key (and optional OPENAI_BASE_URL) come from .streamlit/secrets.toml
+if "ai_assistant" not in st.session_state:
+    st.session_state.ai_assistant = AIAssistant(
+        api_key=st.secrets["OPENAI_API_KEY"],
+        base_url=st.secrets.get("OPENAI_BASE_URL"),
+        cache=get_response_cache(),
+        retriever=Retriever(),
+    )
+assistant = st.session_state.ai_assistant
+assistant.set_domain(domain)
 
 # --------------------- Session state setup ---------------------
-# We keep a separate chat history for this page.
+# We keep a separate chat history for this page. Only a token-budgeted
+# part of it (recent turns + a summary of older ones) is sent to the API.
 if "ai_domain" not in st.session_state:
     st.session_state.ai_domain = domain
 
-if "ai_messages" not in st.session_state:
-    st.session_state.ai_messages = []
+if "ai_history" not in st.session_state:
+    st.session_state.ai_history = ChatHistory()
+
+history = st.session_state.ai_history
 
 # If the user changes domain, reset the conversation
 if st.session_state.ai_domain != domain:
     st.session_state.ai_domain = domain
-    st.session_state.ai_messages = []
-
-# Always start the conversation with a system message
-# (not shown to the user, but sent to the API).
-base_messages = [
-    {"role": "system", "content": system_prompt.strip()}
-]
+    history.clear()
 
 # --------------------- Sidebar controls ---------------------
 with st.sidebar:
     st.subheader("Chat settings")
     st.write(f"**Current domain:** {domain}")
-    msg_count = len(st.session_state.ai_messages)
+    msg_count = len(history)
     st.metric("Messages", msg_count)
+    st.caption(
+        f"History sent per request: ~{history.payload_tokens(token_budget(domain))} "
+        f"of {token_budget(domain)} tokens"
+    )
+
+    use_cache = st.checkbox(
+        "Reuse cached answers",
+        value=True,
+        help="Untick to always ask the model, e.g. for a fresh answer.",
+    )
+    cache_stats = get_response_cache().stats()
+    st.caption(
+        f"Cache hit rate: {cache_stats['hit_rate']:.0%} "
+        f"({cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, {cache_stats['misses']} misses)"
+    )
 
     if st.button("Clear conversation", use_container_width=True):
-        st.session_state.ai_messages = []
+        history.clear()
         st.success("Conversation cleared.")
         st.experimental_rerun()
 
 # --------------------- Show chat history ---------------------
-for message in st.session_state.ai_messages:
+for message in history.get_messages():
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
@@ -84,27 +114,28 @@ if prompt:
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Save user message into history
-    st.session_state.ai_messages.append(
-        {"role": "user", "content": prompt}
-    )
-
-    # Build full message list: system prompt + chat history
-    messages = base_messages + st.session_state.ai_messages
-
-    # Call the ChatGPT API (non-streaming, like in the lab example)
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-    )
-
-    reply = completion.choices[0].message.content
-
-    # Show assistant reply
+    # Stream the answer into the chat bubble as it arrives. Pressing any
+    # widget meanwhile reruns the script, which closes the generator and so
+    # cancels the HTTP stream.
     with st.chat_message("assistant"):
-        st.markdown(reply)
-
-    # Save assistant reply into history
-    st.session_state.ai_messages.append(
-        {"role": "assistant", "content": reply}
-    )
+        placeholder = st.empty()
+        reply = ""
+        for delta in assistant.ask_stream(
+            history, prompt, use_cache=use_cache
+        ):
+            reply += delta
+            placeholder.markdown(reply + "▌")
+        placeholder.markdown(reply)
+
+        stats = assistant.get_last_stats()
+        if stats.get("cached"):
+            st.caption("Answered from cache")
+        elif stats.get("ttft_ms") is not None:
+            st.caption(
+                f"First token after {stats['ttft_ms']:.0f} ms · "
+                f"{stats['tokens_per_sec']:.1f} tokens/sec"
+            )
+
+    # Save both messages into history
+    history.add("user", prompt)
+    history.add("assistant", reply)
@@ -0,0 +1,249 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from app.services import ai_client
+from app.services.ai_assistant import AIAssistant
+from app.services.ai_client import AIClient, get_client
+
+
+class StubOpenAI:
+    """
+    OpenAI-compatible /chat/completions server on a free local port.
+
+    The first `fail` requests get a 429 (with a Retry-After header if
+    `retry_after` is set). Plain answers echo the last message after
+    `delay` seconds; `max_active` is the most requests handled at once.
+    Streamed answers send one word per chunk, `chunk_delay` apart;
+    `disconnected` is set when the client hangs up before the last chunk.
+    """
+
+    def __init__(self, fail=0, retry_after=None, delay=0.0, words=200, chunk_delay=0.02):
+        self.fail = fail
+        self.retry_after = retry_after
+        self.delay = delay
+        self.words = words
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.disconnected = threading.Event()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:{}/v1".format(self.server.server_address[1])
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, data):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.calls += 1
+                    failing = stub.calls <= stub.fail
+                if failing:
+                    headers = {"Retry-After": str(stub.retry_after)} if stub.retry_after else None
+                    self._send_json(
+                        429, {"error": {"message": "rate limited", "type": "rate_limit"}}, headers
+                    )
+                    return
+
+                if not body.get("stream"):
+                    with stub.lock:
+                        stub.active += 1
+                        stub.max_active = max(stub.max_active, stub.active)
+                    time.sleep(stub.delay)
+                    with stub.lock:
+                        stub.active -= 1
+                    self._send_json(200, {
+                        "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "ok " + body["messages"][-1]["content"]},
+                            "finish_reason": "stop",
+                        }],
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for i in range(stub.words):
+                        chunk = {
+                            "id": "stub", "object": "chat.completion.chunk", "created": 0,
+                            "model": body["model"],
+                            "choices": [{"index": 0, "delta": {"content": f"w{i} "}, "finish_reason": None}],
+                        }
+                        self._chunk(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+                        time.sleep(stub.chunk_delay)
+                    self._chunk(b"data: [DONE]\n\n")
+                    self._chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    stub.disconnected.set()
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make(stub, **kwargs):
+        kwargs.setdefault("base_delay", 0.01)
+        kwargs.setdefault("max_delay", 0.05)
+        client = AIClient(api_key="test", base_url=stub.base_url, **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_retries_rate_limited_requests(make_client):
+    with StubOpenAI(fail=2) as stub:
+        client = make_client(stub)
+
+        assert client.complete("stub-model", [{"role": "user", "content": "hi"}]) == "ok hi"
+
+        stats = client.stats()
+        assert stats["api_calls"] == 3
+        assert stats["retries"] == 2
+        assert stats["errors"] == 0
+
+
+def test_gives_up_after_max_retries(make_client):
+    with StubOpenAI(fail=10) as stub:
+        client = make_client(stub, max_retries=2)
+
+        with pytest.raises(openai.RateLimitError):
+            client.complete("stub-model", [{"role": "user", "content": "hi"}])
+
+        assert stub.calls == 3
+        assert client.stats()["errors"] == 1
+
+
+def test_backoff_is_jittered_and_capped(make_client, monkeypatch):
+    ceilings = []
+
+    def fake_uniform(low, high):
+        ceilings.append(high)
+        return 0.0
+
+    monkeypatch.setattr(ai_client.random, "uniform", fake_uniform)
+    with StubOpenAI(fail=4) as stub:
+        client = make_client(stub, base_delay=0.01, max_delay=0.05)
+        client.complete("stub-model", [{"role": "user", "content": "hi"}])
+
+    # Full jitter over an exponential ceiling that stops at max_delay
+    assert ceilings == [0.01, 0.02, 0.04, 0.05]
+
+
+def test_retry_after_is_a_floor(make_client):
+    with StubOpenAI(fail=1, retry_after=0.5) as stub:
+        client = make_client(stub)
+
+        started = time.perf_counter()
+        client.complete("stub-model", [{"role": "user", "content": "hi"}])
+
+        assert time.perf_counter() - started >= 0.5
+        assert client.stats()["retries"] == 1
+
+
+def test_concurrency_is_limited(make_client):
+    with StubOpenAI(delay=0.1) as stub:
+        client = make_client(stub, max_concurrency=2)
+        requests = [
+            {"model": "stub-model", "messages": [{"role": "user", "content": f"q{i}"}]}
+            for i in range(6)
+        ]
+
+        answers = client.complete_many(requests)
+
+        assert answers == [f"ok q{i}" for i in range(6)]
+        assert stub.calls == 6
+        assert stub.max_active == 2
+
+
+def test_identical_requests_in_flight_are_coalesced(make_client):
+    with StubOpenAI(delay=0.2) as stub:
+        client = make_client(stub)
+        request = {"model": "stub-model", "messages": [{"role": "user", "content": "same"}]}
+
+        answers = client.complete_many([request] * 5)
+
+        assert answers == ["ok same"] * 5
+        assert stub.calls == 1
+        stats = client.stats()
+        assert stats["api_calls"] == 1
+        assert stats["coalesced"] == 4
+        assert stats["in_flight"] == 0
+
+
+def test_closed_client_is_not_handed_out_again():
+    client = get_client("test", "http://127.0.0.1:9/v1")
+    assert get_client("test", "http://127.0.0.1:9/v1") is client
+
+    client.close()
+
+    replacement = get_client("test", "http://127.0.0.1:9/v1")
+    assert replacement is not client
+    replacement.close()
+
+
+def test_ask_stream_cancel_closes_the_stream(make_client):
+    with StubOpenAI(fail=1) as stub:
+        assistant = AIAssistant(api_key="test", model="stub-model", client=make_client(stub))
+        cancel = threading.Event()
+
+        received = []
+        for delta in assistant.ask_stream([], "hello", cancel_event=cancel):
+            received.append(delta)
+            if len(received) == 3:
+                cancel.set()
+
+        stats = assistant.get_last_stats()
+        assert received == ["w0 ", "w1 ", "w2 "]
+        assert stats["cancelled"] is True
+        assert stats["tokens"] == 3
+        # The 429 was retried before streaming started, and the server sees
+        # the connection go away long before its 200 chunks are sent
+        assert stub.calls == 2
+        assert stub.disconnected.wait(timeout=5)
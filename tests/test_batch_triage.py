@@ -0,0 +1,147 @@
+import json
+import re
+import sqlite3
+
+import pytest
+
+from app.data.schema import create_all_tables
+from app.services.batch_triage import (
+    get_checkpoint,
+    get_failed_ids,
+    iter_batches,
+    parse_triage,
+    triage_table,
+)
+from app.services.chat_history import count_tokens
+
+LABELS = ["Low", "Medium", "High", "Critical"]
+
+
+class FakeAssistant:
+    """
+    Stands in for AIAssistant.ask_many: answers every record of a prompt
+    as "High", except ids in skip (left out of the reply) and prompts
+    whose position in a round is in fail_batches (returned as errors).
+    """
+
+    def __init__(self, skip=(), fail_batches=()):
+        self.skip = set(skip)
+        self.fail_batches = set(fail_batches)
+        self.prompts = []
+
+    def set_domain(self, domain):
+        pass
+
+    def get_model(self):
+        return "fake-model"
+
+    def ask_many(self, prompts):
+        replies = []
+        for position, prompt in enumerate(prompts):
+            self.prompts.append(prompt)
+            if position in self.fail_batches:
+                replies.append(RuntimeError("rate limited"))
+                continue
+            ids = [int(i) for i in re.findall(r"^id=(\d+)", prompt, re.M)]
+            replies.append(json.dumps([
+                {"id": i, "severity": "high", "summary": f"record {i}"}
+                for i in ids if i not in self.skip
+            ]))
+        return replies
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "triage.db")
+    create_all_tables(conn)
+    conn.executemany(
+        "INSERT INTO cyber_incidents (id, date, incident_type, severity, status, description) "
+        "VALUES (?, '2024-01-01', 'phishing', 'Low', 'open', ?)",
+        [(i, f"incident number {i}") for i in range(1, 31)],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def triaged_ids(conn):
+    return [row[0] for row in conn.execute("SELECT record_id FROM ai_triage ORDER BY record_id")]
+
+
+def test_iter_batches_respects_budget_and_row_limit():
+    rows = [{"id": i, "description": "word " * 20} for i in range(1, 21)]
+    row_tokens = count_tokens("id=1 | description=" + " ".join(["word"] * 20)) + 1
+
+    batches = list(iter_batches(rows, budget_tokens=row_tokens * 3, max_rows=5))
+    assert [len(batch) for batch in batches] == [3] * 6 + [2]
+
+    batches = list(iter_batches(rows, budget_tokens=10_000, max_rows=5))
+    assert [len(batch) for batch in batches] == [5] * 4
+    assert [record_id for batch in batches for record_id, _ in batch] == list(range(1, 21))
+
+    # A row over the budget still gets a batch of its own
+    assert [len(batch) for batch in iter_batches(rows[:2], budget_tokens=1)] == [1, 1]
+
+
+def test_parse_triage_partial_and_malformed_replies():
+    batch = [(1, "id=1"), (2, "id=2"), (3, "id=3")]
+
+    partial = json.dumps([
+        {"id": 1, "severity": "critical", "summary": " ok "},
+        {"id": 99, "severity": "High", "summary": "not in the batch"},
+    ])
+    assert parse_triage(partial, batch, LABELS) == [(1, "Critical", "ok")]
+
+    scattered = 'Sure! {"id": 2, "severity": "Low", "summary": "a"} and {"id": "x"} {"id": 3, "severity": "??"}'
+    assert parse_triage(scattered, batch, LABELS) == [(2, "Low", "a"), (3, None, "")]
+
+    assert parse_triage("not json at all", batch, LABELS) == []
+    assert parse_triage(None, batch, LABELS) == []
+    assert parse_triage("[1, 2, 3]", batch, LABELS) == []
+
+
+def test_run_stops_on_failure_and_resumes_from_checkpoint(conn):
+    # Second batch of the first round fails: the first and third are kept,
+    # the checkpoint stays after the first
+    stats = triage_table(
+        conn, FakeAssistant(fail_batches={1}), max_rows=5, parallel=3,
+    )
+    assert stats["failed"] == 1
+    assert stats["triaged"] == 10
+    assert triaged_ids(conn) == list(range(1, 6)) + list(range(11, 16))
+    assert get_checkpoint(conn, "cyber_incidents") == 5
+
+    stats = triage_table(conn, FakeAssistant(), max_rows=5, parallel=3)
+    assert stats["failed"] == 0
+    assert stats["rows"] == 25
+    assert triaged_ids(conn) == list(range(1, 31))
+    assert get_checkpoint(conn, "cyber_incidents") == 30
+
+    # Nothing left after the checkpoint
+    assistant = FakeAssistant()
+    assert triage_table(conn, assistant)["rows"] == 0
+    assert assistant.prompts == []
+
+
+def test_retry_failed_triages_only_skipped_records(conn):
+    stats = triage_table(conn, FakeAssistant(skip={4, 17}), max_rows=10)
+    assert stats["missing"] == 2
+    assert stats["pending_failed"] == 2
+    assert get_failed_ids(conn, "cyber_incidents") == [4, 17]
+    assert get_checkpoint(conn, "cyber_incidents") == 30
+
+    # Still skipped: the attempt count goes up
+    triage_table(conn, FakeAssistant(skip={17}), retry_failed=True)
+    assert get_failed_ids(conn, "cyber_incidents") == [17]
+    attempts = conn.execute(
+        "SELECT attempts FROM ai_triage_failed WHERE record_id = 17"
+    ).fetchone()[0]
+    assert attempts == 2
+
+    assistant = FakeAssistant()
+    stats = triage_table(conn, assistant, retry_failed=True)
+    assert stats["rows"] == 1
+    assert stats["pending_failed"] == 0
+    assert re.findall(r"^id=(\d+)", assistant.prompts[0], re.M) == ["17"]
+    assert triaged_ids(conn) == list(range(1, 31))
+    assert get_checkpoint(conn, "cyber_incidents") == 30
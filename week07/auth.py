@@ -1,5 +1,12 @@
 import bcrypt
 import os
+import sys
+from pathlib import Path
+
+# Make the platform's app package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.hash_policy import current_cost  # noqa: E402
 
 # Path to the user data file used for registration & login
 USER_DATA_FILE = "users.txt"
@@ -17,8 +24,9 @@ def hash_password(plain_text_password):
     # Encode the password string into bytes (bcrypt works with bytes, not str)
     password_bytes = plain_text_password.encode("utf-8")
 
-    # Generate a cryptographically secure salt using bcrypt
-    salt = bcrypt.gensalt()
+    # Generate a cryptographically secure salt using bcrypt, at the work
+    # factor the platform's hashing policy calibrated for this host
+    salt = bcrypt.gensalt(rounds=current_cost())
 
     # Hash the password bytes with the generated salt
     hashed_bytes = bcrypt.hashpw(password_bytes, salt)